@@ -0,0 +1,629 @@
+import argparse
+import sys
+import time
+from array import array
+from operator import itemgetter
+import topology
+import strategyRegistry
+import dancingLinks
+from strategyRegistry import SCOPE_CELLS
+
+#=============================================================================================================================================
+#
+#   Any Size Engine
+#   ---------------
+#
+#   Solves grids of any size - 4x4, 9x9, 16x16 and 25x25 (mini-grids of 2, 3, 4 or 5 cells across). The bitmask engine (bitmaskEngine.py)
+#   is built for 9x9 only: its lookup tables are indexed by 9-bit masks and its units are numbered for 27 of them. This engine keeps the
+#   same representation, but sized from the grid's topology (topology.forSize()) when the grid is made:
+#       - values - the solved value for each cell (0 if not solved yet)
+#       - cands  - a size-bit candidate mask for each cell (bit d - 1 set if d is still a candidate), so up to 25 bits
+#       - places - for each unit (rows, then columns, then mini-grids) and each digit, a mask of the positions in the unit where the digit
+#                  can still go
+#   The tables for each size (Layout) are built once and shared by every grid of that size. Masks are too wide for lookup tables, so
+#   bits are counted with int.bit_count() and walked lowest first (m & -m).
+#
+#   The techniques are the cheap ones, which do most of the work on the larger grids - Naked Singles, Hidden Singles (tier 0), Pointing
+#   and Claiming Pairs / Triples and Naked Pairs (tier 1) - in their own strategy registry (STRATEGIES). propagate() applies them a tier
+#   at a time, as the scheduler does, until none of them can make progress. To keep that cheap on the larger grids, cells brought down to
+#   one candidate are queued as it happens (for naked singles) and the units changed are marked (for hidden singles).
+#
+#   If the techniques stall, Dancing Links (dancingLinks.py, built for the grid's size) takes over by default, as in sudukoSolver.py. The
+#   alternative backend, search, is the same as backtrackSearch.py: minimum remaining values, each change recorded on the grid's trail so
+#   a failed guess is rolled back rather than copied, and below the first guess only tier 0 is used (GUESS_MAX_TIER). Dancing Links does
+#   far less work per guess, which on a 16x16 grid more than makes up for it needing more of them.
+#
+#   Speed depends on Numba, which is optional. Run as a program, Dancing Links uses its compiled search (compiledLinks.py, through
+#   dancingLinks.useKernel()) when Numba is installed, and only then are 16x16 puzzles solved well under a second: on the 16x16 corpus
+#   (benchmarks/corpora/sizes) p95 is about 50ms and the slowest puzzle about 0.25s. In pure Python (--no-kernel, or no Numba) most still
+#   are, but p95 is about 0.8s and the slowest puzzle, which needs 347k Dancing Links nodes, takes about 3.5s.
+#
+#   Puzzles are strings of size * size characters, one per cell: the digits 1-9 then the letters A-P for 10-25 (so 16x16 uses 1-9 and A-G)
+#   and '-', '.' or '0' for blanks. The size is worked out from the length.
+#
+#   Run as a program, each puzzle in the input (one per line, or with --size the grid format of size lines of size characters) is solved
+#   and its solution written as a line, or the puzzle unchanged if it has none. The time per puzzle is reported on stderr at the end.
+#
+#   Usage:  python anySizeEngine.py [input file] [-o output file] [--size N] [--backend dlx|search] [--no-kernel]
+#==============================================================================================================================================
+
+#============================================
+# Globals / Constants
+#============================================
+
+SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+BLANKS = "-.0"
+SIZES = (4, 9, 16, 25)
+BACKENDS = ("dlx", "search")
+GUESS_MAX_TIER = 0
+
+#============================================
+# Layout
+#============================================
+
+class Layout:
+    # The tables for one size of grid, built from its topology.
+    def __init__(self, topologyIn):
+        size = topologyIn.size
+        box = topologyIn.box
+        units = topologyIn.units
+        self.topology = topologyIn
+        self.size = size
+        self.box = box
+        self.cells = topologyIn.cells
+        self.allCandidates = (1 << size) - 1
+        self.units = units
+        self.peers = topologyIn.peers
+
+        # For each cell, the offset into places and the inverted position bit for each of its three units (row, column, mini-grid).
+        self.cellUnitBits = tuple(tuple(x for u in topologyIn.cellUnits[cell] for x in (u * size, self.allCandidates ^ (1 << units[u].index(cell))))
+                                  for cell in range(self.cells))
+        self.unitGetters = tuple(itemgetter(*u) for u in units)
+
+        # For each cell, its three units as bits of a unit set (bit u for unit u). Used to mark units as changed.
+        self.cellUnitFlags = tuple(sum(1 << u for u in topologyIn.cellUnits[cell]) for cell in range(self.cells))
+        self.allUnits = (1 << (3 * size)) - 1
+
+        # Positions of the mini-rows / mini-cols inside a mini-grid. The mini-row masks are also the segments of a row or column that
+        # lie in one mini-grid.
+        self.miniRowMasks = tuple(((1 << box) - 1) << (m * box) for m in range(box))
+        self.miniColMasks = tuple(sum(1 << ((r * box) + m) for r in range(box)) for m in range(box))
+
+        # The cells a pointing / claiming candidate is removed from, for each mini-grid (or line) and mini-line.
+        boxes = topologyIn.miniGridCells
+        self.pointingRowCells = tuple(tuple(tuple(c for c in topologyIn.rowCells[topologyIn.rowOfCell[boxes[b][m * box]]] if c not in boxes[b])
+                                            for m in range(box)) for b in range(size))
+        self.pointingColCells = tuple(tuple(tuple(c for c in topologyIn.colCells[topologyIn.colOfCell[boxes[b][m]]] if c not in boxes[b])
+                                            for m in range(box)) for b in range(size))
+        self.claimingCells = tuple(tuple(tuple(c for c in boxes[topologyIn.miniGridOfCell[units[u][s * box]]] if c not in units[u])
+                                         for s in range(box)) for u in range(2 * size))
+
+LAYOUTS = {}
+
+def layoutFor(sizeIn):
+    layout = LAYOUTS.get(sizeIn)
+    if layout is None:
+        if sizeIn not in SIZES:
+            raise ValueError(f"Grid size must be one of {', '.join(map(str, SIZES))}, not {sizeIn}")
+        layout = LAYOUTS[sizeIn] = Layout(topology.forSize(sizeIn))
+    return layout
+
+#============================================
+# Grid
+#============================================
+
+class SizedGrid:
+    __slots__ = ("layout", "values", "cands", "places", "trail", "contradiction", "singles", "dirtyUnits")
+
+    def __init__(self, layoutIn):
+        self.layout = layoutIn
+        self.values = array('b', [0]) * layoutIn.cells
+        self.cands = array('L', [layoutIn.allCandidates]) * layoutIn.cells
+        self.places = array('L', [layoutIn.allCandidates]) * (3 * layoutIn.size * layoutIn.size)
+
+        # As MaskGrid - when set to an array (see checkpoint()) every change is recorded on it as a (cell, removed candidates) pair,
+        # a removed mask of 0 recording a value being set.
+        self.trail = None
+
+        # Set as soon as an unsolved cell loses its last candidate. Cleared by rollback().
+        self.contradiction = False
+
+        # The cells brought down to one candidate, for doNakedSingle(), and the units (as a unit set) changed since doHiddenSingles()
+        # last looked. So neither has to scan the whole grid each time round.
+        self.singles = []
+        self.dirtyUnits = layoutIn.allUnits
+
+def createGrid(sizeIn, valuesIn):
+    # valuesIn is a list of (cell index, value)
+    layout = layoutFor(sizeIn)
+    gridOut = SizedGrid(layout)
+    for cell, value in valuesIn:
+        removeCandidates(gridOut, cell, layout.allCandidates ^ (1 << (value - 1)))
+    doNakedSingle(gridOut)
+    return gridOut
+
+def numOutstandingCells(gridIn):
+    return gridIn.values.count(0)
+
+#============================================
+# Core updates
+#============================================
+
+def removeCandidates(gridIn, cellIn, maskIn):
+    # Remove the candidates in maskIn from a cell, keeping the unit place masks in step. Returns the number removed.
+    cands = gridIn.cands
+    removed = cands[cellIn] & maskIn
+    if not removed:
+        return 0
+    left = cands[cellIn] ^ removed
+    cands[cellIn] = left
+    if not left & (left - 1):
+        if left:
+            gridIn.singles.append(cellIn)
+        elif not gridIn.values[cellIn]:
+            gridIn.contradiction = True
+    if gridIn.trail is not None:
+        gridIn.trail.extend((cellIn, removed))
+    layout = gridIn.layout
+    gridIn.dirtyUnits |= layout.cellUnitFlags[cellIn]
+    places = gridIn.places
+    rowOffset, rowBits, colOffset, colBits, boxOffset, boxBits = layout.cellUnitBits[cellIn]
+    m = removed
+    while m:
+        low = m & -m
+        d = low.bit_length() - 1
+        places[rowOffset + d] &= rowBits
+        places[colOffset + d] &= colBits
+        places[boxOffset + d] &= boxBits
+        m ^= low
+    return removed.bit_count()
+
+def removeCandidateFromCells(gridIn, cellsIn, maskIn):
+    count = 0
+    for cell in cellsIn:
+        count += removeCandidates(gridIn, cell, maskIn)
+    return count
+
+def solveCell(gridIn, indexIn):
+    # Cell is solved. So, set its value, empty its candidates and remove the value from its dependants.
+    layout = gridIn.layout
+    cands = gridIn.cands
+    places = gridIn.places
+    trail = gridIn.trail
+    mask = cands[indexIn]
+    gridIn.values[indexIn] = mask.bit_length()
+    if trail is not None:
+        trail.extend((indexIn, 0))
+    removeCandidates(gridIn, indexIn, mask)
+
+    # Removing a single candidate, so this is removeCandidates() written out for speed.
+    d = mask.bit_length() - 1
+    cellUnitBits = layout.cellUnitBits
+    cellUnitFlags = layout.cellUnitFlags
+    singles = gridIn.singles
+    dirty = 0
+    for dependant in layout.peers[indexIn]:
+        c = cands[dependant]
+        if not c & mask:
+            continue
+        c ^= mask
+        cands[dependant] = c
+        if not c & (c - 1):
+            if c:
+                singles.append(dependant)
+            else:
+                # Only unsolved cells still have candidates, so this one now has nowhere to go.
+                gridIn.contradiction = True
+        if trail is not None:
+            trail.extend((dependant, mask))
+        dirty |= cellUnitFlags[dependant]
+        rowOffset, rowBits, colOffset, colBits, boxOffset, boxBits = cellUnitBits[dependant]
+        places[rowOffset + d] &= rowBits
+        places[colOffset + d] &= colBits
+        places[boxOffset + d] &= boxBits
+    gridIn.dirtyUnits |= dirty
+
+def checkpoint(gridIn):
+    # Start recording changes, if not already, and return a mark that rollback() can return the grid to.
+    if gridIn.trail is None:
+        gridIn.trail = array('L')
+    return len(gridIn.trail)
+
+def rollback(gridIn, markIn):
+    # Roll the grid back to the point where the trail was markIn long. The search only rolls back to where the techniques had finished,
+    # so there are no singles or changed units left to look at there.
+    trail = gridIn.trail
+    cands = gridIn.cands
+    places = gridIn.places
+    allCandidates = gridIn.layout.allCandidates
+    cellUnitBits = gridIn.layout.cellUnitBits
+    while len(trail) > markIn:
+        removed = trail.pop()
+        cell = trail.pop()
+        if not removed:
+            gridIn.values[cell] = 0
+            continue
+        cands[cell] |= removed
+        rowOffset, rowBits, colOffset, colBits, boxOffset, boxBits = cellUnitBits[cell]
+        m = removed
+        while m:
+            low = m & -m
+            d = low.bit_length() - 1
+            places[rowOffset + d] |= allCandidates ^ rowBits
+            places[colOffset + d] |= allCandidates ^ colBits
+            places[boxOffset + d] |= allCandidates ^ boxBits
+            m ^= low
+    gridIn.contradiction = False
+    gridIn.singles.clear()
+    gridIn.dirtyUnits = 0
+
+def hasContradiction(gridIn):
+    # True if an unsolved cell has no candidates left, or a digit still to be placed in a unit has nowhere to go.
+    # A cell running out of candidates is flagged as it happens. A solved cell leaves its digit with no places in each of its three
+    # units, so any more place masks than that at 0 are digits with nowhere to go.
+    if gridIn.contradiction:
+        return True
+    values = gridIn.values
+    return gridIn.places.count(0) > 3 * (len(values) - values.count(0))
+
+#============================================
+# Techniques
+#============================================
+
+def doNakedSingle(gridIn):
+    # The cells brought down to one candidate are queued as it happens. Solving one can queue more, which are picked up too.
+    updateCount = 0
+    cands = gridIn.cands
+    singles = gridIn.singles
+    while singles:
+        cell = singles.pop()
+        c = cands[cell]
+        if c and not c & (c - 1):
+            solveCell(gridIn, cell)
+            updateCount += 1
+    return updateCount
+
+def doHiddenSingles(gridIn):
+    # A digit with only one place left in a unit goes there.
+    updateCount = 0
+    layout = gridIn.layout
+    size = layout.size
+    places = gridIn.places
+    cands = gridIn.cands
+    allCandidates = layout.allCandidates
+    units = layout.units
+    dirty = gridIn.dirtyUnits
+    gridIn.dirtyUnits = 0
+    while dirty:
+        low = dirty & -dirty
+        dirty ^= low
+        u = low.bit_length() - 1
+        cells = units[u]
+        offset = u * size
+        for d in range(size):
+            w = places[offset + d]
+            if w and not w & (w - 1):
+                cell = cells[w.bit_length() - 1]
+                removeCandidates(gridIn, cell, allCandidates ^ (1 << d))
+                if cands[cell]:
+                    solveCell(gridIn, cell)
+                    updateCount += 1
+    return updateCount
+
+def doPPoT(gridIn):
+    # Pointing Pairs / Triples (/ Quads ...) - a digit confined to one mini-row or mini-col of a mini-grid can't go anywhere else in that
+    # row or column.
+    updateCount = 0
+    layout = gridIn.layout
+    size = layout.size
+    places = gridIn.places
+    for b in range(size):
+        offset = (2 * size + b) * size
+        for d in range(size):
+            w = places[offset + d]
+            if not w & (w - 1):
+                continue
+            for m, rowMask in enumerate(layout.miniRowMasks):
+                if not w & ~rowMask:
+                    updateCount += removeCandidateFromCells(gridIn, layout.pointingRowCells[b][m], 1 << d)
+                    break
+            else:
+                for m, colMask in enumerate(layout.miniColMasks):
+                    if not w & ~colMask:
+                        updateCount += removeCandidateFromCells(gridIn, layout.pointingColCells[b][m], 1 << d)
+                        break
+    return updateCount
+
+def doClaimingPoT(gridIn):
+    # Claiming Pairs / Triples - a digit confined to the part of a row or column inside one mini-grid can't go anywhere else in that
+    # mini-grid.
+    updateCount = 0
+    layout = gridIn.layout
+    size = layout.size
+    places = gridIn.places
+    for u in range(2 * size):
+        offset = u * size
+        for d in range(size):
+            w = places[offset + d]
+            if not w & (w - 1):
+                continue
+            for s, segmentMask in enumerate(layout.miniRowMasks):
+                if not w & ~segmentMask:
+                    updateCount += removeCandidateFromCells(gridIn, layout.claimingCells[u][s], 1 << d)
+                    break
+    return updateCount
+
+def doNakedPairs(gridIn):
+    # Two cells in a unit with the same two candidates - those two digits can't go anywhere else in the unit.
+    updateCount = 0
+    layout = gridIn.layout
+    cands = gridIn.cands
+    for cells, getter in zip(layout.units, layout.unitGetters):
+        seen = set()
+        pairs = []
+        for c in getter(cands):
+            if c and c.bit_count() == 2:
+                if c in seen:
+                    pairs.append(c)
+                seen.add(c)
+        for pair in pairs:
+            for cell in cells:
+                if cands[cell] != pair:
+                    updateCount += removeCandidates(gridIn, cell, pair)
+    return updateCount
+
+STRATEGIES = strategyRegistry.Registry()
+STRATEGIES.register("nakedSingle", doNakedSingle, 0, SCOPE_CELLS)
+STRATEGIES.register("hiddenSingles", doHiddenSingles, 0, SCOPE_CELLS)
+STRATEGIES.register("pointingPoT", doPPoT, 1, SCOPE_CELLS)
+STRATEGIES.register("claimingPoT", doClaimingPoT, 1, SCOPE_CELLS)
+STRATEGIES.register("nakedPairs", doNakedPairs, 1, SCOPE_CELLS)
+
+def propagate(gridIn, maxTierIn=None):
+    # Apply the techniques a tier at a time until none of them can make progress, any progress dropping back to the first tier.
+    # Returns False if the grid is left in a contradiction. With maxTierIn, only the tiers up to it are used.
+    if gridIn.contradiction:
+        return False
+    tiers = STRATEGIES.tiers()
+    if maxTierIn is not None:
+        tiers = tuple(tier for tier in tiers if tier[0].tier <= maxTierIn)
+    tier = 0
+    while tier < len(tiers):
+        changed = 0
+        for strategy in tiers[tier]:
+            changed += STRATEGIES.run(strategy, gridIn)
+            if gridIn.contradiction:
+                return False
+        if changed:
+            if hasContradiction(gridIn):
+                return False
+            if numOutstandingCells(gridIn) == 0:
+                return True
+            tier = 0
+        else:
+            tier = tier + 1
+    return not hasContradiction(gridIn)
+
+#============================================
+# Search
+#============================================
+
+def newStats():
+    return {"nodes": 0, "backtracks": 0}
+
+def pickCell(gridIn):
+    # Minimum remaining values - the unsolved cell with the fewest candidates, which can be one if naked singles are switched off.
+    values = gridIn.values
+    cands = gridIn.cands
+    best = -1
+    bestCount = gridIn.layout.size + 1
+    for cell in range(gridIn.layout.cells):
+        count = cands[cell].bit_count()
+        if count < bestCount and not values[cell]:
+            best = cell
+            bestCount = count
+            if count <= 2:
+                break
+    return best
+
+def searchNode(gridIn, statsIn, maxTierIn=None):
+    statsIn["nodes"] += 1
+    if not propagate(gridIn, maxTierIn):
+        return False
+    if numOutstandingCells(gridIn) == 0:
+        return True
+
+    cell = pickCell(gridIn)
+    allCandidates = gridIn.layout.allCandidates
+    m = gridIn.cands[cell]
+    while m:
+        low = m & -m
+        m ^= low
+        mark = checkpoint(gridIn)
+        removeCandidates(gridIn, cell, allCandidates ^ low)
+        solveCell(gridIn, cell)
+        if searchNode(gridIn, statsIn, GUESS_MAX_TIER):
+            return True
+        rollback(gridIn, mark)
+        statsIn["backtracks"] += 1
+    return False
+
+def countNode(gridIn, limitIn, statsIn, maxTierIn=None):
+    # Returns the number of solutions below this node, stopping once limitIn have been found.
+    statsIn["nodes"] += 1
+    if not propagate(gridIn, maxTierIn):
+        return 0
+    if numOutstandingCells(gridIn) == 0:
+        return 1
+
+    cell = pickCell(gridIn)
+    allCandidates = gridIn.layout.allCandidates
+    found = 0
+    m = gridIn.cands[cell]
+    while m:
+        low = m & -m
+        m ^= low
+        mark = checkpoint(gridIn)
+        removeCandidates(gridIn, cell, allCandidates ^ low)
+        solveCell(gridIn, cell)
+        found += countNode(gridIn, limitIn - found, statsIn, GUESS_MAX_TIER)
+        rollback(gridIn, mark)
+        if found >= limitIn:
+            break
+        statsIn["backtracks"] += 1
+    return found
+
+def search(gridIn, statsIn=None):
+    # Solves the grid in place. Returns False if it has no solution.
+    if statsIn is None:
+        statsIn = newStats()
+    checkpoint(gridIn)
+    try:
+        return searchNode(gridIn, statsIn)
+    finally:
+        gridIn.trail = None
+
+def countSolutions(gridIn, limitIn=2, statsIn=None):
+    if limitIn < 1:
+        raise ValueError(f"Solution limit must be at least 1, not {limitIn}")
+    if statsIn is None:
+        statsIn = newStats()
+    checkpoint(gridIn)
+    try:
+        return countNode(gridIn, limitIn, statsIn)
+    finally:
+        gridIn.trail = None
+
+#============================================
+# Puzzles
+#============================================
+
+def sizeOf(puzzleIn):
+    # The grid size of a puzzle string, from its length.
+    for size in SIZES:
+        if len(puzzleIn) == size * size:
+            return size
+    raise ValueError(f"A puzzle should be {', '.join(str(s * s) for s in SIZES)} cells long, not {len(puzzleIn)}")
+
+def parsePuzzle(puzzleIn):
+    # Returns (size, list of (cell index, value))
+    size = sizeOf(puzzleIn)
+    values = []
+    for i, c in enumerate(puzzleIn.upper()):
+        if c in BLANKS:
+            continue
+        value = SYMBOLS.find(c) + 1
+        if not 0 < value <= size:
+            raise ValueError(f"Cell {i}: {c!r} isn't a value for a {size}x{size} grid (1-{SYMBOLS[size - 1]} or blank)")
+        values.append((i, value))
+    return size, values
+
+def formatValues(valuesIn):
+    return "".join(SYMBOLS[v - 1] if v else "." for v in valuesIn)
+
+def gridCandidates(gridIn):
+    # A candidate mask per cell, solved cells having just their value - what Dancing Links starts from.
+    return [(1 << (v - 1)) if v else m for v, m in zip(gridIn.values, gridIn.cands)]
+
+def solvePuzzle(puzzleIn, statsIn=None, backendIn="dlx"):
+    # Returns the solution as a string, or None if the puzzle has no solution. The techniques are run first, and the backend takes over
+    # if they stall.
+    size, values = parsePuzzle(puzzleIn)
+    grid = createGrid(size, values)
+    if backendIn == "dlx":
+        if not propagate(grid):
+            return None
+        if numOutstandingCells(grid) == 0:
+            return formatValues(grid.values)
+        solution = dancingLinks.solveCandidates(gridCandidates(grid), statsIn, grid.layout.topology)
+        return None if solution is None else formatValues(solution)
+    if not search(grid, statsIn):
+        return None
+    return formatValues(grid.values)
+
+def countPuzzle(puzzleIn, limitIn=2, statsIn=None, backendIn="dlx"):
+    # Returns the number of solutions, up to limitIn.
+    size, values = parsePuzzle(puzzleIn)
+    grid = createGrid(size, values)
+    if backendIn == "dlx":
+        if not propagate(grid):
+            return 0
+        if numOutstandingCells(grid) == 0:
+            return 1
+        return dancingLinks.countCandidates(gridCandidates(grid), limitIn, statsIn, grid.layout.topology)
+    return countSolutions(grid, limitIn, statsIn)
+
+def readPuzzles(fileIn, sizeIn=None):
+    # Yields each puzzle in the file. Without sizeIn each line is a whole puzzle; with it, lines are joined until they make one.
+    buffer = ""
+    for lineNo, line in enumerate(fileIn, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if sizeIn is None:
+            sizeOf(line)
+            yield line
+            continue
+        buffer = buffer + line
+        if len(buffer) == sizeIn * sizeIn:
+            yield buffer
+            buffer = ""
+        elif len(buffer) > sizeIn * sizeIn:
+            raise ValueError(f"Line {lineNo}: puzzle is longer than {sizeIn * sizeIn} cells")
+    if buffer:
+        raise ValueError(f"Incomplete puzzle at end of input ({len(buffer)} cells)")
+
+#============================================
+# Main Program
+#============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve suduko puzzles of any size (4x4, 9x9, 16x16, 25x25).")
+    parser.add_argument("input", nargs="?", default="-", help="puzzle file, or - for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="solution file, or - for stdout (default)")
+    parser.add_argument("--size", type=int, choices=SIZES, help="read the grid format - size lines of size characters per puzzle")
+    parser.add_argument("--backend", choices=BACKENDS, default="dlx", help="used once the techniques stall (default dlx)")
+    parser.add_argument("--no-kernel", action="store_true", help="run Dancing Links in pure Python even if Numba is installed")
+    args = parser.parse_args(argv)
+    if args.backend == "dlx":
+        dancingLinks.useKernel(not args.no_kernel)
+
+    fileIn = sys.stdin if args.input == "-" else None
+    fileOut = sys.stdout if args.output == "-" else None
+    solved = 0
+    unsolved = 0
+    slowest = 0.0
+    try:
+        if fileIn is None:
+            fileIn = open(args.input)
+        if fileOut is None:
+            fileOut = open(args.output, "w")
+        start = time.perf_counter()
+        for puzzle in readPuzzles(fileIn, args.size):
+            puzzleStart = time.perf_counter()
+            solution = solvePuzzle(puzzle, None, args.backend)
+            slowest = max(slowest, time.perf_counter() - puzzleStart)
+            if solution is None:
+                fileOut.write(puzzle + "\n")
+                unsolved = unsolved + 1
+            else:
+                fileOut.write(solution + "\n")
+                solved = solved + 1
+        elapsed = time.perf_counter() - start
+    except (ValueError, OSError) as e:
+        print("Aborting....\n", e, file=sys.stderr)
+        return 1
+    finally:
+        if fileIn is not None and fileIn is not sys.stdin:
+            fileIn.close()
+        if fileOut is not None and fileOut is not sys.stdout:
+            fileOut.close()
+
+    total = solved + unsolved
+    mean = elapsed * 1000 / total if total else 0.0
+    print(f"{total} puzzles ({unsolved} with no solution) in {elapsed:.2f}s - mean {mean:.1f}ms, slowest {slowest * 1000:.1f}ms",
+          file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
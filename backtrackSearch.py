@@ -0,0 +1,117 @@
+import bitmaskEngine as bm
+import scheduler
+
+#=============================================================================================================================================
+#
+#   Backtracking Search
+#   -------------------
+#
+#   A complete depth first search, used when the techniques can't solve the grid on their own. It runs on the bitmask engine.
+#
+#       - At each node the techniques from updateGrid are applied until they stop making progress. This is done by the scheduler
+#         (scheduler.py), so only the units changed by the last guess are looked at again. Below the first guess only the tiers up to
+#         GUESS_MAX_TIER are used - the grid is mostly full by then, and guessing again costs less than running the expensive
+#         techniques at every node.
+#       - If that leaves a contradiction (a cell with no candidates, or a digit with nowhere to go in a unit) the node fails.
+#       - Otherwise the unsolved cell with the fewest candidates is picked and each of its candidates is tried in turn.
+#       - Every change made below a node is recorded on the grid's trail, so backing out of a failed guess just replays the trail
+#         backwards (bitmaskEngine.checkpoint() / rollback()). The grid is never copied.
+#
+#   search() solves the grid in place and returns True, or returns False if the grid has no solution. The nodes visited and the number
+#   of guesses backed out of are counted in the stats dict.
+#
+#   countSolutions() carries on past the first solution, backing out of it like a failed guess, and stops as soon as it has found
+#   limitIn of them. So a limit of 2 is a uniqueness check: 0 - no solution, 1 - unique, 2 - more than one. The grid is left as it was
+#   after the techniques were first applied.
+#==============================================================================================================================================
+
+# Below the first guess only the techniques in tiers up to this are used (None for all of them).
+GUESS_MAX_TIER = 2
+
+def newStats():
+    return {"nodes": 0, "backtracks": 0}
+
+def propagate(gridIn, maxTierIn=None):
+    # Apply the techniques until they stop making progress. Returns False if the grid is left in a contradiction.
+    return scheduler.propagate(gridIn, None, maxTierIn)
+
+def pickCell(gridIn):
+    # Minimum remaining values - the unsolved cell with the fewest candidates. That can be one left with a single candidate if naked
+    # singles are switched off, which the search then places as a guess with only one option.
+    values = gridIn.values
+    cands = gridIn.cands
+    best = -1
+    bestCount = 10
+    for cell in range(bm.CELLS):
+        count = bm.POPCOUNT[cands[cell]]
+        if count < bestCount and not values[cell]:
+            best = cell
+            bestCount = count
+            if count <= 2:
+                break
+    return best
+
+def searchNode(gridIn, statsIn, maxTierIn=None):
+    statsIn["nodes"] += 1
+    if not propagate(gridIn, maxTierIn):
+        return False
+    if bm.numOutstandingCells(gridIn) == 0:
+        return True
+
+    cell = pickCell(gridIn)
+    for d in bm.MASK_INDEXES[gridIn.cands[cell]]:
+        mark = bm.checkpoint(gridIn)
+        bm.removeCandidates(gridIn, cell, bm.ALL_CANDIDATES ^ (1 << d))
+        bm.solveCell(gridIn, cell)
+        if searchNode(gridIn, statsIn, GUESS_MAX_TIER):
+            return True
+        backOut(gridIn, mark)
+        statsIn["backtracks"] += 1
+    return False
+
+def backOut(gridIn, markIn):
+    bm.rollback(gridIn, markIn)
+    # Back where the guess was made, which the techniques had already finished with (and found no contradiction in).
+    gridIn.dirtyUnits = 0
+    gridIn.dirtyDigits = 0
+
+def countNode(gridIn, limitIn, statsIn, maxTierIn=None):
+    # Returns the number of solutions below this node, stopping once limitIn have been found.
+    statsIn["nodes"] += 1
+    if not propagate(gridIn, maxTierIn):
+        return 0
+    if bm.numOutstandingCells(gridIn) == 0:
+        return 1
+
+    cell = pickCell(gridIn)
+    found = 0
+    for d in bm.MASK_INDEXES[gridIn.cands[cell]]:
+        mark = bm.checkpoint(gridIn)
+        bm.removeCandidates(gridIn, cell, bm.ALL_CANDIDATES ^ (1 << d))
+        bm.solveCell(gridIn, cell)
+        found += countNode(gridIn, limitIn - found, statsIn, GUESS_MAX_TIER)
+        backOut(gridIn, mark)
+        if found >= limitIn:
+            break
+        statsIn["backtracks"] += 1
+    return found
+
+def search(gridIn, statsIn=None):
+    if statsIn is None:
+        statsIn = newStats()
+    bm.checkpoint(gridIn)
+    try:
+        return searchNode(gridIn, statsIn)
+    finally:
+        gridIn.trail = None
+
+def countSolutions(gridIn, limitIn=2, statsIn=None):
+    if limitIn < 1:
+        raise ValueError(f"Solution limit must be at least 1, not {limitIn}")
+    if statsIn is None:
+        statsIn = newStats()
+    bm.checkpoint(gridIn)
+    try:
+        return countNode(gridIn, limitIn, statsIn)
+    finally:
+        gridIn.trail = None
@@ -0,0 +1,312 @@
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from itertools import islice
+import bitmaskEngine as bm
+import backtrackSearch
+import dancingLinks
+import scheduler
+import solutionCache
+import solveTrace
+
+#=============================================================================================================================================
+#
+#   Batch Solver
+#   ------------
+#
+#   Solves a stream of puzzles without any prompting, for large puzzle files.
+#
+#   Input is read from a file (or stdin) in either of two formats, which can be mixed:
+#       - one puzzle per line, as an 81 character string
+#       - the grid.txt format, 9 lines of 9 characters
+#   Blank cells can be '-', '.' or '0'. Empty lines and lines starting with '#' are ignored.
+#
+#   Each puzzle is solved with the bitmask engine (techniques, then the backtracking search if needed) and its solution written as an 81
+#   character line, in input order. A puzzle with no solution is written back out unchanged. Puzzles are read, solved and written one at
+#   a time, so memory use doesn't grow with the size of the file. The throughput is reported on stderr at the end.
+#
+#   With --workers the puzzles are spread across a pool of worker processes. They are sent in chunks (--chunk-size puzzles at a time) to
+#   keep the inter-process traffic down, and only a couple of chunks per worker are in flight at once, so memory use still doesn't grow
+#   with the file. Results are written in input order.
+#
+#   With --engine dlx the techniques are run on each puzzle and Dancing Links (dancingLinks.py) takes over where they stall, rather than
+#   the backtracking search.
+#
+#   With --engine numpy each chunk is solved at once by the vectorised NumPy engine (numpyBatch.py), which only hands the puzzles it
+#   can't finish to the backtracking search. NumPy is only needed, and only imported, when this engine is chosen.
+#
+#   With --cache-size (one process, bitmask or dlx engine) solutions are cached by the canonical form of the puzzle (solutionCache.py), so
+#   repeated and symmetry-equivalent puzzles are only solved once. --cache-file keeps the cache in a sqlite file across runs. The cache
+#   counters are reported on stderr at the end.
+#
+#   --strategies loads a strategy config (see strategyRegistry.py) to enable, disable, reorder or re-tier the techniques, in every
+#   worker. --profile (one process) reports the calls, time and eliminations of each technique on stderr at the end.
+#
+#   --count N checks puzzles rather than solving them. Each puzzle is written followed by its number of solutions, counting stops at N
+#   (shown as "N+"), so --count 2 tells unique puzzles (1) from ones with no solution (0) or several (2+). It works with --workers and
+#   the bitmask or dlx engine.
+#
+#   --trace FILE (one process, bitmask or dlx engine) traces each solve (solveTrace.py) and writes its counters - iterations, search
+#   nodes, technique calls / hits / time and time per phase - to FILE as JSON lines. --trace-events adds every placement and elimination,
+#   tagged with the technique that made it, and --trace-min-ms only writes the solves that took at least that long. --metrics FILE writes
+#   the counters added up over the run in the Prometheus text format. Without these options nothing is traced.
+#
+#   With Numba installed the bitmask engine runs its costliest techniques in compiled code (compiledKernel.py), with the same results.
+#   --no-kernel keeps them in pure Python, in every worker.
+#
+#   Usage:  python batchSolver.py [input file] [-o output file] [--workers N] [--chunk-size N] [--engine bitmask|dlx|numpy]
+#                                 [--cache-size N] [--cache-file path] [--strategies json file] [--profile] [--count N]
+#                                 [--trace file [--trace-events] [--trace-min-ms N]] [--metrics prometheus file] [--no-kernel]
+#==============================================================================================================================================
+
+BLANKS = "-.0"
+DIGITS = "123456789"
+INVALID_ONLY = str.maketrans("", "", BLANKS + DIGITS)   # deletes every valid character, leaving any that aren't
+
+def readPuzzles(fileIn):
+    # Yields each puzzle in the file as an 81 character string.
+    buffer = ""
+    for lineNo, line in enumerate(fileIn, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.translate(INVALID_ONLY):
+            raise ValueError(f"Line {lineNo}: unexpected character in {line!r}")
+
+        buffer = buffer + line
+        if len(buffer) == bm.CELLS:
+            yield buffer
+            buffer = ""
+        elif len(buffer) > bm.CELLS:
+            raise ValueError(f"Line {lineNo}: puzzle is longer than {bm.CELLS} cells")
+    if buffer:
+        raise ValueError(f"Incomplete puzzle at end of input ({len(buffer)} cells)")
+
+def parsePuzzle(puzzleIn):
+    # Returns the puzzle as a list of (cell index, value), as loadValuesFromFile() does.
+    return [(i, int(c)) for i, c in enumerate(puzzleIn) if c not in BLANKS]
+
+def solvePuzzle(puzzleIn, statsIn=None, backendIn="search"):
+    # Returns the solution as an 81 character string, or None if the puzzle has no solution. With the dlx backend the techniques are
+    # run first and Dancing Links takes over if they stall.
+    grid = bm.createGrid(parsePuzzle(puzzleIn))
+    if backendIn == "dlx":
+        if not scheduler.propagate(grid):
+            return None
+        if bm.numOutstandingCells(grid) == 0:
+            return "".join(map(str, grid.values))
+        values = dancingLinks.solveMaskGrid(grid, statsIn)
+        return None if values is None else "".join(map(str, values))
+
+    if not backtrackSearch.search(grid, statsIn):
+        return None
+    return "".join(map(str, grid.values))
+
+def solveDlx(puzzleIn):
+    return solvePuzzle(puzzleIn, None, "dlx")
+
+def countPuzzle(puzzleIn, limitIn=2, statsIn=None, backendIn="search"):
+    # Returns the number of solutions, up to limitIn (so with the default of 2: 0 - none, 1 - unique, 2 - more than one). As for
+    # solvePuzzle(), the dlx backend runs the techniques first and Dancing Links counts from where they stall.
+    grid = bm.createGrid(parsePuzzle(puzzleIn))
+    if backendIn == "dlx":
+        if not scheduler.propagate(grid):
+            return 0
+        if bm.numOutstandingCells(grid) == 0:
+            return 1
+        return dancingLinks.countMaskGrid(grid, limitIn, statsIn)
+    return backtrackSearch.countSolutions(grid, limitIn, statsIn)
+
+def countStream(puzzlesIn, limitIn=2, engineIn="bitmask"):
+    # Yields (puzzle, number of solutions up to limitIn) for each puzzle.
+    backend = "dlx" if engineIn == "dlx" else "search"
+    for puzzle in puzzlesIn:
+        yield puzzle, countPuzzle(puzzle, limitIn, None, backend)
+
+def countChunk(puzzlesIn, engineIn="bitmask", limitIn=2):
+    # Worker process entry point for --count - returns the list of solution counts.
+    backend = "dlx" if engineIn == "dlx" else "search"
+    return [countPuzzle(puzzle, limitIn, None, backend) for puzzle in puzzlesIn]
+
+def solveStream(puzzlesIn, cacheIn=None, engineIn="bitmask"):
+    # Yields (puzzle, solution) for each puzzle, solution being None when there isn't one.
+    solver = solveDlx if engineIn == "dlx" else solvePuzzle
+    for puzzle in puzzlesIn:
+        if cacheIn is None:
+            yield puzzle, solver(puzzle)
+        else:
+            yield puzzle, cacheIn.solve(puzzle, solver)
+
+def solveChunk(puzzlesIn, engineIn="bitmask"):
+    # Worker process entry point - solves a list of puzzles and returns the list of solutions.
+    if engineIn == "numpy":
+        import numpyBatch
+        return numpyBatch.solveBatch(puzzlesIn)
+    if engineIn == "dlx":
+        return [solveDlx(puzzle) for puzzle in puzzlesIn]
+    return [solvePuzzle(puzzle) for puzzle in puzzlesIn]
+
+def readChunks(puzzlesIn, chunkSizeIn):
+    puzzles = iter(puzzlesIn)
+    while True:
+        chunk = list(islice(puzzles, chunkSizeIn))
+        if not chunk:
+            return
+        yield chunk
+
+def solveChunks(puzzlesIn, chunkSizeIn=256, engineIn="bitmask"):
+    # As solveStream(), but a chunk at a time.
+    for chunk in readChunks(puzzlesIn, chunkSizeIn):
+        yield from zip(chunk, solveChunk(chunk, engineIn))
+
+def initWorker(strategiesIn, kernelIn=True):
+    # Worker process start up - apply the strategy config, if any, and pick the compiled kernel or pure Python.
+    bm.useKernel(kernelIn)
+    if strategiesIn:
+        bm.STRATEGIES.loadConfig(strategiesIn)
+
+def solveParallel(puzzlesIn, workersIn, chunkSizeIn=256, engineIn="bitmask", strategiesIn=None, countIn=0, kernelIn=True):
+    # As solveStream(), but spread across workersIn processes. Results come back in input order. With countIn the results are
+    # solution counts (up to countIn) rather than solutions.
+    with multiprocessing.Pool(workersIn, initWorker, (strategiesIn, kernelIn)) as pool:
+        pending = deque()
+        for chunk in readChunks(puzzlesIn, chunkSizeIn):
+            if countIn:
+                result = pool.apply_async(countChunk, (chunk, engineIn, countIn))
+            else:
+                result = pool.apply_async(solveChunk, (chunk, engineIn))
+            pending.append((chunk, result))
+            if len(pending) >= workersIn * 2:
+                chunk, result = pending.popleft()
+                yield from zip(chunk, result.get())
+        while pending:
+            chunk, result = pending.popleft()
+            yield from zip(chunk, result.get())
+
+def writeSolutions(resultsIn, fileOut):
+    # Writes each solution (or the puzzle, if it has none) as a line. Returns the number solved and unsolved.
+    solved = 0
+    unsolved = 0
+    for puzzle, solution in resultsIn:
+        if solution is None:
+            fileOut.write(puzzle + "\n")
+            unsolved = unsolved + 1
+        else:
+            fileOut.write(solution + "\n")
+            solved = solved + 1
+    return solved, unsolved
+
+def writeCounts(resultsIn, fileOut, limitIn):
+    # Writes each puzzle followed by its solution count ("2+" for limitIn or more, when limitIn is 2 or more). Returns a
+    # {count: puzzles} dict.
+    totals = {}
+    for puzzle, count in resultsIn:
+        label = f"{count}+" if count >= limitIn > 1 else str(count)
+        fileOut.write(f"{puzzle} {label}\n")
+        totals[label] = totals.get(label, 0) + 1
+    return totals
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a file of suduko puzzles.")
+    parser.add_argument("input", nargs="?", default="-", help="puzzle file, or - for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="solution file, or - for stdout (default)")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes, 0 for one per CPU (default 1, no pool)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="puzzles sent to a worker, or solved by numpy, at a time (default 256)")
+    parser.add_argument("--engine", choices=("bitmask", "dlx", "numpy"), default="bitmask", help="solving engine (default bitmask)")
+    parser.add_argument("--cache-size", type=int, default=0, help="cache up to N solutions in memory (default 0, no cache)")
+    parser.add_argument("--cache-file", help="also keep the cache in this sqlite file")
+    parser.add_argument("--strategies", help="strategy config (JSON) to enable / disable / reorder techniques")
+    parser.add_argument("--profile", action="store_true", help="report time and eliminations per technique (one worker only)")
+    parser.add_argument("--count", type=int, default=0, metavar="N",
+                        help="write each puzzle with its number of solutions, counting up to N (2 checks for a unique solution)")
+    parser.add_argument("--trace", help="write each solve's counters to this file as JSON lines (one worker only)")
+    parser.add_argument("--trace-events", action="store_true", help="also write every placement and elimination to the trace")
+    parser.add_argument("--trace-min-ms", type=float, default=0.0, help="only write solves taking at least this long to the trace")
+    parser.add_argument("--metrics", help="write the counters added up over the run to this file in the Prometheus text format")
+    parser.add_argument("--no-kernel", action="store_true", help="run the kernel techniques in pure Python even if Numba is installed")
+    args = parser.parse_args(argv)
+    if args.workers < 0 or args.chunk_size < 1 or args.cache_size < 0:
+        parser.error("--workers and --cache-size must be 0 or more and --chunk-size at least 1")
+    workers = args.workers or os.cpu_count() or 1
+    if args.cache_file and not args.cache_size:
+        parser.error("--cache-file needs --cache-size")
+    if args.cache_size and (workers > 1 or args.engine == "numpy"):
+        parser.error("--cache-size only works with one worker and the bitmask or dlx engine")
+    if args.profile and workers > 1:
+        parser.error("--profile only works with one worker")
+    if args.count < 0 or (args.count and (args.engine == "numpy" or args.cache_size)):
+        parser.error("--count must be 1 or more, and doesn't work with the numpy engine or --cache-size")
+    tracing = args.trace or args.metrics
+    if tracing and (workers > 1 or args.engine == "numpy" or args.cache_size or args.count):
+        parser.error("--trace / --metrics only work with one worker and the bitmask or dlx engine, without --cache-size or --count")
+    if (args.trace_events or args.trace_min_ms) and not args.trace:
+        parser.error("--trace-events and --trace-min-ms need --trace")
+
+    fileIn = sys.stdin if args.input == "-" else None
+    fileOut = sys.stdout if args.output == "-" else None
+    cache = None
+    traceFile = None
+    totals = solveTrace.TraceTotals() if args.metrics else None
+    try:
+        if fileIn is None:
+            fileIn = open(args.input)
+        if fileOut is None:
+            fileOut = open(args.output, "w")
+        if args.cache_size:
+            cache = solutionCache.SolutionCache(args.cache_size, args.cache_file)
+        initWorker(args.strategies, not args.no_kernel)
+        start = time.perf_counter()
+        if args.count:
+            if workers > 1:
+                results = solveParallel(readPuzzles(fileIn), workers, args.chunk_size, args.engine, args.strategies, args.count,
+                                        not args.no_kernel)
+            else:
+                results = countStream(readPuzzles(fileIn), args.count, args.engine)
+            counts = writeCounts(results, fileOut, args.count)
+            solved = sum(n for label, n in counts.items() if label != "0")
+            unsolved = counts.get("0", 0)
+        elif workers > 1:
+            results = solveParallel(readPuzzles(fileIn), workers, args.chunk_size, args.engine, args.strategies, 0, not args.no_kernel)
+        elif tracing:
+            traceFile = open(args.trace, "w") if args.trace else None
+            results = solveTrace.traceStream(readPuzzles(fileIn), args.engine, traceFile, args.trace_events, args.trace_min_ms / 1000,
+                                             totals)
+        elif args.engine == "numpy":
+            results = solveChunks(readPuzzles(fileIn), args.chunk_size, args.engine)
+        else:
+            results = solveStream(readPuzzles(fileIn), cache, args.engine)
+        if not args.count:
+            solved, unsolved = writeSolutions(results, fileOut)
+        elapsed = time.perf_counter() - start
+        if totals is not None:
+            totals.writePrometheus(args.metrics)
+    except (ValueError, OSError, sqlite3.Error) as e:
+        print("Aborting....\n", e, file=sys.stderr)
+        return 1
+    finally:
+        if fileIn is not None and fileIn is not sys.stdin:
+            fileIn.close()
+        if fileOut is not None and fileOut is not sys.stdout:
+            fileOut.close()
+        if cache is not None:
+            cache.close()
+        if traceFile is not None:
+            traceFile.close()
+
+    total = solved + unsolved
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"{total} puzzles ({unsolved} with no solution) in {elapsed:.2f}s - {rate:.1f} puzzles/sec", file=sys.stderr)
+    if args.count:
+        print("Solutions: " + " ".join(f"{label}={n}" for label, n in sorted(counts.items(), key=lambda c: int(c[0].rstrip("+")))), file=sys.stderr)
+    if cache is not None:
+        print("Cache: " + " ".join(f"{k}={v}" for k, v in cache.stats().items()), file=sys.stderr)
+    if args.profile:
+        print(bm.STRATEGIES.formatReport(), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+try:
+    import resource
+except ImportError:
+    # Unix only - without it (e.g. on Windows) peak RSS is reported as n/a
+    resource = None
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+import batchSolver
+import bitmaskEngine as bm
+import puzzleGenerator
+
+#=============================================================================================================================================
+#
+#   Benchmark Suite
+#   ---------------
+#
+#   Runs sets of puzzles (corpora) through the solve path (batchSolver.solvePuzzle - bitmask techniques, then the backtracking search, or
+#   Dancing Links with --engine dlx) and reports for each:
+#       - latency per puzzle - p50, p95, p99 and max, in ms
+#       - puzzles per second
+#       - peak RSS of the process so far, in MB (n/a where the resource module isn't available, e.g. Windows)
+#       - time, calls and eliminations per technique (from the strategy registry)
+#
+#   The corpora are:
+#       - one per bundled grid file (grid-e1 ... grid-w1), named after the file. These are single puzzles so are repeated (--repeat).
+#       - each puzzle file in benchmarks/corpora (e.g. hardest - well known hard puzzles, including a 17 clue one)
+#       - generated - --generated new puzzles from puzzleGenerator (minimal, unique solution, of every grade), from seeds --seed on, so
+#                     the same seed gives the same puzzles each run. Making them takes a few seconds per hundred, which isn't timed.
+#       - any files given with --corpus name=path (81 character lines or the grid.txt format, as batchSolver reads)
+#
+#   --json writes the results as JSON. --baseline compares against a JSON file written before: a corpus whose p50 or p95 latency is more
+#   than --tolerance percent slower, or whose puzzles/sec is that much lower, is flagged and the exit code is 1. So this can be run before
+#   a deploy to catch regressions. --save-baseline writes the results as the new baseline.
+#
+#   The singles, naked triples / quads and simple colouring run in the compiled kernel (compiledKernel.py) when Numba is installed.
+#   --no-kernel runs them in pure Python, so running with and without it shows what the kernel is worth. Which was used is printed and
+#   saved with the results.
+#
+#   Usage:  python benchmarks/benchmarkSuite.py [--engine bitmask|dlx] [--repeat N] [--generated N] [--corpus name=path] [--only name] [--json file]
+#                                               [--baseline file] [--save-baseline file] [--tolerance percent] [--no-kernel]
+#==============================================================================================================================================
+
+#============================================
+# Globals / Constants
+#============================================
+
+CORPORA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpora")
+COMPARED = (("p50Ms", True), ("p95Ms", True), ("puzzlesPerSec", False))   # (metric, higher is worse)
+
+#============================================
+# Functions / Procedures
+#============================================
+
+def readFile(pathIn):
+    with open(pathIn) as f:
+        return list(batchSolver.readPuzzles(f))
+
+def loadCorpora(argsIn):
+    # Returns a list of (name, puzzles)
+    corpora = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "grid-*.txt"))):
+        corpora.append((os.path.splitext(os.path.basename(path))[0], readFile(path) * argsIn.repeat))
+    for path in sorted(glob.glob(os.path.join(CORPORA_DIR, "*.txt"))):
+        corpora.append((os.path.splitext(os.path.basename(path))[0], readFile(path) * argsIn.repeat))
+    for spec in argsIn.corpus:
+        name, _, path = spec.partition("=")
+        if not path:
+            raise ValueError(f"--corpus should be name=path, not {spec!r}")
+        corpora.append((name, readFile(path)))
+
+    if argsIn.only:
+        corpora = [(name, puzzles) for name, puzzles in corpora if name in argsIn.only]
+    if argsIn.generated and (not argsIn.only or "generated" in argsIn.only):
+        corpora.append(("generated", [puzzle for puzzle, _ in puzzleGenerator.generate(argsIn.generated, argsIn.seed)]))
+    return corpora
+
+def percentile(sortedIn, pctIn):
+    # Nearest rank percentile of an already sorted list
+    rank = max(1, -(-len(sortedIn) * pctIn // 100))
+    return sortedIn[int(rank) - 1]
+
+def peakRssMb():
+    # None if it can't be read here
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+def runCorpus(puzzlesIn, solverIn):
+    bm.STRATEGIES.resetStats()
+    latencies = []
+    unsolved = 0
+    start = time.perf_counter()
+    for puzzle in puzzlesIn:
+        t = time.perf_counter()
+        if solverIn(puzzle) is None:
+            unsolved = unsolved + 1
+        latencies.append((time.perf_counter() - t) * 1000)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {"puzzles": len(puzzlesIn),
+            "unsolved": unsolved,
+            "seconds": elapsed,
+            "puzzlesPerSec": len(puzzlesIn) / elapsed if elapsed > 0 else 0.0,
+            "p50Ms": percentile(latencies, 50),
+            "p95Ms": percentile(latencies, 95),
+            "p99Ms": percentile(latencies, 99),
+            "maxMs": latencies[-1],
+            "peakRssMb": peakRssMb(),
+            "techniques": {r["name"]: {"calls": r["calls"], "ms": r["seconds"] * 1000, "eliminations": r["eliminations"]}
+                           for r in bm.STRATEGIES.report()}}
+
+def compare(resultsIn, baselineIn, toleranceIn):
+    # Returns a list of regression messages
+    regressions = []
+    for name, result in resultsIn.items():
+        base = baselineIn.get(name)
+        if base is None:
+            continue
+        for metric, higherIsWorse in COMPARED:
+            old = base[metric]
+            new = result[metric]
+            if not old:
+                continue
+            change = (new - old) / old * 100
+            if (change if higherIsWorse else -change) > toleranceIn:
+                regressions.append(f"{name}: {metric} {old:.3f} -> {new:.3f} ({change:+.1f}%)")
+    return regressions
+
+def printResults(resultsIn):
+    print(f"{'Corpus':<12} {'Puzzles':>8} {'Unsolved':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'Puzzles/s':>10} {'RSS MB':>7}")
+    for name, r in resultsIn.items():
+        rss = "n/a" if r["peakRssMb"] is None else f"{r['peakRssMb']:.1f}"
+        print(f"{name:<12} {r['puzzles']:>8} {r['unsolved']:>8} {r['p50Ms']:>8.2f} {r['p95Ms']:>8.2f} {r['p99Ms']:>8.2f} "
+              f"{r['maxMs']:>8.2f} {r['puzzlesPerSec']:>10.1f} {rss:>7}")
+
+    # Technique time over all the corpora
+    totals = {}
+    for r in resultsIn.values():
+        for technique, t in r["techniques"].items():
+            total = totals.setdefault(technique, {"calls": 0, "ms": 0.0, "eliminations": 0})
+            for k in total:
+                total[k] += t[k]
+    print(f"\n{'Technique':<20} {'Calls':>8} {'Time ms':>10} {'Elims':>8}")
+    for technique, t in totals.items():
+        print(f"{technique:<20} {t['calls']:>8} {t['ms']:>10.1f} {t['eliminations']:>8}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the solver over the bundled and generated puzzle sets.")
+    parser.add_argument("--engine", choices=("bitmask", "dlx"), default="bitmask", help="solve path (default bitmask)")
+    parser.add_argument("--repeat", type=int, default=20, help="times to run each bundled puzzle (default 20)")
+    parser.add_argument("--generated", type=int, default=200, help="number of generated puzzles (default 200, 0 for none)")
+    parser.add_argument("--seed", type=int, default=1, help="first seed for the generated puzzles (default 1)")
+    parser.add_argument("--corpus", action="append", default=[], help="extra puzzle file, as name=path (can be repeated)")
+    parser.add_argument("--only", action="append", help="only run this corpus (can be repeated)")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="percent slower before flagging a regression (default 10)")
+    parser.add_argument("--no-kernel", action="store_true", help="run the kernel techniques in pure Python even if Numba is installed")
+    args = parser.parse_args(argv)
+    if args.repeat < 1 or args.generated < 0:
+        parser.error("--repeat must be at least 1 and --generated 0 or more")
+
+    kernel = bm.useKernel(not args.no_kernel)
+    try:
+        corpora = loadCorpora(args)
+        baseline = None
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            if baseline.get("engine", "bitmask") != args.engine:
+                print(f"Warning - the baseline was run with the {baseline.get('engine', 'bitmask')} engine", file=sys.stderr)
+            if baseline.get("kernel", False) != kernel:
+                print(f"Warning - the baseline was run {'with' if baseline.get('kernel', False) else 'without'} the compiled kernel",
+                      file=sys.stderr)
+            baseline = baseline["corpora"]
+    except (ValueError, OSError) as e:
+        print("Aborting....\n", e, file=sys.stderr)
+        return 1
+
+    solver = batchSolver.solveDlx if args.engine == "dlx" else batchSolver.solvePuzzle
+
+    # Warm up (imports, caches) so the first corpus isn't penalised
+    for _, puzzles in corpora[:1]:
+        solver(puzzles[0])
+
+    results = {}
+    for name, puzzles in corpora:
+        results[name] = runCorpus(puzzles, solver)
+    printResults(results)
+    print(f"\nKernel techniques: {'compiled kernel' if kernel else 'pure Python'}")
+
+    output = {"engine": args.engine, "kernel": kernel, "python": platform.python_version(), "machine": platform.machine(), "corpora": results}
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(output, f, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressions against {args.baseline} (tolerance {args.tolerance}%):")
+            for r in regressions:
+                print(f"  {r}")
+            return 1
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance}%)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+import sudukoSolver as ss
+import bitmaskEngine as bm
+import scheduler
+from topologySweep import startGrid
+
+#=============================================================================================================================================
+#
+#   Engine Benchmark
+#   ----------------
+#
+#   Times each bundled grid (grid-*.txt) from its clues to where the techniques stop, on:
+#       - list    - the list engine, looping on updateGrid as sudukoSolver.py does
+#       - sweep   - the bitmask engine looping on its updateGrid, which makes the same eliminations in the same order
+#       - solve   - the bitmask engine's solve path (scheduler.propagate), as used by solve() and the batch tools. It gets to the same grid
+#                   but only runs the expensive techniques when the cheap ones stall.
+#   Both bitmask runs must end with the same grid as the list engine. The best of --repeat runs of each, taken in turn, is reported with
+#   the speed up over the list engine. A puzzle whose solve path is less than --target times faster is flagged and the exit code is 1.
+#
+#   The bitmask engine uses the compiled kernel (compiledKernel.py) when Numba is installed. --no-kernel runs it in pure Python, and in
+#   pure Python the solve path falls short of 10x on some of the bundled grids (about 5x on w1, 7-8x on d1, d2 and m1), so the target is
+#   only met with the kernel.
+#
+#   Usage:  python benchmarks/engineBenchmark.py [--repeat N] [--target X] [--no-kernel]
+#==============================================================================================================================================
+
+#============================================
+# Functions / Procedures
+#============================================
+
+def clues(puzzleIn):
+    return [(i, int(c)) for i, c in enumerate(puzzleIn) if c not in "-.0"]
+
+def runList(puzzleIn):
+    grid = startGrid(puzzleIn)
+    while ss.updateGrid(grid) and ss.numOutstandingCells(grid) > 0:
+        pass
+    return [(v, list(c)) for v, c, _ in grid]
+
+def runSweep(puzzleIn):
+    grid = bm.createGrid(clues(puzzleIn))
+    while bm.updateGrid(grid) and bm.numOutstandingCells(grid) > 0:
+        pass
+    return [(v, list(bm.MASK_DIGITS[c])) for v, c in zip(grid.values, grid.cands)]
+
+def runSolve(puzzleIn):
+    grid = bm.createGrid(clues(puzzleIn))
+    scheduler.propagate(grid)
+    return [(v, list(bm.MASK_DIGITS[c])) for v, c in zip(grid.values, grid.cands)]
+
+RUNS = (("list", runList), ("sweep", runSweep), ("solve", runSolve))
+
+def timePuzzle(puzzleIn, repeatIn):
+    # Returns ({run: best ms}, whether the bitmask runs ended with the list engine's grid)
+    best = {}
+    grids = {}
+    for _ in range(repeatIn):
+        for name, run in RUNS:
+            start = time.perf_counter()
+            grids[name] = run(puzzleIn)
+            elapsed = (time.perf_counter() - start) * 1000
+            best[name] = min(best.get(name, elapsed), elapsed)
+    return best, grids["sweep"] == grids["list"] and grids["solve"] == grids["list"]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the list engine against the bitmask engine on the bundled grids.")
+    parser.add_argument("--repeat", type=int, default=20, help="runs of each, the best is reported (default 20)")
+    parser.add_argument("--target", type=float, default=10.0, help="speed up the solve path should reach (default 10)")
+    parser.add_argument("--no-kernel", action="store_true", help="run the bitmask engine in pure Python even if Numba is installed")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    kernel = bm.useKernel(not args.no_kernel)
+
+    print(f"{'Puzzle':<10} {'list ms':>9} {'sweep ms':>9} {'x':>6} {'solve ms':>9} {'x':>6}")
+    short = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "grid-*.txt"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path) as f:
+            puzzle = "".join(f.read().split())
+        best, same = timePuzzle(puzzle, args.repeat)
+        sweepUp = best["list"] / best["sweep"]
+        solveUp = best["list"] / best["solve"]
+        flag = "" if same else "  different grid!"
+        if solveUp < args.target:
+            flag = flag + "  below target"
+        if flag:
+            short.append(name)
+        print(f"{name:<10} {best['list']:>9.2f} {best['sweep']:>9.2f} {sweepUp:>6.1f} {best['solve']:>9.2f} {solveUp:>6.1f}{flag}")
+
+    print(f"\nBitmask engine: {'compiled kernel' if kernel else 'pure Python'}")
+    if short:
+        print(f"{len(short)} puzzle(s) below {args.target:g}x or ending with a different grid: {', '.join(short)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
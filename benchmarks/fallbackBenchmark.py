@@ -0,0 +1,105 @@
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+import sudukoSolver as ss
+import bitmaskEngine
+import backtrackSearch
+import dancingLinks
+from topologySweep import startGrid
+
+#=============================================================================================================================================
+#
+#   Brute Force Fallback Benchmark
+#   ------------------------------
+#
+#   For each bundled grid (and benchmarks/corpora/hardest.txt), runs the list engine techniques until they stall and then times each
+#   brute force fallback from that point:
+#       - original  - the original tryBruteForce: each two candidate cell in turn, one guess deep, by copying the grid (copied below).
+#                     It can fail to find a solution. A guess that leaves a cell with no candidates (solveCell raises) counts as wrong.
+#       - search    - the backtracking search (backtrackSearch.py)
+#       - dlx       - Dancing Links (dancingLinks.py)
+#   Each is run --repeat times and the best time reported.
+#
+#   Usage:  python benchmarks/fallbackBenchmark.py [--repeat N]
+#==============================================================================================================================================
+
+#============================================
+# The fallback as it was originally
+#============================================
+
+def originalBruteForce(gridIn):
+    # Get list of cells with two candidates and try these
+    twoCandidateCells = [i for i, x in enumerate(gridIn) if len(x[1]) == 2]
+
+    for cell in twoCandidateCells:
+        # Try setting each of the two values, and see if it solves the grid...
+        for candidate in gridIn[cell][1]:
+            copyGrid = gridIn.copy()
+            copyGrid[cell] = (0, [candidate], copyGrid[cell][2])
+            try:
+                ss.solveCell(copyGrid, cell)
+                while (ss.updateGrid(copyGrid) and ss.numOutstandingCells(copyGrid) > 0 ):
+                    pass
+            except ValueError:
+                # The guess left a cell with no candidates (solveCell now says so), so it was wrong
+                continue
+            if ss.numOutstandingCells(copyGrid) == 0:
+                return copyGrid
+    return 0
+
+#============================================
+# Functions / Procedures
+#============================================
+
+def searchFallback(gridIn):
+    maskGrid = bitmaskEngine.fromListGrid(gridIn)
+    return maskGrid if backtrackSearch.search(maskGrid) else 0
+
+def dlxFallback(gridIn):
+    return dancingLinks.solveListGrid(gridIn) or 0
+
+FALLBACKS = (("original", originalBruteForce), ("search", searchFallback), ("dlx", dlxFallback))
+
+def loadPuzzles():
+    puzzles = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "grid-*.txt"))):
+        with open(path) as f:
+            puzzles.append((os.path.splitext(os.path.basename(path))[0], f.read().replace("\n", "")))
+    with open(os.path.join(ROOT, "benchmarks", "corpora", "hardest.txt")) as f:
+        lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    puzzles.extend((f"hardest-{i + 1}", p) for i, p in enumerate(lines))
+    return puzzles
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    repeat = int(args[args.index("--repeat") + 1]) if "--repeat" in args else 3
+
+    print(f"{'Puzzle':<12} {'Left':>5}" + "".join(f" {name + ' ms':>14}" for name, _ in FALLBACKS))
+    for name, puzzle in loadPuzzles():
+        grid = startGrid(puzzle)
+        while ss.updateGrid(grid) and ss.numOutstandingCells(grid) > 0:
+            pass
+        left = ss.numOutstandingCells(grid)
+        if left == 0:
+            print(f"{name:<12} {left:>5}   solved by the techniques")
+            continue
+
+        line = f"{name:<12} {left:>5}"
+        for _, fallback in FALLBACKS:
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = fallback([(v, list(c), d) for v, c, d in grid])
+                elapsed = (time.perf_counter() - start) * 1000
+                best = elapsed if best is None else min(best, elapsed)
+            line += f" {best:>10.2f}{'' if result else ' (x)':<4}"
+        print(line)
+    print("\n(x) - no solution found")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
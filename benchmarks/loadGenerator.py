@@ -0,0 +1,244 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+import batchSolver
+import canonicalForm
+from benchmarkSuite import percentile
+
+#=============================================================================================================================================
+#
+#   Load Generator
+#   --------------
+#
+#   Drives the solver service (solverService.py) to find the request rate it can sustain.
+#
+#   Requests are sent open loop: each stage fires requests at a fixed target rate for --stage-seconds, whether or not earlier ones have
+#   been answered, over a pool of --connections keep-alive connections. A request's latency is measured from when it was due to be sent,
+#   so time spent waiting for a free connection counts (otherwise an overloaded service would look faster than it is). Each stage
+#   reports the rate achieved, latency p50 / p95 / p99 / max in ms, and the 503 (busy), 504 (timed out) and other error counts.
+#
+#   The first stage runs at --start-qps and each one after at --step times the rate before. A stage is sustained if its p99 latency is
+#   within --slo-ms, no more than --max-errors percent of its requests fail, and it achieves at least 90% of its target rate. The run
+#   stops at the first stage that isn't, and the highest rate achieved by a sustained stage is reported as the max sustained QPS.
+#
+#   The puzzles are random equivalents of the bundled grid files and corpora (or the --puzzles file). --spawn starts a service on a free
+#   port for the run (with --workers and --engine) and stops it afterwards; otherwise one should be listening on --host / --port.
+#
+#   Usage:  python benchmarks/loadGenerator.py [--spawn [--workers N] [--engine bitmask|dlx]] [--host h] [--port p] [--connections N]
+#                                              [--start-qps N] [--step X] [--stage-seconds N] [--max-stages N] [--slo-ms N]
+#                                              [--max-errors percent] [--puzzles file] [--generated N] [--seed N] [--json file]
+#==============================================================================================================================================
+
+#============================================
+# Globals / Constants
+#============================================
+
+CORPORA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpora")
+SUSTAINED_FRACTION = 0.9
+
+#============================================
+# Client
+#============================================
+
+class Connection:
+    def __init__(self, hostIn, portIn):
+        self.host = hostIn
+        self.port = portIn
+        self.reader = None
+        self.writer = None
+
+    async def post(self, pathIn, bodyIn):
+        # Returns the response status. Connects (or reconnects) as needed.
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            self.writer.write(f"POST {pathIn} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                              f"Content-Length: {len(bodyIn)}\r\n\r\n".encode("latin-1") + bodyIn)
+            await self.writer.drain()
+            status = int((await self.reader.readline()).split()[1])
+            length = 0
+            keepAlive = True
+            while True:
+                line = await self.reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                name = name.strip().lower()
+                if name == "content-length":
+                    length = int(value)
+                elif name == "connection":
+                    keepAlive = value.strip().lower() != "close"
+            await self.reader.readexactly(length)
+        except (OSError, IndexError, ValueError, asyncio.IncompleteReadError):
+            self.close()
+            raise
+        if not keepAlive:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = None
+        self.writer = None
+
+async def sendOne(idleIn, bodyIn, dueIn, resultsIn):
+    connection = await idleIn.get()
+    try:
+        status = await connection.post("/solve", bodyIn)
+    except (OSError, IndexError, ValueError, asyncio.IncompleteReadError):
+        status = 0
+    finally:
+        idleIn.put_nowait(connection)
+    resultsIn.append((status, time.perf_counter() - dueIn))
+
+async def runStage(idleIn, bodiesIn, qpsIn, secondsIn):
+    # Fire requests at qpsIn for secondsIn, then wait for them all. Returns the stage's results.
+    total = max(1, int(qpsIn * secondsIn))
+    results = []
+    tasks = []
+    start = time.perf_counter()
+    for i in range(total):
+        due = start + (i / qpsIn)
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(sendOne(idleIn, bodiesIn[i % len(bodiesIn)], due, results)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency * 1000 for _, latency in results)
+    statuses = [status for status, _ in results]
+    ok = statuses.count(200)
+    return {"targetQps": qpsIn,
+            "requests": total,
+            "achievedQps": ok / elapsed,
+            "p50Ms": percentile(latencies, 50),
+            "p95Ms": percentile(latencies, 95),
+            "p99Ms": percentile(latencies, 99),
+            "maxMs": latencies[-1],
+            "busy": statuses.count(503),
+            "timedOut": statuses.count(504),
+            "errors": total - ok - statuses.count(503) - statuses.count(504)}
+
+def isSustained(stageIn, argsIn):
+    failed = stageIn["busy"] + stageIn["timedOut"] + stageIn["errors"]
+    return (stageIn["p99Ms"] <= argsIn.slo_ms and failed * 100 <= argsIn.max_errors * stageIn["requests"] and
+            stageIn["achievedQps"] >= SUSTAINED_FRACTION * stageIn["targetQps"])
+
+#============================================
+# Functions / Procedures
+#============================================
+
+def loadPuzzles(argsIn):
+    if argsIn.puzzles:
+        with open(argsIn.puzzles) as f:
+            return list(batchSolver.readPuzzles(f))
+    seeds = []
+    for directory, pattern in ((ROOT, "grid-"), (CORPORA_DIR, "")):
+        for name in sorted(os.listdir(directory)):
+            if name.startswith(pattern) and name.endswith(".txt"):
+                with open(os.path.join(directory, name)) as f:
+                    seeds.extend(batchSolver.readPuzzles(f))
+    rng = random.Random(argsIn.seed)
+    return [canonicalForm.randomEquivalent(rng.choice(seeds), rng) for _ in range(argsIn.generated)]
+
+def spawnService(argsIn):
+    # Start a service on a free port. Returns (process, port).
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "solverService.py"), "--host", argsIn.host, "--port", "0",
+                                "--workers", str(argsIn.workers), "--engine", argsIn.engine], stderr=subprocess.PIPE, text=True)
+    line = process.stderr.readline()
+    if not line.startswith("Listening on"):
+        process.kill()
+        raise OSError(f"Service didn't start: {line.strip()}")
+    # Pass on anything else it reports, so its stderr pipe never fills up.
+    threading.Thread(target=shutil.copyfileobj, args=(process.stderr, sys.stderr), daemon=True).start()
+    return process, int(line.split()[2].rsplit(":", 1)[1])
+
+async def run(argsIn, portIn, bodiesIn):
+    idle = asyncio.Queue()
+    connections = [Connection(argsIn.host, portIn) for _ in range(argsIn.connections)]
+    for connection in connections:
+        idle.put_nowait(connection)
+
+    # Warm up - open the connections and let the workers import everything.
+    await runStage(idle, bodiesIn, min(argsIn.start_qps, 50), 1)
+
+    stages = []
+    qps = argsIn.start_qps
+    try:
+        for _ in range(argsIn.max_stages):
+            stage = await runStage(idle, bodiesIn, qps, argsIn.stage_seconds)
+            stage["sustained"] = isSustained(stage, argsIn)
+            stages.append(stage)
+            print(f"{stage['targetQps']:>9.1f} {stage['achievedQps']:>9.1f} {stage['p50Ms']:>8.2f} {stage['p95Ms']:>8.2f} "
+                  f"{stage['p99Ms']:>8.2f} {stage['maxMs']:>8.2f} {stage['busy']:>6} {stage['timedOut']:>6} {stage['errors']:>6} "
+                  f"{'yes' if stage['sustained'] else 'no':>9}", flush=True)
+            if not stage["sustained"]:
+                break
+            qps = qps * argsIn.step
+    finally:
+        for connection in connections:
+            connection.close()
+    return stages
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the request rate the solver service sustains.")
+    parser.add_argument("--spawn", action="store_true", help="start a service for the run")
+    parser.add_argument("--workers", type=int, default=0, help="workers for the spawned service (default 0, one per CPU)")
+    parser.add_argument("--engine", choices=("bitmask", "dlx"), default="bitmask", help="engine for the spawned service (default bitmask)")
+    parser.add_argument("--host", default="127.0.0.1", help="service address (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8081, help="service port (default 8081)")
+    parser.add_argument("--connections", type=int, default=64, help="keep-alive connections (default 64)")
+    parser.add_argument("--start-qps", type=float, default=50.0, help="request rate of the first stage (default 50)")
+    parser.add_argument("--step", type=float, default=1.5, help="rate multiplier from one stage to the next (default 1.5)")
+    parser.add_argument("--stage-seconds", type=float, default=5.0, help="length of each stage (default 5)")
+    parser.add_argument("--max-stages", type=int, default=12, help="most stages to run (default 12)")
+    parser.add_argument("--slo-ms", type=float, default=100.0, help="p99 latency a sustained stage must stay within (default 100)")
+    parser.add_argument("--max-errors", type=float, default=1.0, help="percent of requests a sustained stage may fail (default 1)")
+    parser.add_argument("--puzzles", help="puzzle file to send (default random equivalents of the bundled puzzles)")
+    parser.add_argument("--generated", type=int, default=500, help="number of puzzles to generate (default 500)")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the generated puzzles (default 1)")
+    parser.add_argument("--json", help="write the stage results to this JSON file")
+    args = parser.parse_args(argv)
+    if args.connections < 1 or args.start_qps <= 0 or args.step <= 1 or args.stage_seconds <= 0 or args.generated < 1:
+        parser.error("--connections and --generated must be at least 1, --start-qps and --stage-seconds more than 0 and --step more "
+                     "than 1")
+
+    process = None
+    try:
+        bodies = [json.dumps({"puzzle": p}).encode() for p in loadPuzzles(args)]
+        port = args.port
+        if args.spawn:
+            process, port = spawnService(args)
+        print(f"{'Target/s':>9} {'Achieved':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'503':>6} {'504':>6} "
+              f"{'Errors':>6} {'Sustained':>9}")
+        stages = asyncio.run(run(args, port, bodies))
+    except (ValueError, OSError) as e:
+        print("Aborting....\n", e, file=sys.stderr)
+        return 1
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    sustained = [s["achievedQps"] for s in stages if s["sustained"]]
+    best = max(sustained) if sustained else 0.0
+    print(f"\nMax sustained: {best:.1f} requests/sec (p99 within {args.slo_ms:g}ms, at most {args.max_errors:g}% failed)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"maxSustainedQps": best, "stages": stages}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
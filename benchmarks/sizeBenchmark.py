@@ -0,0 +1,175 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+import anySizeEngine as ae
+import dancingLinks
+from benchmarkSuite import percentile
+
+#=============================================================================================================================================
+#
+#   Grid Size Benchmark
+#   -------------------
+#
+#   Times the any size engine (anySizeEngine.py) on 4x4, 9x9, 16x16 and 25x25 puzzles, and reports for each size the latency per puzzle
+#   (p50, p95, max in ms), the search nodes and whether every puzzle was solved within --budget-ms (default 1000ms).
+#
+#   The puzzles are the files in benchmarks/corpora/sizes (grid-<size>.txt, one puzzle per line), or with --generate N, N new puzzles of
+#   each size. They are generated as puzzleGenerator.py does for 9x9: a random solved grid (random digits in the mini-grids on the
+#   diagonal, the rest filled in by Dancing Links), then clues taken away in random order as long as the solution stays unique, so the
+#   puzzles are minimal. The exception is 25x25 (MIN_CLUES), where taking the puzzle down to minimal takes minutes and leaves puzzles
+#   Dancing Links can search for minutes too, so clues stop being taken away once about half the grid (320 clues) is left. --write saves
+#   the generated puzzles to the corpora.
+#
+#   Dancing Links runs its compiled search (compiledLinks.py) when Numba is installed, and 16x16 puzzles only stay within the budget with
+#   it: the slowest in the corpus takes about 0.25s, against 3.5s in pure Python. --no-kernel runs it in pure Python, where 16x16 is
+#   reported as not within the budget.
+#
+#   Usage:  python benchmarks/sizeBenchmark.py [--sizes 4 9 16 25] [--backend dlx|search] [--repeat N] [--budget-ms N] [--no-kernel]
+#                                              [--generate N [--seed N] [--write]] [--json file]
+#==============================================================================================================================================
+
+#============================================
+# Globals / Constants
+#============================================
+
+SIZES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpora", "sizes")
+MIN_CLUES = {25: 320}        # clues left in generated puzzles of these sizes, rather than taking them down to minimal
+
+#============================================
+# Generating puzzles
+#============================================
+
+def randomSolution(sizeIn, rngIn):
+    # A random solved grid, as a list of values. Unlike 9x9, not every fill of the diagonal mini-grids of a 4x4 grid can be completed,
+    # so those that can't are tried again.
+    layout = ae.layoutFor(sizeIn)
+    topology = layout.topology
+    while True:
+        candidates = [layout.allCandidates] * layout.cells
+        for box in range(0, sizeIn, topology.box + 1):
+            for cell, d in zip(topology.miniGridCells[box], rngIn.sample(range(sizeIn), sizeIn)):
+                candidates[cell] = 1 << d
+        solution = dancingLinks.solveCandidates(candidates, None, topology)
+        if solution is not None:
+            return solution
+
+def hasOtherSolution(sizeIn, cluesIn, cellIn, valueIn):
+    # True if the clues have a solution with something other than valueIn in cellIn. valueIn is taken out of the cell's candidates
+    # before the clues are applied (createGrid() would fill it straight back in as a naked single).
+    layout = ae.layoutFor(sizeIn)
+    grid = ae.SizedGrid(layout)
+    for cell, value in enumerate(cluesIn):
+        if value:
+            ae.removeCandidates(grid, cell, layout.allCandidates ^ (1 << (value - 1)))
+    ae.removeCandidates(grid, cellIn, 1 << (valueIn - 1))
+    if not ae.propagate(grid):
+        return False
+    if ae.numOutstandingCells(grid) == 0:
+        return True
+    return dancingLinks.countCandidates(ae.gridCandidates(grid), 1, None, grid.layout.topology) > 0
+
+def generatePuzzle(sizeIn, rngIn):
+    clues = randomSolution(sizeIn, rngIn)
+    left = len(clues)
+    for cell in rngIn.sample(range(len(clues)), len(clues)):
+        if left <= MIN_CLUES.get(sizeIn, 0):
+            break
+        value = clues[cell]
+        clues[cell] = 0
+        if hasOtherSolution(sizeIn, clues, cell, value):
+            clues[cell] = value
+        else:
+            left = left - 1
+    return ae.formatValues(clues)
+
+#============================================
+# Functions / Procedures
+#============================================
+
+def loadPuzzles(sizeIn):
+    path = os.path.join(SIZES_DIR, f"grid-{sizeIn}.txt")
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return list(ae.readPuzzles(f))
+
+def runSize(sizeIn, puzzlesIn, argsIn):
+    latencies = []
+    nodes = []
+    unsolved = 0
+    for puzzle in puzzlesIn * argsIn.repeat:
+        stats = ae.newStats()
+        start = time.perf_counter()
+        solution = ae.solvePuzzle(puzzle, stats, argsIn.backend)
+        latencies.append((time.perf_counter() - start) * 1000)
+        nodes.append(stats["nodes"])
+        if solution is None:
+            unsolved = unsolved + 1
+    latencies.sort()
+    nodes.sort()
+    return {"size": sizeIn,
+            "puzzles": len(latencies),
+            "unsolved": unsolved,
+            "p50Ms": percentile(latencies, 50),
+            "p95Ms": percentile(latencies, 95),
+            "maxMs": latencies[-1],
+            "p50Nodes": percentile(nodes, 50),
+            "maxNodes": nodes[-1],
+            "withinBudget": latencies[-1] <= argsIn.budget_ms}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the any size engine on 4x4, 9x9, 16x16 and 25x25 puzzles.")
+    parser.add_argument("--sizes", type=int, nargs="+", choices=ae.SIZES, default=list(ae.SIZES), help="grid sizes (default all)")
+    parser.add_argument("--backend", choices=ae.BACKENDS, default="dlx", help="used once the techniques stall (default dlx)")
+    parser.add_argument("--repeat", type=int, default=1, help="times to solve each puzzle (default 1)")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="time every puzzle should be solved within (default 1000)")
+    parser.add_argument("--generate", type=int, default=0, metavar="N", help="generate N puzzles of each size rather than read the corpora")
+    parser.add_argument("--seed", type=int, default=1, help="seed for --generate (default 1)")
+    parser.add_argument("--write", action="store_true", help="write the generated puzzles to benchmarks/corpora/sizes")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    parser.add_argument("--no-kernel", action="store_true", help="run Dancing Links in pure Python even if Numba is installed")
+    args = parser.parse_args(argv)
+    if args.repeat < 1 or args.generate < 0:
+        parser.error("--repeat must be at least 1 and --generate 0 or more")
+    if args.write and not args.generate:
+        parser.error("--write needs --generate")
+    kernel = dancingLinks.useKernel(not args.no_kernel)
+
+    results = []
+    print(f"{'Size':>7} {'Puzzles':>8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'p50 nodes':>10} {'max nodes':>10} {'Within':>7}")
+    try:
+        for size in args.sizes:
+            if args.generate:
+                rng = random.Random(args.seed + size)
+                puzzles = [generatePuzzle(size, rng) for _ in range(args.generate)]
+                if args.write:
+                    os.makedirs(SIZES_DIR, exist_ok=True)
+                    with open(os.path.join(SIZES_DIR, f"grid-{size}.txt"), "w") as f:
+                        f.write("".join(p + "\n" for p in puzzles))
+            else:
+                puzzles = loadPuzzles(size)
+            if not puzzles:
+                print(f"{size:>4}x{size:<2} no puzzles", file=sys.stderr)
+                continue
+            r = runSize(size, puzzles, args)
+            results.append(r)
+            print(f"{size:>4}x{size:<2} {r['puzzles']:>8} {r['p50Ms']:>9.2f} {r['p95Ms']:>9.2f} {r['maxMs']:>9.2f} {r['p50Nodes']:>10} "
+                  f"{r['maxNodes']:>10} {'yes' if r['withinBudget'] else 'no':>7}", flush=True)
+    except (ValueError, OSError) as e:
+        print("Aborting....\n", e, file=sys.stderr)
+        return 1
+
+    print(f"\nDancing Links: {'compiled kernel' if kernel else 'pure Python'}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"backend": args.backend, "kernel": kernel, "budgetMs": args.budget_ms, "results": results}, f, indent=2)
+    return 0 if all(r["withinBudget"] and not r["unsolved"] for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
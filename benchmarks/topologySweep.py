@@ -0,0 +1,171 @@
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import sudukoSolver as ss
+
+#=============================================================================================================================================
+#
+#   Topology Microbenchmark
+#   -----------------------
+#
+#   Times updateGrid sweeps of the list engine with the topology lookups from topology.py, and again with the original getters that
+#   rebuilt their lists on every call (copied below). Both runs start from the same grids and must end with the same grids.
+#
+#   Each puzzle is taken through updateGrid until it stops making progress; the time per sweep is the total time over all the sweeps
+#   made. After an untimed warm up run of each, --repeat rounds (default 40) each time the two back to back, taking turns at going
+#   first. The saving is worked out per round, so a slow patch on the machine hits both sides of it, and the median and interquartile
+#   range of the savings are reported along with how many rounds the tables won. A single best-of figure for each was too noisy here to
+#   tell a saving of this size from run-to-run variation; the spread across rounds shows whether it is real.
+#
+#   Usage:  python benchmarks/topologySweep.py [puzzle file] [--repeat N]
+#==============================================================================================================================================
+
+SAMPLE_PUZZLES = [
+    "--1--8-73--56----17----1----9-81----53-----46----65-3----1----48----93--94-5--7--",
+    "59---4----16-8-----8-1----53-----14--654-278--48-----99----3-5-----4-23----8---97",
+    "1-76--4-2---9-5------4---19-8------42--------7-4---2---5--4---7--68-----------19-",
+    "8----------36------7--9-2---5---7-------457-----1---3---1----68--85---1--9----4--",
+]
+
+#============================================
+# The getters as they were before topology.py
+#============================================
+
+def getRowCells(rowRefIn):
+    return [x for x in range(rowRefIn * 9, (rowRefIn * 9) + 9)]
+
+def getColCells(colRefIn):
+    return [x for x in range(colRefIn, (colRefIn + 73), 9)]
+
+def getRow(myCellRef):
+    return int(myCellRef / 9)
+
+def getCol(myCellRef):
+    return int(myCellRef % 9)
+
+def getMiniGridCells(mbRefIn):
+    return LEGACY_MINI_GRID_CELLS[mbRefIn]
+
+def getMyMiniGrid(myCellRef):
+    myRow = getRow(myCellRef)
+    myCol = getCol(myCellRef)
+
+    if myRow in [0,1,2]:
+        a = {0,1,2}
+    elif myRow in [3,4,5]:
+        a = {3,4,5}
+    else:
+        a = {6,7,8}
+
+    if myCol in [0,1,2]:
+        b = {0,3,6}
+    elif myCol in [3,4,5]:
+        b = {1,4,7}
+    else:
+        b = {2,5,8}
+
+    return list(a.intersection(b))[0]
+
+def getMiniGridRowRefs(miniBlockIn):
+    rowRefs = []
+    for i in range(3):
+        rowRefs.append([miniBlockIn[j] for j in range(i*3, (i*3) + 3)])
+    return rowRefs
+
+def getMiniGridColRefs(miniBlockIn):
+    colRefs = []
+    for i in range(3):
+        colRefs.append([miniBlockIn[j] for j in range(i, i+7, 3)])
+    return colRefs
+
+LEGACY_MINI_GRID_CELLS = [list(b) for b in ss.topology.MINI_GRID_CELLS]
+LEGACY_GETTERS = {f.__name__: f for f in (getRowCells, getColCells, getRow, getCol, getMiniGridCells, getMyMiniGrid,
+                                          getMiniGridRowRefs, getMiniGridColRefs)}
+
+#============================================
+# Functions / Procedures
+#============================================
+
+def startGrid(puzzleIn):
+    # As createGrid(), but from a puzzle string rather than grid.txt
+    gridOut = [(0, [1,2,3,4,5,6,7,8,9], ss.getMyDependants(x)) for x in range(ss.CELLS)]
+    for i, c in enumerate(puzzleIn):
+        if c not in "-.0":
+            gridOut[i] = (0, [int(c)], gridOut[i][2])
+    ss.doNakedSingle(gridOut)
+    return gridOut
+
+def copyGrid(gridIn):
+    return [(v, list(c), d) for v, c, d in gridIn]
+
+def runSweeps(gridsIn):
+    # Returns (seconds, sweeps, finished grids)
+    grids = [copyGrid(g) for g in gridsIn]
+    sweeps = 0
+    start = time.perf_counter()
+    for grid in grids:
+        sweeps = sweeps + 1
+        while ss.updateGrid(grid) and ss.numOutstandingCells(grid) > 0:
+            sweeps = sweeps + 1
+    return time.perf_counter() - start, sweeps, grids
+
+def runWithGetters(gridsIn, gettersIn=None):
+    saved = {name: getattr(ss, name) for name in LEGACY_GETTERS}
+    if gettersIn:
+        for name, f in gettersIn.items():
+            setattr(ss, name, f)
+    try:
+        return runSweeps(gridsIn)
+    finally:
+        for name, f in saved.items():
+            setattr(ss, name, f)
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    repeat = 40
+    if "--repeat" in args:
+        i = args.index("--repeat")
+        repeat = int(args[i + 1])
+        del args[i: i + 2]
+    if args:
+        with open(args[0]) as f:
+            puzzles = [line.strip() for line in f if len(line.strip()) == ss.CELLS]
+    else:
+        puzzles = SAMPLE_PUZZLES
+
+    if repeat < 4:
+        print("Aborting....\n --repeat must be at least 4", file=sys.stderr)
+        return 1
+
+    grids = [startGrid(p) for p in puzzles]
+    runWithGetters(grids)
+    runWithGetters(grids, LEGACY_GETTERS)
+    newTimes = []
+    oldTimes = []
+    for i in range(repeat):
+        if i % 2:
+            newTime, sweeps, newGrids = runWithGetters(grids)
+            oldTime, oldSweeps, oldGrids = runWithGetters(grids, LEGACY_GETTERS)
+        else:
+            oldTime, oldSweeps, oldGrids = runWithGetters(grids, LEGACY_GETTERS)
+            newTime, sweeps, newGrids = runWithGetters(grids)
+        if oldSweeps != sweeps or [[g[:2] for g in grid] for grid in oldGrids] != [[g[:2] for g in grid] for grid in newGrids]:
+            print("Results differ between the two runs!")
+            return 1
+        newTimes.append(newTime)
+        oldTimes.append(oldTime)
+
+    savings = sorted(1 - new / old for new, old in zip(newTimes, oldTimes))
+    q1, median, q3 = statistics.quantiles(savings, n=4)
+    print(f"{len(puzzles)} puzzles, {sweeps} updateGrid sweeps, {repeat} rounds")
+    print(f"Original getters : {statistics.median(oldTimes) * 1000 / sweeps:8.3f} ms per sweep (median)")
+    print(f"Topology tables  : {statistics.median(newTimes) * 1000 / sweeps:8.3f} ms per sweep (median)")
+    print(f"Saving           : {median * 100:.1f}% median, {q1 * 100:.1f}% to {q3 * 100:.1f}% interquartile, "
+          f"tables faster in {sum(1 for x in savings if x > 0)} of {repeat} rounds")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
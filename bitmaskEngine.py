@@ -0,0 +1,886 @@
+from array import array
+from itertools import combinations, compress
+from operator import itemgetter
+import topology
+import strategyRegistry
+from strategyRegistry import SCOPE_CELLS, SCOPE_BOXES, SCOPE_LINES, SCOPE_DIGITS
+
+#=============================================================================================================================================
+#
+#   Bitmask Candidate Engine
+#   ------------------------
+#
+#   An optional alternative to the list based engine in sudukoSolver.py. Rather than a (value, candidate list, dependants list) tuple per
+#   cell, the grid is held in three flat arrays:
+#       - values - the solved value for each cell (0 if not solved yet)
+#       - cands  - a 9-bit candidate mask for each cell. Bit (d - 1) is set if d is still a candidate.
+#       - places - for each unit (9 rows, 9 columns, 9 mini-grids) and each digit, a 9-bit mask of the positions in the unit where the
+#                  digit can still go. This is kept up to date on every elimination, so "where can 5 go in row 3" is a single lookup.
+#
+#   The techniques are the same as the list engine, run in the same order and with the same rules, so the two engines make exactly the
+#   same eliminations. Nothing is allocated per elimination; the hot loops are just integer operations on the arrays.
+#
+#   Units are numbered 0-8 for rows, 9-17 for columns and 18-26 for mini-grids. Positions inside a mini-grid run left to right, top to
+#   bottom (the same order as MINI_GRID_CELLS).
+#
+#   A grid holds only these arrays and a few integers (about 1 KB); the peers, units and every other table are shared by all grids.
+#   checkpoint() / rollback() undo changes by replaying a trail of them backwards, so the cost is the number of changes made rather than
+#   the size of the grid. copyGrid() copies the arrays, and packGrid() / unpackGrid() store a grid as 243 bytes (values and candidates;
+#   the place masks are rebuilt) for when many grids need to be kept.
+#
+#   A grid can carry a SolveTrace (solveTrace.py, via createGrid(valuesIn, traceIn)) to record what each technique does. Tracing is read
+#   off the trail, so the only cost when it is off is a check per technique run and per rollback - nothing is added per elimination.
+#
+#   useKernel() switches naked and hidden singles, naked triples / quads and simple colouring over to compiled code (compiledKernel.py)
+#   if Numba is installed. They make the same changes in the same order as the Python versions here, which useKernel(False) switches
+#   back to. Numba (and NumPy) are only imported then, not with this module - the batch tools call it, a plain import stays pure Python.
+#==============================================================================================================================================
+
+#============================================
+# Globals / Constants
+#============================================
+
+CELLS = topology.CELLS
+ALL_CANDIDATES = 0x1FF
+
+ROW_UNITS = topology.ROW_CELLS
+COL_UNITS = topology.COL_CELLS
+BOX_UNITS = topology.MINI_GRID_CELLS
+UNITS = topology.UNITS
+
+# For each cell, the offset into places and the inverted position bit for each of its three units (row, column, mini-grid).
+CELL_UNIT_BITS = tuple(tuple(x for u in range(27) if cell in UNITS[u] for x in (u * 9, ALL_CANDIDATES ^ (1 << UNITS[u].index(cell))))
+                       for cell in range(CELLS))
+PEERS = topology.PEERS
+PEER_SETS = tuple(frozenset(p) for p in PEERS)
+BOX_OF_CELL = topology.MINI_GRID_OF_CELL
+
+# For each cell, its three units as bits of a 27-bit unit set (bit u for unit u). Used to mark units as changed.
+ALL_UNITS = (1 << 27) - 1
+CELL_UNIT_FLAGS = tuple((1 << r) | (1 << c) | (1 << b) for r, c, b in topology.CELL_UNITS)
+
+# Fetch the masks of a unit (or a cell's peers) in one call, e.g. UNIT_GETTERS[u](gridIn.cands)
+UNIT_GETTERS = tuple(itemgetter(*u) for u in UNITS)
+PEER_GETTERS = tuple(itemgetter(*p) for p in PEERS)
+
+# Lookup tables indexed by mask
+POPCOUNT = bytes(bin(m).count("1") for m in range(512))
+MASK_DIGITS = tuple(tuple(d for d in range(1, 10) if m & (1 << (d - 1))) for m in range(512))
+MASK_INDEXES = tuple(tuple(d - 1 for d in MASK_DIGITS[m]) for m in range(512))
+IS_SINGLE = bytes(POPCOUNT[m] == 1 for m in range(512))
+IS_PAIR = bytes(POPCOUNT[m] == 2 for m in range(512))
+IS_TRIPLE = bytes(POPCOUNT[m] == 3 for m in range(512))
+NAKED_SET_SIZE = {t: bytes(2 <= POPCOUNT[m] <= t for m in range(512)) for t in (3, 4)}
+
+MINI_ROW_MASKS = (0x007, 0x038, 0x1C0)
+MINI_COL_MASKS = (0x049, 0x092, 0x124)
+
+# Positions mask -> the one mini-line holding all of them (-1 if none). Used for pointing (positions within a mini-grid) and
+# claiming (positions within a row or column, where the three segments line up with the mini-row masks).
+POINTING_ROW = tuple(next((m for m in range(3) if POPCOUNT[w] >= 2 and not w & ~MINI_ROW_MASKS[m]), -1) for w in range(512))
+POINTING_COL = tuple(next((m for m in range(3) if POPCOUNT[w] >= 2 and not w & ~MINI_COL_MASKS[m]), -1) for w in range(512))
+CLAIMING_SEGMENT = POINTING_ROW
+IS_POINTING = bytes(POINTING_ROW[w] >= 0 or POINTING_COL[w] >= 0 for w in range(512))
+IS_CLAIMING = bytes(CLAIMING_SEGMENT[w] >= 0 for w in range(512))
+
+# The cells a pointing / claiming candidate is removed from, for each mini-grid (or line) and mini-line.
+POINTING_ROW_CELLS = tuple(tuple(tuple(c for c in ROW_UNITS[BOX_UNITS[b][m * 3] // 9] if c not in BOX_UNITS[b]) for m in range(3))
+                           for b in range(9))
+POINTING_COL_CELLS = tuple(tuple(tuple(c for c in COL_UNITS[BOX_UNITS[b][m] % 9] if c not in BOX_UNITS[b]) for m in range(3))
+                           for b in range(9))
+CLAIMING_CELLS = tuple(tuple(tuple(c for c in BOX_UNITS[BOX_OF_CELL[UNITS[u][s * 3]]] if c not in UNITS[u]) for s in range(3))
+                       for u in range(18))
+
+# Bit offsets into MaskGrid.memoClean for each technique, which has a bit per unit.
+MEMO_TRIPLES = 0
+MEMO_QUADS = 27
+MEMO_NAKED_PAIRS = 54
+MEMO_HIDDEN_PAIRS = 81
+MEMO_HIDDEN_SETS = 108
+MEMO_SPREAD = sum(1 << m for m in (MEMO_TRIPLES, MEMO_QUADS, MEMO_NAKED_PAIRS, MEMO_HIDDEN_PAIRS, MEMO_HIDDEN_SETS))   # unit set * this -> memo bits
+CELL_MEMO_KEEP = tuple(~(f * MEMO_SPREAD) for f in CELL_UNIT_FLAGS)
+PACKED_SIZE = CELLS * 3
+
+#============================================
+# Grid
+#============================================
+
+class MaskGrid:
+    __slots__ = ("values", "cands", "places", "memoClean", "trail", "dirtyUnits", "dirtyDigits", "contradiction", "trace")
+
+    def __init__(self):
+        self.values = array('b', [0]) * CELLS
+        self.cands = array('H', [ALL_CANDIDATES]) * CELLS
+        self.places = array('H', [ALL_CANDIDATES]) * (27 * 9)
+
+        # A bit per unit for each of the techniques that only look inside a unit (at the MEMO_* offsets), set when the technique last
+        # found nothing there. Any change to a unit clears its bits, so a unit that is still clean needn't be checked again.
+        self.memoClean = 0
+
+        # When set to an array (see checkpoint()), every change is recorded on it as a (cell, removed candidates) pair so it can be
+        # rolled back. A removed mask of 0 records a value being set.
+        self.trail = None
+
+        # The units (27-bit set) and digits (9-bit mask) changed since the scheduler last looked. Everything is new to begin with.
+        self.dirtyUnits = ALL_UNITS
+        self.dirtyDigits = ALL_CANDIDATES
+
+        # Set as soon as an unsolved cell loses its last candidate, so the search can give up on a guess straight away. It is cleared
+        # by rollback(), the trail only being rolled back to states found to be good.
+        self.contradiction = False
+
+        # A SolveTrace (see solveTrace.py) when the solve is being traced, otherwise None.
+        self.trace = None
+
+def createGrid(valuesIn, traceIn=None):
+    # valuesIn is a list of (cell index, value) as returned by loadValuesFromFile(). traceIn is a SolveTrace to record the solve on.
+    gridOut = MaskGrid()
+    if traceIn is not None:
+        traceIn.attach(gridOut)
+
+    # Prime each cell given an initial value for update, i.e. make it a naked single, then apply them.
+    for cell, value in valuesIn:
+        removeCandidates(gridOut, cell, ALL_CANDIDATES ^ (1 << (value - 1)))
+    if traceIn is not None:
+        traceIn.record(gridOut, "given")
+    doNakedSingle(gridOut)
+    if traceIn is not None:
+        traceIn.record(gridOut, "nakedSingle")
+    return gridOut
+
+def fromListGrid(gridIn):
+    # Build a mask grid from a list engine grid (list of (value, candidates, dependants) tuples)
+    gridOut = MaskGrid()
+    for cell, (value, candidates, _) in enumerate(gridIn):
+        mask = 0
+        for c in candidates:
+            mask |= 1 << (c - 1)
+        gridOut.values[cell] = value
+        removeCandidates(gridOut, cell, ALL_CANDIDATES ^ mask)
+    return gridOut
+
+def toListGrid(gridIn, gridOut=None):
+    # Write the mask grid back out in list engine form. If a list grid is given it is updated in place (keeping its dependants),
+    # otherwise the dependants are the shared PEERS tuples.
+    if gridOut is None:
+        gridOut = [(0, [], PEERS[x]) for x in range(CELLS)]
+    for cell in range(CELLS):
+        gridOut[cell] = (gridIn.values[cell], list(MASK_DIGITS[gridIn.cands[cell]]), gridOut[cell][2])
+    return gridOut
+
+def copyGrid(gridIn):
+    # A copy of the grid's state (not its trail or trace)
+    gridOut = MaskGrid.__new__(MaskGrid)
+    gridOut.values = array('b', gridIn.values)
+    gridOut.cands = array('H', gridIn.cands)
+    gridOut.places = array('H', gridIn.places)
+    gridOut.memoClean = gridIn.memoClean
+    gridOut.trail = None
+    gridOut.dirtyUnits = gridIn.dirtyUnits
+    gridOut.dirtyDigits = gridIn.dirtyDigits
+    gridOut.contradiction = gridIn.contradiction
+    gridOut.trace = None
+    return gridOut
+
+def packGrid(gridIn):
+    # The values and candidates as PACKED_SIZE bytes
+    return gridIn.values.tobytes() + gridIn.cands.tobytes()
+
+def unpackGrid(packedIn):
+    # Rebuild a grid from packGrid()'s bytes. The place masks are worked out again from the candidates.
+    if len(packedIn) != PACKED_SIZE:
+        raise ValueError(f"Packed grid should be {PACKED_SIZE} bytes, not {len(packedIn)}")
+    gridOut = MaskGrid()
+    gridOut.values = array('b', packedIn[:CELLS])
+    cands = array('H', packedIn[CELLS:])
+    for cell in range(CELLS):
+        removeCandidates(gridOut, cell, ALL_CANDIDATES ^ cands[cell])
+    return gridOut
+
+def numOutstandingCells(gridIn):
+    return gridIn.values.count(0)
+
+def numOutstandingCandidates(gridIn):
+    return sum(POPCOUNT[m] for m in gridIn.cands)
+
+#============================================
+# Core updates
+#============================================
+
+def removeCandidates(gridIn, cellIn, maskIn):
+    # Remove the candidates in maskIn from a cell, keeping the unit place masks in step. Returns the number removed.
+    cands = gridIn.cands
+    removed = cands[cellIn] & maskIn
+    if not removed:
+        return 0
+    cands[cellIn] ^= removed
+    if not cands[cellIn] and not gridIn.values[cellIn]:
+        gridIn.contradiction = True
+    if gridIn.trail is not None:
+        gridIn.trail.extend((cellIn, removed))
+    gridIn.dirtyUnits |= CELL_UNIT_FLAGS[cellIn]
+    gridIn.memoClean &= CELL_MEMO_KEEP[cellIn]
+    gridIn.dirtyDigits |= removed
+    places = gridIn.places
+    rowOffset, rowBits, colOffset, colBits, boxOffset, boxBits = CELL_UNIT_BITS[cellIn]
+    for d in MASK_INDEXES[removed]:
+        places[rowOffset + d] &= rowBits
+        places[colOffset + d] &= colBits
+        places[boxOffset + d] &= boxBits
+    return POPCOUNT[removed]
+
+def removeCandidateFromCells(gridIn, cellsIn, maskIn):
+    count = 0
+    for cell in cellsIn:
+        count += removeCandidates(gridIn, cell, maskIn)
+    return count
+
+def solveCell(gridIn, indexIn):
+    # Cell is solved. So, set its value, empty its candidates and remove the value from its dependants.
+    cands = gridIn.cands
+    places = gridIn.places
+    trail = gridIn.trail
+    mask = cands[indexIn]
+    gridIn.values[indexIn] = MASK_DIGITS[mask][0]
+    if trail is not None:
+        trail.extend((indexIn, 0))
+    removeCandidates(gridIn, indexIn, mask)
+
+    # Removing a single candidate, so this is removeCandidates() written out for speed.
+    d = MASK_INDEXES[mask][0]
+    dirty = 0
+    for dependant in compress(PEERS[indexIn], map(mask.__and__, PEER_GETTERS[indexIn](cands))):
+        cands[dependant] ^= mask
+        if not cands[dependant]:
+            # Only unsolved cells still have candidates, so this one now has nowhere to go.
+            gridIn.contradiction = True
+        if trail is not None:
+            trail.extend((dependant, mask))
+        dirty |= CELL_UNIT_FLAGS[dependant]
+        rowOffset, rowBits, colOffset, colBits, boxOffset, boxBits = CELL_UNIT_BITS[dependant]
+        places[rowOffset + d] &= rowBits
+        places[colOffset + d] &= colBits
+        places[boxOffset + d] &= boxBits
+    gridIn.dirtyUnits |= dirty
+    gridIn.memoClean &= ~(dirty * MEMO_SPREAD)
+
+def checkpoint(gridIn):
+    # Start recording changes, if not already, and return a mark that rollback() can return the grid to.
+    if gridIn.trail is None:
+        gridIn.trail = array('H')
+    return len(gridIn.trail)
+
+def rollback(gridIn, markIn):
+    # Roll the grid back to the point where the trail was markIn long.
+    if gridIn.trace is not None:
+        gridIn.trace.rollback(gridIn, markIn)
+    trail = gridIn.trail
+    cands = gridIn.cands
+    places = gridIn.places
+    touched = 0
+    while len(trail) > markIn:
+        removed = trail.pop()
+        cell = trail.pop()
+        touched |= CELL_UNIT_FLAGS[cell]
+        if not removed:
+            gridIn.values[cell] = 0
+            continue
+        cands[cell] |= removed
+        rowOffset, rowBits, colOffset, colBits, boxOffset, boxBits = CELL_UNIT_BITS[cell]
+        for d in MASK_INDEXES[removed]:
+            places[rowOffset + d] |= ALL_CANDIDATES ^ rowBits
+            places[colOffset + d] |= ALL_CANDIDATES ^ colBits
+            places[boxOffset + d] |= ALL_CANDIDATES ^ boxBits
+    gridIn.memoClean &= ~(touched * MEMO_SPREAD)
+    gridIn.contradiction = False
+
+def hasContradiction(gridIn):
+    # True if an unsolved cell has no candidates left, or a digit still to be placed in a unit has nowhere to go.
+    # Solving a cell empties its candidates and takes its digit from its peers, so each solved cell accounts for one cell without
+    # candidates and one empty place mask in each of its three units. Anything beyond that is an unsolved cell or an unplaced digit
+    # with nowhere to go, so the whole grid can be counted at once rather than unit by unit.
+    if gridIn.contradiction:
+        return True
+    solved = CELLS - gridIn.values.count(0)
+    return gridIn.cands.count(0) > solved or gridIn.places.count(0) > 3 * solved
+
+#============================================
+# Techniques
+#============================================
+
+def doNakedSingle(gridIn):
+    updateCount = 0
+    values = gridIn.values
+    cands = gridIn.cands
+    # The candidates are read as the loop goes, so cells reduced to one candidate by an earlier solve are picked up too.
+    for i in compress(range(CELLS), map(IS_SINGLE.__getitem__, cands)):
+        if values[i] == 0:
+            solveCell(gridIn, i)
+            updateCount = updateCount + 1
+    return updateCount
+
+def doHiddenSingles(gridIn, unitsIn=range(27)):
+    count = 0
+    places = gridIn.places
+
+    for u in unitsIn:
+        block = UNITS[u]
+        offset = u * 9
+        if not any(map(IS_SINGLE.__getitem__, places[offset: offset + 9])):
+            continue
+
+        # In numeric order, as the list engine does
+        for d in range(9):
+            where = places[offset + d]
+            if POPCOUNT[where] == 1:
+                cell = block[MASK_INDEXES[where][0]]
+                count += removeCandidates(gridIn, cell, ALL_CANDIDATES ^ (1 << d))
+    return count
+
+def doPPoT(gridIn, boxesIn=range(9)):
+    # Pointing pairs / triples. A candidate confined to one mini-row (or mini-col) of a mini-grid is removed from the rest of that row
+    # (or column). The list engine only looks at candidates present in the middle cell of the mini-line, so the same rule applies here.
+    # Removals are all outside the mini-grid being checked, so the order the mini-lines and candidates are visited in doesn't matter.
+    count = 0
+    cands = gridIn.cands
+    places = gridIn.places
+
+    for b in boxesIn:
+        block = BOX_UNITS[b]
+        offset = (18 + b) * 9
+        for d in compress(range(9), map(IS_POINTING.__getitem__, places[offset: offset + 9])):
+            where = places[offset + d]
+            bit = 1 << d
+            m = POINTING_ROW[where]
+            if m >= 0 and cands[block[(m * 3) + 1]] & bit:
+                for cell in POINTING_ROW_CELLS[b][m]:
+                    if cands[cell] & bit:
+                        count += removeCandidates(gridIn, cell, bit)
+            m = POINTING_COL[where]
+            if m >= 0 and cands[block[m + 3]] & bit:
+                for cell in POINTING_COL_CELLS[b][m]:
+                    if cands[cell] & bit:
+                        count += removeCandidates(gridIn, cell, bit)
+    return count
+
+def doClaimingPoT(gridIn, linesIn=range(18)):
+    # A candidate confined to one mini-grid within a row or column is removed from the rest of that mini-grid.
+    count = 0
+    cands = gridIn.cands
+    places = gridIn.places
+
+    for u in linesIn:
+        offset = u * 9
+        for d in compress(range(9), map(IS_CLAIMING.__getitem__, places[offset: offset + 9])):
+            bit = 1 << d
+            for cell in CLAIMING_CELLS[u][CLAIMING_SEGMENT[places[offset + d]]]:
+                if cands[cell] & bit:
+                    count += removeCandidates(gridIn, cell, bit)
+    return count
+
+def doNakedPairs(gridIn, unitsIn=range(27)):
+    count = 0
+    values = gridIn.values
+    cands = gridIn.cands
+
+    for u in unitsIn:
+        if gridIn.memoClean >> (MEMO_NAKED_PAIRS + u) & 1:
+            continue
+        masks = UNIT_GETTERS[u](cands)
+        pairs = list(compress(masks, map(IS_PAIR.__getitem__, masks)))
+        distinct = set(pairs)
+        if len(distinct) == len(pairs):
+            # No two cells with the same pair
+            gridIn.memoClean |= 1 << (MEMO_NAKED_PAIRS + u)
+            continue
+        nakedPairs = [mask for mask in distinct if pairs.count(mask) == 2]
+        toRemove = 0
+        for mask in nakedPairs:
+            toRemove |= mask
+        removed = 0
+        for cell in [cell for cell in UNITS[u] if cands[cell] & toRemove and cands[cell] not in nakedPairs and values[cell] == 0]:
+            removed += removeCandidates(gridIn, cell, toRemove)
+        if not removed:
+            gridIn.memoClean |= 1 << (MEMO_NAKED_PAIRS + u)
+        count += removed
+    return count
+
+def findNakedSet(smallIn, tIn, blockIn, candsIn):
+    # Returns the cells of the first naked set of size tIn (in the order the list engine visits them) that would remove something
+    # from another cell of the block, or None. smallIn is the (cell, mask) list of cells with 2 to tIn candidates.
+    k = len(smallIn)
+    for x in range(k - tIn + 1):
+        a, ma = smallIn[x]
+        for y in range(x + 1, k - tIn + 2):
+            b, mb = smallIn[y]
+            mab = ma | mb
+            if POPCOUNT[mab] > tIn:
+                continue
+            for z in range(y + 1, k - tIn + 3):
+                c, mc = smallIn[z]
+                mabc = mab | mc
+                if POPCOUNT[mabc] > tIn:
+                    continue
+                if tIn == 3:
+                    if any(candsIn[cell] & mabc for cell in blockIn if cell != a and cell != b and cell != c):
+                        return (a, b, c)
+                    continue
+                for w in range(z + 1, k):
+                    e, me = smallIn[w]
+                    mabce = mabc | me
+                    if POPCOUNT[mabce] == 4:
+                        if any(candsIn[cell] & mabce for cell in blockIn if cell != a and cell != b and cell != c and cell != e):
+                            return (a, b, c, e)
+    return None
+
+def doNakedTriplesQuads(gridIn, unitsIn=range(27)):
+    # Three (or four) cells in a unit whose candidates are confined to the same three (or four) values. Those values are removed from the
+    # rest of the unit. The list engine visits every combination of cells in turn, checking each against the candidates as they are at
+    # that point. Until a naked set that removes something is found nothing changes, so units are first checked using just the cells
+    # with 2 to t candidates.
+    count = 0
+    cands = gridIn.cands
+
+    for t in (3, 4):
+        smallTable = NAKED_SET_SIZE[t]
+        memoBase = MEMO_TRIPLES if t == 3 else MEMO_QUADS
+        for u in unitsIn:
+            # Nothing found last time in this state, not enough small cells or nothing outside a naked set left to remove from.
+            if gridIn.memoClean >> (memoBase + u) & 1:
+                continue
+            block = UNITS[u]
+            masks = UNIT_GETTERS[u](cands)
+            if masks.count(0) >= 9 - t:
+                continue
+            small = [(cell, mask) for cell, mask in zip(block, masks) if smallTable[mask]]
+            if len(small) < t:
+                continue
+            if findNakedSet(small, t, block, cands) is None:
+                gridIn.memoClean |= 1 << (memoBase + u)
+                continue
+
+            # Removals can now shrink cells that were skipped above, so go through every combination the list engine would, with the
+            # candidates as they are at each point. A cell's candidates can't change while combinations containing it are being
+            # checked, so a partial combination with too many candidates can be skipped along with all its extensions.
+            possibles = [cell for cell, mask in zip(block, masks) if POPCOUNT[mask] >= 2]
+            n = len(possibles)
+            for i in range(n - t + 1):
+                a = possibles[i]
+                ma = cands[a]
+                if POPCOUNT[ma] < 2 or POPCOUNT[ma] > t:
+                    continue
+                for j in range(i + 1, n - t + 2):
+                    b = possibles[j]
+                    mb = cands[b]
+                    if POPCOUNT[mb] < 2:
+                        continue
+                    mab = ma | mb
+                    if POPCOUNT[mab] > t:
+                        continue
+                    for k in range(j + 1, n - t + 3):
+                        c = possibles[k]
+                        mc = cands[c]
+                        if POPCOUNT[mc] < 2:
+                            continue
+                        mabc = mab | mc
+                        if POPCOUNT[mabc] > t:
+                            continue
+                        if t == 3:
+                            if POPCOUNT[mabc] == 3:
+                                for cell in block:
+                                    if cell != a and cell != b and cell != c:
+                                        count += removeCandidates(gridIn, cell, mabc)
+                            continue
+                        for l in range(k + 1, n):
+                            e = possibles[l]
+                            me = cands[e]
+                            if POPCOUNT[me] < 2:
+                                continue
+                            mabce = mabc | me
+                            if POPCOUNT[mabce] == 4:
+                                for cell in block:
+                                    if cell != a and cell != b and cell != c and cell != e:
+                                        count += removeCandidates(gridIn, cell, mabce)
+    return count
+
+def doXWing(gridIn, digitsIn=ALL_CANDIDATES):
+    # A candidate in exactly two cells of two rows, in the same two columns, is removed from the rest of those columns (and the same with
+    # rows and columns switched). All the x-wings in one direction are found before any are applied - a candidate's removals can only
+    # change its own place masks, so each candidate's are found and applied in turn. Only the digits in digitsIn are looked at.
+    count = 0
+    cands = gridIn.cands
+    places = gridIn.places
+
+    for lineBase, oppUnits in ((0, COL_UNITS), (9, ROW_UNITS)):
+        for d in MASK_INDEXES[digitsIn]:
+            # The candidate's place mask in each row (or column) in turn
+            linePlaces = places[(lineBase * 9) + d: (lineBase + 9) * 9: 9]
+            pairs = list(compress(linePlaces, map(IS_PAIR.__getitem__, linePlaces)))
+            if len(set(pairs)) == len(pairs):
+                continue
+            xwPossibles = {}
+            for i in compress(range(9), map(IS_PAIR.__getitem__, linePlaces)):
+                xwPossibles.setdefault(linePlaces[i], []).append(i)
+
+            bit = 1 << d
+            for where, lines in xwPossibles.items():
+                for m in range(len(lines)):
+                    for n in range(m + 1, len(lines)):
+                        lineA = lines[m]
+                        lineB = lines[n]
+                        for p in MASK_INDEXES[where]:
+                            opposite = oppUnits[p]
+                            for g in range(9):
+                                if g != lineA and g != lineB and cands[opposite[g]] & bit:
+                                    count += removeCandidates(gridIn, opposite[g], bit)
+    return count
+
+def doHiddenPairs(gridIn, unitsIn=range(27)):
+    # A pair of candidates in exactly the same two cells of a unit, where both cells have other candidates too. The other candidates are
+    # removed from the two cells. As in the list engine, the checks for a unit use its candidates as they were before any removals.
+    count = 0
+    cands = gridIn.cands
+    places = gridIn.places
+
+    for u in unitsIn:
+        block = UNITS[u]
+        offset = u * 9
+        if gridIn.memoClean >> (MEMO_HIDDEN_PAIRS + u) & 1:
+            continue
+        unitPlaces = places[offset: offset + 9]
+        pairWheres = list(compress(unitPlaces, map(IS_PAIR.__getitem__, unitPlaces)))
+        if len(set(pairWheres)) == len(pairWheres):
+            # No two candidates in the same two cells
+            gridIn.memoClean |= 1 << (MEMO_HIDDEN_PAIRS + u)
+            continue
+        snapshot = UNIT_GETTERS[u](cands)
+        pairPlaces = [(d, unitPlaces[d]) for d in compress(range(9), map(IS_PAIR.__getitem__, unitPlaces))]
+        removed = 0
+
+        for m in range(len(pairPlaces)):
+            d0, where = pairPlaces[m]
+            for n in range(m + 1, len(pairPlaces)):
+                d1, other = pairPlaces[n]
+                if other != where:
+                    continue
+                p0, p1 = MASK_INDEXES[where]
+                if POPCOUNT[snapshot[p0]] > 2 and POPCOUNT[snapshot[p1]] > 2:
+                    keep = (1 << d0) | (1 << d1)
+                    removed += removeCandidates(gridIn, block[p0], ALL_CANDIDATES ^ keep)
+                    removed += removeCandidates(gridIn, block[p1], ALL_CANDIDATES ^ keep)
+        if not removed:
+            gridIn.memoClean |= 1 << (MEMO_HIDDEN_PAIRS + u)
+        count += removed
+    return count
+
+def doHiddenTriplesQuads(gridIn, unitsIn=range(27)):
+    # Three (or four) candidates that can only go in the same three (or four) cells of a unit, each of them in at least two. The other
+    # candidates are removed from those cells. Every unit is checked against the candidates as they were before any removals.
+    # The other n - t unsolved cells of the unit then hold a naked set of the other candidates, making the same eliminations. So only a
+    # unit with t + 5 or more unsolved cells can have a hidden set that the naked pairs / triples / quads won't find too.
+    values = gridIn.values
+    cands = gridIn.cands
+    places = gridIn.places
+    eliminations = []
+
+    for u in unitsIn:
+        unsolved = UNIT_GETTERS[u](values).count(0)
+        if unsolved < 8 or gridIn.memoClean >> (MEMO_HIDDEN_SETS + u) & 1:
+            continue
+        block = UNITS[u]
+        offset = u * 9
+        unitPlaces = places[offset: offset + 9]
+        found = False
+        for t in (3, 4) if unsolved == 9 else (3,):
+            digits = [d for d in range(9) if 2 <= POPCOUNT[unitPlaces[d]] <= t]
+            for combo in combinations(digits, t):
+                where = 0
+                keep = 0
+                for d in combo:
+                    where |= unitPlaces[d]
+                    keep |= 1 << d
+                if POPCOUNT[where] != t:
+                    continue
+                for p in MASK_INDEXES[where]:
+                    if cands[block[p]] & ~keep:
+                        eliminations.append((block[p], ALL_CANDIDATES ^ keep))
+                        found = True
+        if not found:
+            gridIn.memoClean |= 1 << (MEMO_HIDDEN_SETS + u)
+
+    count = 0
+    for cell, mask in eliminations:
+        count += removeCandidates(gridIn, cell, mask)
+    return count
+
+def doFish(gridIn, sizeIn, digitsIn=ALL_CANDIDATES):
+    # X Wing for sizeIn lines - a candidate that can only go in the same sizeIn columns of sizeIn rows (2 to sizeIn cells in each row) is
+    # removed from the rest of those columns, and the same with rows and columns switched. Size 3 is a swordfish, 4 a jellyfish. For each
+    # candidate the rows are done first, then the columns, each from the place masks as they were before any of its removals.
+    # With the candidate still to place in k rows, a fish in the rows leaves a fish of size k - sizeIn in the columns making the same
+    # eliminations. So only candidates with 2 * sizeIn or more rows to go can have a fish that the smaller ones won't find too.
+    count = 0
+    cands = gridIn.cands
+    places = gridIn.places
+    lineTable = NAKED_SET_SIZE[sizeIn]
+
+    for d in MASK_INDEXES[digitsIn]:
+        # places[d::9] is the candidate's place mask in each unit in turn.
+        if places[d: 81: 9].count(0) > 9 - (2 * sizeIn):
+            continue
+        bit = 1 << d
+        for lineBase, oppUnits in ((0, COL_UNITS), (9, ROW_UNITS)):
+            linePlaces = places[(lineBase * 9) + d: (lineBase + 9) * 9: 9]
+            lines = [(i, linePlaces[i]) for i in compress(range(9), map(lineTable.__getitem__, linePlaces))]
+            if len(lines) < sizeIn:
+                continue
+            eliminations = []
+            for combo in combinations(lines, sizeIn):
+                cover = 0
+                baseLines = 0
+                for i, where in combo:
+                    cover |= where
+                    baseLines |= 1 << i
+                if POPCOUNT[cover] != sizeIn:
+                    continue
+                for p in MASK_INDEXES[cover]:
+                    opposite = oppUnits[p]
+                    for g in MASK_INDEXES[ALL_CANDIDATES ^ baseLines]:
+                        if cands[opposite[g]] & bit:
+                            eliminations.append(opposite[g])
+            for cell in eliminations:
+                count += removeCandidates(gridIn, cell, bit)
+    return count
+
+def doSwordfish(gridIn, digitsIn=ALL_CANDIDATES):
+    return doFish(gridIn, 3, digitsIn)
+
+def doJellyfish(gridIn, digitsIn=ALL_CANDIDATES):
+    return doFish(gridIn, 4, digitsIn)
+
+def doXYWing(gridIn):
+    # A cell with two candidates xy (the pivot) that sees a cell with xz and a cell with yz (the wings). Whichever value the pivot takes,
+    # one of the wings is z, so z is removed from every cell that sees both wings. All the wings are found before any are applied.
+    cands = gridIn.cands
+    bivalue = set(compress(range(CELLS), map(IS_PAIR.__getitem__, cands)))
+    if len(bivalue) < 3:
+        return 0
+    eliminations = []
+
+    for pivot in bivalue:
+        mp = cands[pivot]
+        wings = [cell for cell in PEER_SETS[pivot] & bivalue if IS_SINGLE[cands[cell] & mp]]
+        for i in range(len(wings)):
+            a = wings[i]
+            ma = cands[a]
+            for b in wings[i + 1:]:
+                mb = cands[b]
+                z = ma & mb
+                if IS_SINGLE[z] and not z & mp and ma & mp != mb & mp:
+                    for cell in PEER_SETS[a] & PEER_SETS[b]:
+                        if cands[cell] & z:
+                            eliminations.append((cell, z))
+
+    count = 0
+    for cell, mask in eliminations:
+        count += removeCandidates(gridIn, cell, mask)
+    return count
+
+def doXYZWing(gridIn):
+    # As XY Wing, but the pivot also has z (xyz), so z is only removed from cells that see the pivot as well as both wings.
+    cands = gridIn.cands
+    bivalue = set(compress(range(CELLS), map(IS_PAIR.__getitem__, cands)))
+    if len(bivalue) < 2:
+        return 0
+    eliminations = []
+
+    for pivot in compress(range(CELLS), map(IS_TRIPLE.__getitem__, cands)):
+        mp = cands[pivot]
+        wings = [cell for cell in PEER_SETS[pivot] & bivalue if not cands[cell] & ~mp]
+        for i in range(len(wings)):
+            a = wings[i]
+            ma = cands[a]
+            for b in wings[i + 1:]:
+                mb = cands[b]
+                z = ma & mb
+                if ma != mb and IS_SINGLE[z]:
+                    for cell in PEER_SETS[pivot] & PEER_SETS[a] & PEER_SETS[b]:
+                        if cands[cell] & z:
+                            eliminations.append((cell, z))
+
+    count = 0
+    for cell, mask in eliminations:
+        count += removeCandidates(gridIn, cell, mask)
+    return count
+
+def doSimpleColoring(gridIn, digitsIn=ALL_CANDIDATES):
+    # For each candidate, the units where it can only go in two cells link those cells - exactly one of them has it. Each chain of links
+    # is coloured alternately, so one colour holds the candidate and the other doesn't:
+    #   - if two cells of the same colour see each other, that colour can't hold it, so it is removed from every cell of that colour.
+    #   - otherwise it is removed from any other cell that sees cells of both colours.
+    # A chain of one link only removes what pointing / claiming do, so these are skipped. Each candidate's chains are found from the
+    # place masks as they were before any of its removals, which are then made in cell order.
+    count = 0
+    cands = gridIn.cands
+    places = gridIn.places
+
+    for d in MASK_INDEXES[digitsIn]:
+        bit = 1 << d
+        unitPlaces = places[d::9]
+        links = {}
+        for u in compress(range(27), map(IS_PAIR.__getitem__, unitPlaces)):
+            p0, p1 = MASK_INDEXES[unitPlaces[u]]
+            a = UNITS[u][p0]
+            b = UNITS[u][p1]
+            links.setdefault(a, []).append(b)
+            links.setdefault(b, []).append(a)
+        if len(links) < 3:
+            continue
+
+        colour = {}
+        eliminations = set()
+        for start in links:
+            if start in colour:
+                continue
+            colour[start] = 0
+            chain = [start]
+            for cell in chain:
+                for other in links[cell]:
+                    if other not in colour:
+                        colour[other] = 1 - colour[cell]
+                        chain.append(other)
+            if len(chain) < 3:
+                continue
+
+            sides = ([cell for cell in chain if not colour[cell]], [cell for cell in chain if colour[cell]])
+            wrapped = False
+            for side in sides:
+                if any(b in PEER_SETS[a] for a, b in combinations(side, 2)):
+                    eliminations.update(side)
+                    wrapped = True
+            if wrapped:
+                continue
+            seen = [set(), set()]
+            for c, side in enumerate(sides):
+                for cell in side:
+                    seen[c] |= PEER_SETS[cell]
+            for cell in (seen[0] & seen[1]).difference(chain):
+                if cands[cell] & bit:
+                    eliminations.add(cell)
+
+        for cell in sorted(eliminations):
+            count += removeCandidates(gridIn, cell, bit)
+    return count
+
+#============================================
+# Strategies
+#============================================
+
+# In the same order as the list engine. The tiers are used by the scheduler.
+STRATEGIES = strategyRegistry.Registry()
+STRATEGIES.register("hiddenPairs", doHiddenPairs, 2)
+STRATEGIES.register("xWing", doXWing, 3, SCOPE_DIGITS)
+STRATEGIES.register("nakedTriplesQuads", doNakedTriplesQuads, 3)
+STRATEGIES.register("hiddenTriplesQuads", doHiddenTriplesQuads, 3)
+STRATEGIES.register("swordfish", doSwordfish, 4, SCOPE_DIGITS)
+STRATEGIES.register("jellyfish", doJellyfish, 4, SCOPE_DIGITS)
+STRATEGIES.register("xyWing", doXYWing, 4, SCOPE_CELLS)
+STRATEGIES.register("xyzWing", doXYZWing, 4, SCOPE_CELLS)
+STRATEGIES.register("simpleColoring", doSimpleColoring, 4, SCOPE_DIGITS)
+STRATEGIES.register("claimingPoT", doClaimingPoT, 1, SCOPE_LINES)
+STRATEGIES.register("pointingPoT", doPPoT, 1, SCOPE_BOXES)
+STRATEGIES.register("nakedPairs", doNakedPairs, 1)
+STRATEGIES.register("hiddenSingles", doHiddenSingles, 0)
+STRATEGIES.register("nakedSingle", doNakedSingle, 0, SCOPE_CELLS)
+
+def updateGrid(gridIn):
+    return STRATEGIES.runAll(gridIn)
+
+def updateListGrid(gridIn):
+    # Run the techniques to completion on a list engine grid using the bitmask engine, then write the result back into it.
+    # Returns the number of iterations taken.
+    maskGrid = fromListGrid(gridIn)
+    iteration = 0
+    while (updateGrid(maskGrid) and numOutstandingCells(maskGrid) > 0):
+        iteration = iteration + 1
+    toListGrid(maskGrid, gridIn)
+    return iteration
+
+#============================================
+# Compiled kernel
+#============================================
+
+def applyKernelChanges(gridIn):
+    # Apply what the last kernel call did (compiledKernel.CHANGES / STATE) to the rest of the grid, as removeCandidates() would have.
+    state = compiledKernel.STATE
+    length = state[compiledKernel.STATE_CHANGES]
+    if not length:
+        return
+    if gridIn.trail is not None:
+        gridIn.trail.extend(compiledKernel.CHANGES[:length])
+    units = state[compiledKernel.STATE_UNITS]
+    gridIn.dirtyUnits |= units
+    gridIn.memoClean &= ~(units * MEMO_SPREAD)
+    gridIn.dirtyDigits |= state[compiledKernel.STATE_DIGITS]
+    if state[compiledKernel.STATE_CONTRADICTION]:
+        gridIn.contradiction = True
+
+def kernelNakedSingle(gridIn):
+    count = compiledKernel.nakedSingles(gridIn.values, gridIn.cands, gridIn.places, compiledKernel.CHANGES, compiledKernel.STATE)
+    applyKernelChanges(gridIn)
+    return count
+
+def kernelHiddenSingles(gridIn, unitsIn=range(27)):
+    count = compiledKernel.hiddenSingles(gridIn.values, gridIn.cands, gridIn.places, compiledKernel.CHANGES, compiledKernel.STATE,
+                                         bytes(unitsIn))
+    applyKernelChanges(gridIn)
+    return count
+
+def kernelNakedTriplesQuads(gridIn, unitsIn=range(27)):
+    # The kernel reads and updates the triples / quads memo bits itself, as the Python version does.
+    memo = compiledKernel.MEMO
+    memo[0] = (gridIn.memoClean >> MEMO_TRIPLES) & ALL_UNITS
+    memo[1] = (gridIn.memoClean >> MEMO_QUADS) & ALL_UNITS
+    count = compiledKernel.nakedTriplesQuads(gridIn.values, gridIn.cands, gridIn.places, compiledKernel.CHANGES, compiledKernel.STATE,
+                                             bytes(unitsIn), memo)
+    applyKernelChanges(gridIn)
+    gridIn.memoClean = (gridIn.memoClean & ~KERNEL_MEMO_BITS) | (memo[0] << MEMO_TRIPLES) | (memo[1] << MEMO_QUADS)
+    return count
+
+def kernelSimpleColoring(gridIn, digitsIn=ALL_CANDIDATES):
+    count = compiledKernel.simpleColoring(gridIn.values, gridIn.cands, gridIn.places, compiledKernel.CHANGES, compiledKernel.STATE, digitsIn)
+    applyKernelChanges(gridIn)
+    return count
+
+PURE_TECHNIQUES = {"nakedSingle": doNakedSingle, "hiddenSingles": doHiddenSingles, "nakedTriplesQuads": doNakedTriplesQuads,
+                   "simpleColoring": doSimpleColoring}
+KERNEL_TECHNIQUES = {"nakedSingle": kernelNakedSingle, "hiddenSingles": kernelHiddenSingles, "nakedTriplesQuads": kernelNakedTriplesQuads,
+                     "simpleColoring": kernelSimpleColoring}
+KERNEL_MEMO_BITS = (ALL_UNITS << MEMO_TRIPLES) | (ALL_UNITS << MEMO_QUADS)
+
+# The compiledKernel module, once useKernel() has imported it.
+compiledKernel = None
+
+def useKernel(onIn=True):
+    # Run the KERNEL_TECHNIQUES in the compiled kernel, or (onIn False) in pure Python - both here and in STRATEGIES. The first time
+    # the kernel is asked for it is imported and compiled (or loaded from Numba's cache). Returns whether the kernel is in use, which it
+    # can't be without Numba.
+    global doNakedSingle, doHiddenSingles, compiledKernel
+    if onIn and compiledKernel is None:
+        try:
+            import compiledKernel as kernel
+        except ImportError:
+            # No Numba, so the singles stay pure Python.
+            kernel = None
+        if kernel is not None:
+            kernel.warmUp()
+            compiledKernel = kernel
+    techniques = KERNEL_TECHNIQUES if onIn and compiledKernel is not None else PURE_TECHNIQUES
+    doNakedSingle = techniques["nakedSingle"]
+    doHiddenSingles = techniques["hiddenSingles"]
+    for name, function in techniques.items():
+        STRATEGIES.get(name).function = function
+    return techniques is KERNEL_TECHNIQUES
+
+def kernelInUse():
+    return doNakedSingle is kernelNakedSingle
@@ -0,0 +1,138 @@
+from itertools import permutations, product
+
+#=============================================================================================================================================
+#
+#   Canonical Puzzle Form
+#   ---------------------
+#
+#   Puzzles that are the same up to the suduko symmetries have the same solution, up to the same symmetry. The symmetries are:
+#       - relabelling the digits
+#       - swapping rows within a band (a row of mini-grids), and columns within a stack (a column of mini-grids)
+#       - swapping bands, and swapping stacks
+#       - transposing the grid
+#   canonicalize() maps a puzzle to a single representative of all the puzzles equivalent to it, and returns the transform used so a
+#   solution can be carried across and back.
+#
+#   Trying every transform (over 3 million of them) is far too slow, so the rows and columns are first ordered by keys that none of the
+#   symmetries can change - the number of clues in the line, and for each clue how full its column (or row) and stack (or band) are and
+#   how often its digit is used. Bands are put in key order and so are the rows in each band (and the same for stacks and columns), and
+#   only lines with equal keys are tried in every order. The grid is transposed too if that gives smaller keys. Each arrangement is
+#   relabelled so digits are numbered in the order they first appear, and the smallest resulting string is the canonical form.
+#
+#   Equivalent puzzles give the same keys, so the same set of arrangements and the same canonical form. Highly symmetric puzzles (e.g. an
+#   almost empty grid) can leave too many arrangements to try; canonicalize() returns None for these.
+#
+#   randomEquivalent() goes the other way, giving a random puzzle equivalent to the one given.
+#
+#   Puzzles are 81 character strings, blanks being '-', '.' or '0'. Canonical forms use '0' for blanks.
+#==============================================================================================================================================
+
+#============================================
+# Globals / Constants
+#============================================
+
+CELLS = 9 * 9
+MAX_ARRANGEMENTS = 2000
+BLANK_TABLE = str.maketrans("-.", "00")
+TRANSPOSE = tuple(((i % 9) * 9) + (i // 9) for i in range(CELLS))
+
+#============================================
+# Functions / Procedures
+#============================================
+
+def lineKeys(gridIn):
+    # A key for each row of gridIn (81 character string, '0' for blanks), unchanged by any of the symmetries that keep the row a row.
+    digitUse = {d: gridIn.count(d) for d in "123456789"}
+    rowClues = [sum(1 for c in range(9) if gridIn[(r * 9) + c] != "0") for r in range(9)]
+    colClues = [sum(1 for r in range(9) if gridIn[(r * 9) + c] != "0") for c in range(9)]
+    stackClues = [tuple(sorted(colClues[s * 3: (s * 3) + 3])) for s in range(3)]
+    return [(rowClues[r], tuple(sorted((colClues[c], stackClues[c // 3], digitUse[gridIn[(r * 9) + c]])
+                                       for c in range(9) if gridIn[(r * 9) + c] != "0")))
+            for r in range(9)]
+
+def lineOrders(keysIn):
+    # Every order of the 9 lines with the bands, and the lines within each band, in key order.
+    bandKeys = [tuple(sorted(keysIn[b * 3: (b * 3) + 3])) for b in range(3)]
+    bandOrders = [p for p in permutations(range(3)) if bandKeys[p[0]] <= bandKeys[p[1]] <= bandKeys[p[2]]]
+    inBand = []
+    for b in range(3):
+        lines = range(b * 3, (b * 3) + 3)
+        inBand.append([p for p in permutations(lines) if keysIn[p[0]] <= keysIn[p[1]] <= keysIn[p[2]]])
+    return [sum(lines, ()) for bandOrder in bandOrders for lines in product(*(inBand[b] for b in bandOrder))]
+
+def bandSignature(keysIn):
+    return tuple(sorted(tuple(sorted(keysIn[b * 3: (b * 3) + 3])) for b in range(3)))
+
+def relabel(arrangedIn):
+    # Number the digits in the order they first appear. Returns the relabelled string and the {original: canonical} digit map.
+    labels = {}
+    for d in dict.fromkeys(arrangedIn):
+        if d != "0":
+            labels[d] = str(len(labels) + 1)
+    return arrangedIn.translate(str.maketrans(labels)), labels
+
+def canonicalize(puzzleIn):
+    # Returns (canonical form, cell map, digit map) or None if there are too many arrangements to try. Cell i of the canonical form is
+    # cell map[i] of the puzzle, with its digit relabelled by the digit map.
+    grid = puzzleIn.translate(BLANK_TABLE)
+    transposed = "".join(grid[i] for i in TRANSPOSE)
+    rowKeys = lineKeys(grid)
+    colKeys = lineKeys(transposed)
+
+    # Use whichever way round gives the smaller keys (both if they're the same).
+    rowSig = (bandSignature(rowKeys), bandSignature(colKeys))
+    colSig = (bandSignature(colKeys), bandSignature(rowKeys))
+    orientations = []
+    if rowSig <= colSig:
+        orientations.append((grid, rowKeys, colKeys, False))
+    if colSig <= rowSig:
+        orientations.append((transposed, colKeys, rowKeys, True))
+
+    arrangements = []
+    for g, rKeys, cKeys, isTransposed in orientations:
+        rowOrders = lineOrders(rKeys)
+        colOrders = lineOrders(cKeys)
+        arrangements.append((g, rowOrders, colOrders, isTransposed))
+    if sum(len(rows) * len(cols) for _, rows, cols, _ in arrangements) > MAX_ARRANGEMENTS:
+        return None
+
+    best = None
+    for g, rowOrders, colOrders, isTransposed in arrangements:
+        for rows in rowOrders:
+            for cols in colOrders:
+                cellMap = [(r * 9) + c for r in rows for c in cols]
+                form, labels = relabel("".join([g[i] for i in cellMap]))
+                if best is None or form < best[0]:
+                    if isTransposed:
+                        cellMap = [TRANSPOSE[i] for i in cellMap]
+                    best = (form, cellMap, labels)
+
+    form, cellMap, labels = best
+    # Digits missing from the puzzle take the remaining labels, in order.
+    unused = iter(d for d in "123456789" if d not in labels.values())
+    for d in "123456789":
+        if d not in labels:
+            labels[d] = next(unused)
+    return form, tuple(cellMap), labels
+
+def toCanonical(gridIn, cellMapIn, labelsIn):
+    # Carry a full grid (e.g. a solution of the puzzle) into the canonical frame.
+    return "".join([labelsIn[gridIn[i]] for i in cellMapIn])
+
+def fromCanonical(gridIn, cellMapIn, labelsIn):
+    # Carry a full grid in the canonical frame back to the puzzle's frame.
+    inverse = {v: k for k, v in labelsIn.items()}
+    out = [""] * CELLS
+    for i, cell in enumerate(cellMapIn):
+        out[cell] = inverse[gridIn[i]]
+    return "".join(out)
+
+def randomEquivalent(puzzleIn, rngIn):
+    # A random puzzle equivalent to puzzleIn (random.Random rngIn picks the symmetries). Blanks come back as '0'.
+    grid = puzzleIn.translate(BLANK_TABLE)
+    rows = [(b * 3) + r for b in rngIn.sample(range(3), 3) for r in rngIn.sample(range(3), 3)]
+    cols = [(s * 3) + c for s in rngIn.sample(range(3), 3) for c in rngIn.sample(range(3), 3)]
+    grid = "".join([grid[(r * 9) + c] for r in rows for c in cols])
+    if rngIn.random() < 0.5:
+        grid = "".join([grid[i] for i in TRANSPOSE])
+    return grid.translate(str.maketrans("123456789", "".join(rngIn.sample("123456789", 9))))
@@ -0,0 +1,371 @@
+from array import array
+import numba
+import numpy as np
+import topology
+
+#=============================================================================================================================================
+#
+#   Compiled Kernel
+#   ---------------
+#
+#   The bitmask engine's costliest techniques, compiled with Numba:
+#       - naked and hidden singles - most of the solve time, and almost all of it the interpreter stepping through solveCell /
+#         removeCandidates one peer and one digit at a time
+#       - naked triples / quads and simple colouring - the slowest of the techniques run once the singles stall, trying combinations of
+#         cells or following chains a step at a time
+#   Here the whole technique (every solve and elimination it makes) is a single call into compiled code working directly on the MaskGrid
+#   arrays (values, cands, places).
+#
+#   The kernels make exactly the same changes, in exactly the same order, as bitmaskEngine's doNakedSingle / doHiddenSingles /
+#   doNakedTriplesQuads / doSimpleColoring, so the trail, the counts and the trace are the same with or without the kernel.
+#
+#   The changes made are written to CHANGES as (cell, removed candidates) pairs and summed up in STATE (see STATE_* below), and
+#   bitmaskEngine (kernelNakedSingle etc.) applies them to the rest of the grid - its trail, dirty units and digits, memo bits and
+#   contradiction flag. The kernel doesn't know about any of that, bar the triples / quads memo bits, which are handed over in MEMO.
+#
+#   Numba is optional. Importing this module fails without it and bitmaskEngine then keeps to pure Python. Only bitmaskEngine.useKernel()
+#   imports it, and calls warmUp() to compile the kernels (or load them from Numba's cache in __pycache__) there and then, so no solve is
+#   timed with the compiler in it.
+#==============================================================================================================================================
+
+#============================================
+# Globals / Constants
+#============================================
+
+ALL_CANDIDATES = 0x1FF
+
+# As bitmaskEngine's tables of the same names
+PEERS = np.array(topology.PEERS, dtype=np.int64)                                     # (81, 20)
+UNITS = np.array(topology.UNITS, dtype=np.int64)                                     # (27, 9)
+CELL_UNIT_BITS = np.array([[x for u in range(27) if cell in topology.UNITS[u]
+                            for x in (u * 9, ALL_CANDIDATES ^ (1 << topology.UNITS[u].index(cell)))]
+                           for cell in range(topology.CELLS)], dtype=np.int64)           # (81, 6)
+CELL_UNIT_FLAGS = np.array([(1 << r) | (1 << c) | (1 << b) for r, c, b in topology.CELL_UNITS], dtype=np.int64)
+POPCOUNT = np.array([bin(m).count("1") for m in range(512)], dtype=np.int64)
+IS_PEER = np.array([[other in topology.PEERS[cell] for other in range(topology.CELLS)] for cell in range(topology.CELLS)], dtype=np.bool_)
+LOWEST_INDEX = np.array([(m & -m).bit_length() - 1 for m in range(512)], dtype=np.int64)
+
+# STATE entries, set by each kernel call
+STATE_CHANGES = 0          # length of CHANGES used (2 per change)
+STATE_UNITS = 1            # the units changed, as a 27-bit unit set
+STATE_DIGITS = 2           # the digits removed, as a 9-bit mask
+STATE_CONTRADICTION = 3    # 1 if an unsolved cell was left with no candidates
+
+# One call can't make more changes than solving every cell would (its own 2 and one per peer), so this never fills up. These are shared
+# by every grid in the process, which is fine as the kernels hold the GIL and their results are read straight after.
+CHANGES = array('H', [0]) * (topology.CELLS * 2 * 22)
+STATE = array('q', [0]) * 4
+MEMO = array('q', [0]) * 2           # the triples and quads memo bits, in and out of nakedTriplesQuads()
+
+#============================================
+# Core updates
+#============================================
+
+@numba.njit(cache=True)
+def removeCandidates(values, cands, places, changes, state, cell, mask):
+    # As bitmaskEngine.removeCandidates()
+    removed = cands[cell] & mask
+    if removed == 0:
+        return 0
+    left = cands[cell] ^ removed
+    cands[cell] = left
+    if left == 0 and values[cell] == 0:
+        state[STATE_CONTRADICTION] = 1
+    n = state[STATE_CHANGES]
+    changes[n] = cell
+    changes[n + 1] = removed
+    state[STATE_CHANGES] = n + 2
+    state[STATE_UNITS] |= CELL_UNIT_FLAGS[cell]
+    state[STATE_DIGITS] |= removed
+    for d in range(9):
+        if removed & (1 << d):
+            places[CELL_UNIT_BITS[cell, 0] + d] &= CELL_UNIT_BITS[cell, 1]
+            places[CELL_UNIT_BITS[cell, 2] + d] &= CELL_UNIT_BITS[cell, 3]
+            places[CELL_UNIT_BITS[cell, 4] + d] &= CELL_UNIT_BITS[cell, 5]
+    return POPCOUNT[removed]
+
+@numba.njit(cache=True)
+def solveCell(values, cands, places, changes, state, cell):
+    # As bitmaskEngine.solveCell()
+    mask = np.int64(cands[cell])
+    d = LOWEST_INDEX[mask]
+    values[cell] = d + 1
+    n = state[STATE_CHANGES]
+    changes[n] = cell
+    changes[n + 1] = 0
+    state[STATE_CHANGES] = n + 2
+    removeCandidates(values, cands, places, changes, state, cell, mask)
+
+    for k in range(20):
+        dependant = PEERS[cell, k]
+        c = cands[dependant]
+        if not c & mask:
+            continue
+        c ^= mask
+        cands[dependant] = c
+        if c == 0:
+            state[STATE_CONTRADICTION] = 1
+        n = state[STATE_CHANGES]
+        changes[n] = dependant
+        changes[n + 1] = mask
+        state[STATE_CHANGES] = n + 2
+        state[STATE_UNITS] |= CELL_UNIT_FLAGS[dependant]
+        places[CELL_UNIT_BITS[dependant, 0] + d] &= CELL_UNIT_BITS[dependant, 1]
+        places[CELL_UNIT_BITS[dependant, 2] + d] &= CELL_UNIT_BITS[dependant, 3]
+        places[CELL_UNIT_BITS[dependant, 4] + d] &= CELL_UNIT_BITS[dependant, 5]
+
+#============================================
+# Techniques
+#============================================
+
+@numba.njit(cache=True)
+def nakedSingles(values, cands, places, changes, state):
+    # As bitmaskEngine.doNakedSingle() - one pass over the cells, picking up cells reduced to one candidate by an earlier solve.
+    for i in range(4):
+        state[i] = 0
+    count = 0
+    for cell in range(81):
+        c = cands[cell]
+        if c and not c & (c - 1) and values[cell] == 0:
+            solveCell(values, cands, places, changes, state, cell)
+            count += 1
+    return count
+
+@numba.njit(cache=True)
+def hiddenSingles(values, cands, places, changes, state, units):
+    # As bitmaskEngine.doHiddenSingles(), over the unit numbers in units.
+    for i in range(4):
+        state[i] = 0
+    count = 0
+    for k in range(len(units)):
+        u = units[k]
+        offset = u * 9
+        single = False
+        for d in range(9):
+            if POPCOUNT[places[offset + d]] == 1:
+                single = True
+        if not single:
+            continue
+
+        for d in range(9):
+            where = places[offset + d]
+            if POPCOUNT[where] == 1:
+                count += removeCandidates(values, cands, places, changes, state, UNITS[u, LOWEST_INDEX[where]], ALL_CANDIDATES ^ (1 << d))
+    return count
+
+@numba.njit(cache=True)
+def findNakedSet(cands, u, small, k, t):
+    # As bitmaskEngine.findNakedSet(), but just whether there is one. small holds the k cells of unit u with 2 to t candidates.
+    for x in range(k - t + 1):
+        a = small[x]
+        ma = cands[a]
+        for y in range(x + 1, k - t + 2):
+            b = small[y]
+            mab = ma | cands[b]
+            if POPCOUNT[mab] > t:
+                continue
+            for z in range(y + 1, k - t + 3):
+                c = small[z]
+                mabc = mab | cands[c]
+                if POPCOUNT[mabc] > t:
+                    continue
+                if t == 3:
+                    for p in range(9):
+                        cell = UNITS[u, p]
+                        if cell != a and cell != b and cell != c and cands[cell] & mabc:
+                            return True
+                    continue
+                for w in range(z + 1, k):
+                    e = small[w]
+                    mabce = mabc | cands[e]
+                    if POPCOUNT[mabce] == 4:
+                        for p in range(9):
+                            cell = UNITS[u, p]
+                            if cell != a and cell != b and cell != c and cell != e and cands[cell] & mabce:
+                                return True
+    return False
+
+@numba.njit(cache=True)
+def removeFromUnit(values, cands, places, changes, state, memo, u, mask, a, b, c, e):
+    # Remove mask from every cell of unit u but a, b, c and e, clearing the memo bits of the units changed as it goes.
+    count = 0
+    for p in range(9):
+        cell = UNITS[u, p]
+        if cell != a and cell != b and cell != c and cell != e:
+            removed = removeCandidates(values, cands, places, changes, state, cell, mask)
+            if removed:
+                memo[0] &= ~CELL_UNIT_FLAGS[cell]
+                memo[1] &= ~CELL_UNIT_FLAGS[cell]
+                count += removed
+    return count
+
+@numba.njit(cache=True)
+def nakedTriplesQuads(values, cands, places, changes, state, units, memo):
+    # As bitmaskEngine.doNakedTriplesQuads(), over the unit numbers in units. memo holds the triples and quads memo bits (a 27-bit unit
+    # set each, see MaskGrid.memoClean), which are read and updated as the Python version does.
+    for i in range(4):
+        state[i] = 0
+    count = 0
+    small = np.empty(9, np.int64)
+    possibles = np.empty(9, np.int64)
+    for t in range(3, 5):
+        m = t - 3
+        for k in range(len(units)):
+            u = units[k]
+            if memo[m] >> u & 1:
+                continue
+            solved = 0
+            ns = 0
+            for p in range(9):
+                cell = UNITS[u, p]
+                pc = POPCOUNT[cands[cell]]
+                if pc == 0:
+                    solved += 1
+                elif 2 <= pc <= t:
+                    small[ns] = cell
+                    ns += 1
+            if solved >= 9 - t or ns < t:
+                continue
+            if not findNakedSet(cands, u, small, ns, t):
+                memo[m] |= 1 << u
+                continue
+
+            n = 0
+            for p in range(9):
+                cell = UNITS[u, p]
+                if POPCOUNT[cands[cell]] >= 2:
+                    possibles[n] = cell
+                    n += 1
+            for i in range(n - t + 1):
+                a = possibles[i]
+                ma = cands[a]
+                if POPCOUNT[ma] < 2 or POPCOUNT[ma] > t:
+                    continue
+                for j in range(i + 1, n - t + 2):
+                    b = possibles[j]
+                    mb = cands[b]
+                    if POPCOUNT[mb] < 2:
+                        continue
+                    mab = ma | mb
+                    if POPCOUNT[mab] > t:
+                        continue
+                    for l in range(j + 1, n - t + 3):
+                        c = possibles[l]
+                        mc = cands[c]
+                        if POPCOUNT[mc] < 2:
+                            continue
+                        mabc = mab | mc
+                        if POPCOUNT[mabc] > t:
+                            continue
+                        if t == 3:
+                            if POPCOUNT[mabc] == 3:
+                                count += removeFromUnit(values, cands, places, changes, state, memo, u, mabc, a, b, c, -1)
+                            continue
+                        for q in range(l + 1, n):
+                            e = possibles[q]
+                            me = cands[e]
+                            if POPCOUNT[me] < 2:
+                                continue
+                            mabce = mabc | me
+                            if POPCOUNT[mabce] == 4:
+                                count += removeFromUnit(values, cands, places, changes, state, memo, u, mabce, a, b, c, e)
+    return count
+
+@numba.njit(cache=True)
+def seesColour(cell, chain, size, colour, c):
+    # True if cell sees a cell of the chain (its first size cells) with colour c
+    for x in range(size):
+        other = chain[x]
+        if colour[other] == c and IS_PEER[cell, other]:
+            return True
+    return False
+
+@numba.njit(cache=True)
+def simpleColoring(values, cands, places, changes, state, digits):
+    # As bitmaskEngine.doSimpleColoring(), for the digits in the 9-bit mask digits. Each candidate's eliminations are made in cell order.
+    for i in range(4):
+        state[i] = 0
+    count = 0
+    links = np.empty((81, 3), np.int64)
+    linkCount = np.empty(81, np.int64)
+    colour = np.empty(81, np.int64)
+    component = np.empty(81, np.int64)
+    chain = np.empty(81, np.int64)
+    eliminate = np.empty(81, np.bool_)
+    for d in range(9):
+        if not digits >> d & 1:
+            continue
+        bit = 1 << d
+        linkCount[:] = 0
+        linked = 0
+        for u in range(27):
+            where = places[u * 9 + d]
+            if POPCOUNT[where] == 2:
+                a = UNITS[u, LOWEST_INDEX[where]]
+                b = UNITS[u, LOWEST_INDEX[where & (where - 1)]]
+                for x, y in ((a, b), (b, a)):
+                    if linkCount[x] == 0:
+                        linked += 1
+                    links[x, linkCount[x]] = y
+                    linkCount[x] += 1
+        if linked < 3:
+            continue
+
+        colour[:] = -1
+        component[:] = -1
+        eliminate[:] = False
+        for start in range(81):
+            if linkCount[start] == 0 or colour[start] >= 0:
+                continue
+            colour[start] = 0
+            component[start] = start
+            chain[0] = start
+            size = 1
+            i = 0
+            while i < size:
+                cell = chain[i]
+                i += 1
+                for j in range(linkCount[cell]):
+                    other = links[cell, j]
+                    if colour[other] < 0:
+                        colour[other] = 1 - colour[cell]
+                        component[other] = start
+                        chain[size] = other
+                        size += 1
+            if size < 3:
+                continue
+
+            wrapped = False
+            for c in range(2):
+                for x in range(size):
+                    if colour[chain[x]] == c and seesColour(chain[x], chain[x + 1:], size - x - 1, colour, c):
+                        for y in range(size):
+                            if colour[chain[y]] == c:
+                                eliminate[chain[y]] = True
+                        wrapped = True
+                        break
+            if wrapped:
+                continue
+            for cell in range(81):
+                if cands[cell] & bit and component[cell] != start and seesColour(cell, chain, size, colour, 0) and \
+                   seesColour(cell, chain, size, colour, 1):
+                    eliminate[cell] = True
+
+        for cell in range(81):
+            if eliminate[cell]:
+                count += removeCandidates(values, cands, places, changes, state, cell, bit)
+    return count
+
+#============================================
+# Start up
+#============================================
+
+def warmUp():
+    # Compile the kernels (or load them from the cache) on an empty grid.
+    values = array('b', [0]) * topology.CELLS
+    cands = array('H', [ALL_CANDIDATES]) * topology.CELLS
+    places = array('H', [ALL_CANDIDATES]) * (27 * 9)
+    nakedSingles(values, cands, places, CHANGES, STATE)
+    hiddenSingles(values, cands, places, CHANGES, STATE, bytes(range(27)))
+    nakedTriplesQuads(values, cands, places, CHANGES, STATE, bytes(range(27)), MEMO)
+    simpleColoring(values, cands, places, CHANGES, STATE, ALL_CANDIDATES)
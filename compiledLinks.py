@@ -0,0 +1,119 @@
+import numba
+import numpy as np
+
+#=============================================================================================================================================
+#
+#   Compiled Dancing Links
+#   ----------------------
+#
+#   Dancing Links' search (dancingLinks.searchLinks() / countLinks()) compiled with Numba, for any grid size. On the harder 16x16 and
+#   25x25 puzzles the search tries hundreds of thousands of options, and in pure Python nearly all of that time is the interpreter
+#   stepping through cover() / uncover() a link at a time.
+#
+#   exactCover() works on the links dancingLinks.Links builds, copied into arrays, and is a loop rather than a recursion. It tries the
+#   options in the same order as the Python search, so it finds the same solutions with the same node and backtrack counts.
+#
+#   Numba is optional. Importing this module fails without it and dancingLinks then keeps to pure Python. Only dancingLinks.useKernel()
+#   imports it, and calls warmUp() to compile exactCover (or load it from Numba's cache in __pycache__) there and then, so no solve is
+#   timed with the compiler in it.
+#==============================================================================================================================================
+
+#============================================
+# Links
+#============================================
+@numba.njit(cache=True)
+def coverColumn(left, right, up, down, column, size, col):
+    # As dancingLinks.Links.cover()
+    right[left[col]] = right[col]
+    left[right[col]] = left[col]
+    i = down[col]
+    while i != col:
+        j = right[i]
+        while j != i:
+            down[up[j]] = down[j]
+            up[down[j]] = up[j]
+            size[column[j]] -= 1
+            j = right[j]
+        i = down[i]
+
+@numba.njit(cache=True)
+def uncoverColumn(left, right, up, down, column, size, col):
+    # As dancingLinks.Links.uncover()
+    i = up[col]
+    while i != col:
+        j = left[i]
+        while j != i:
+            size[column[j]] += 1
+            down[up[j]] = j
+            up[down[j]] = j
+            j = left[j]
+        i = up[i]
+    right[left[col]] = col
+    left[right[col]] = col
+
+@numba.njit(cache=True)
+def exactCover(left, right, up, down, column, size, option, chosen, limit, stats):
+    # dancingLinks.searchLinks() / countLinks() without the recursion - cols and rows hold the column covered and the row being tried at
+    # each depth. Returns the number of solutions found, stopping once there are limit. The options of the last one found are left in
+    # chosen[:stats[2]], and stats[0] / stats[1] count the nodes and backtracks as the Python versions do.
+    cols = np.zeros(len(chosen) + 1, dtype=np.int64)
+    rows = np.zeros(len(chosen) + 1, dtype=np.int64)
+    depth = 0
+    found = 0
+    while True:
+        # Pick the constraint with the fewest options left, as dancingLinks.Links.smallestColumn()
+        best = 0
+        bestSize = len(right)
+        col = right[0]
+        while col:
+            if size[col] < bestSize:
+                best = col
+                bestSize = size[col]
+                if bestSize <= 1:
+                    break
+            col = right[col]
+
+        if best and bestSize:
+            coverColumn(left, right, up, down, column, size, best)
+            row = down[best]
+            cols[depth] = best
+        else:
+            if not best:
+                found += 1
+                stats[2] = depth
+                if found >= limit:
+                    return found
+            # Back out to the next row to try, uncovering each column that has run out of them
+            row = 0
+            while depth:
+                depth -= 1
+                j = left[rows[depth]]
+                while j != rows[depth]:
+                    uncoverColumn(left, right, up, down, column, size, column[j])
+                    j = left[j]
+                stats[1] += 1
+                row = down[rows[depth]]
+                if row != cols[depth]:
+                    break
+                uncoverColumn(left, right, up, down, column, size, cols[depth])
+                row = 0
+            if not row:
+                return found
+
+        stats[0] += 1
+        rows[depth] = row
+        chosen[depth] = option[row]
+        j = right[row]
+        while j != row:
+            coverColumn(left, right, up, down, column, size, column[j])
+            j = right[j]
+        depth += 1
+
+#============================================
+# Start up
+#============================================
+
+def warmUp():
+    # Compile the search (or load it from the cache) on an empty set of links.
+    links = np.zeros(2, dtype=np.int64)
+    exactCover(links, links, links, links, links, links, links, np.zeros(1, dtype=np.int64), 1, np.zeros(3, dtype=np.int64))
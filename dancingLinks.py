@@ -0,0 +1,298 @@
+import topology
+
+#=============================================================================================================================================
+#
+#   Dancing Links (Algorithm X)
+#   ---------------------------
+#
+#   An exact cover backend, as an alternative to the backtracking search. Solving the grid is an exact cover problem: pick one
+#   (cell, digit) option for each cell so that every one of the 324 constraints is met exactly once:
+#       -   0-80  - each cell has a value
+#       -  81-161 - each row has each digit
+#       - 162-242 - each column has each digit
+#       - 243-323 - each mini-grid has each digit
+#   Each option covers four constraints (one of each kind). Knuth's Algorithm X picks the constraint with the fewest options left, tries
+#   each of them in turn, and removes every option clashing with the one tried. Dancing Links holds the options and constraints in
+#   circular doubly linked lists (flat arrays of node indexes here), so removing and restoring them is just relinking.
+#
+#   Only the options still open are added, so the search can start from the candidates left once the techniques stall, as well as from
+#   the givens alone. Solved cells simply have one option.
+#
+#   The links can be built for a grid of any size (topologyIn, see topology.forSize()) - 4 * cells constraints and size options per cell.
+#   The default is the standard 9x9 grid.
+#
+#   solve() returns the 81 values, or None if there is no solution. The stats dict counts the nodes (options tried) and backtracks.
+#   countSolutions() / countCandidates() carry on past the first solution and return how many there are, stopping once limitIn have been
+#   found (2 being enough to tell a unique puzzle from one with several solutions).
+#
+#   useKernel() runs the search in compiled code (compiledLinks.py) if Numba is installed - same options, same order, same stats, but
+#   around 15 times faster on the larger grids.
+#==============================================================================================================================================
+
+#============================================
+# Globals / Constants
+#============================================
+
+CELLS = topology.CELLS
+CONSTRAINTS = 4 * CELLS
+ALL_CANDIDATES = 0x1FF
+
+def optionColumns(topologyIn):
+    # The four constraint columns (1 to 4 * cells, 0 being the root) covered by putting digit d (0 to size - 1) in each cell.
+    size = topologyIn.size
+    cells = topologyIn.cells
+    return tuple(tuple((1 + cell, 1 + cells + (r * size) + d, 1 + (2 * cells) + (c * size) + d, 1 + (3 * cells) + (b * size) + d)
+                       for d in range(size))
+                 for cell, (r, c, b) in enumerate(zip(topologyIn.rowOfCell, topologyIn.colOfCell, topologyIn.miniGridOfCell)))
+
+OPTION_COLUMNS = optionColumns(topology.STANDARD)
+SIZED_OPTION_COLUMNS = {9: OPTION_COLUMNS}
+
+#============================================
+# Links
+#============================================
+
+class Links:
+    def __init__(self, candidatesIn, topologyIn=topology.STANDARD):
+        # candidatesIn is a size-bit candidate mask per cell (bit d - 1 set if d is possible)
+        size = topologyIn.size
+        columns = SIZED_OPTION_COLUMNS.get(size)
+        if columns is None:
+            columns = SIZED_OPTION_COLUMNS[size] = optionColumns(topologyIn)
+        nodes = 1 + (4 * topologyIn.cells)
+        self.left = list(range(-1, nodes - 1))
+        self.right = list(range(1, nodes + 1))
+        self.left[0] = nodes - 1
+        self.right[nodes - 1] = 0
+        self.up = list(range(nodes))
+        self.down = list(range(nodes))
+        self.column = list(range(nodes))
+        self.size = [0] * nodes
+        self.option = [-1] * nodes       # (cell * size) + digit index for each option node
+
+        for cell in range(topologyIn.cells):
+            mask = candidatesIn[cell]
+            for d in range(size):
+                if mask & (1 << d):
+                    self.addOption((cell * size) + d, columns[cell][d])
+
+    def addOption(self, optionIn, columnsIn):
+        left, right, up, down, column, size, option = self.left, self.right, self.up, self.down, self.column, self.size, self.option
+        first = len(left)
+        for i, col in enumerate(columnsIn):
+            node = first + i
+            left.append(first + ((i + 3) % 4))
+            right.append(first + ((i + 1) % 4))
+            up.append(up[col])
+            down.append(col)
+            down[up[col]] = node
+            up[col] = node
+            column.append(col)
+            option.append(optionIn)
+            size[col] += 1
+
+    def cover(self, colIn):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        right[left[colIn]] = right[colIn]
+        left[right[colIn]] = left[colIn]
+        i = down[colIn]
+        while i != colIn:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, colIn):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        i = up[colIn]
+        while i != colIn:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[colIn]] = colIn
+        left[right[colIn]] = colIn
+
+    def smallestColumn(self):
+        # The constraint with the fewest options left (0 if every constraint is met)
+        right, size = self.right, self.size
+        best = 0
+        bestSize = len(right)
+        col = right[0]
+        while col:
+            if size[col] < bestSize:
+                best = col
+                bestSize = size[col]
+                if bestSize <= 1:
+                    break
+            col = right[col]
+        return best
+
+#============================================
+# Functions / Procedures
+#============================================
+
+def newStats():
+    return {"nodes": 0, "backtracks": 0}
+
+def searchLinks(linksIn, chosenIn, statsIn):
+    col = linksIn.smallestColumn()
+    if not col:
+        return True
+    if not linksIn.size[col]:
+        return False
+
+    right, left, down, column = linksIn.right, linksIn.left, linksIn.down, linksIn.column
+    linksIn.cover(col)
+    row = down[col]
+    while row != col:
+        statsIn["nodes"] += 1
+        chosenIn.append(linksIn.option[row])
+        j = right[row]
+        while j != row:
+            linksIn.cover(column[j])
+            j = right[j]
+
+        if searchLinks(linksIn, chosenIn, statsIn):
+            return True
+
+        j = left[row]
+        while j != row:
+            linksIn.uncover(column[j])
+            j = left[j]
+        chosenIn.pop()
+        statsIn["backtracks"] += 1
+        row = down[row]
+    linksIn.uncover(col)
+    return False
+
+def countLinks(linksIn, limitIn, statsIn):
+    # As searchLinks(), but backs out of each solution too. Returns the number found, stopping once there are limitIn.
+    col = linksIn.smallestColumn()
+    if not col:
+        return 1
+    if not linksIn.size[col]:
+        return 0
+
+    right, left, down, column = linksIn.right, linksIn.left, linksIn.down, linksIn.column
+    found = 0
+    linksIn.cover(col)
+    row = down[col]
+    while row != col:
+        statsIn["nodes"] += 1
+        j = right[row]
+        while j != row:
+            linksIn.cover(column[j])
+            j = right[j]
+
+        found += countLinks(linksIn, limitIn - found, statsIn)
+
+        j = left[row]
+        while j != row:
+            linksIn.uncover(column[j])
+            j = left[j]
+        if found >= limitIn:
+            break
+        statsIn["backtracks"] += 1
+        row = down[row]
+    linksIn.uncover(col)
+    return found
+
+# The compiledLinks module, once useKernel() has imported it, and whether the search is to use it.
+compiledLinks = None
+kernelOn = False
+
+def useKernel(onIn=True):
+    # Run the search in compiled code (compiledLinks.exactCover()), or (onIn False) in pure Python. It tries the same options in the
+    # same order, so the solutions and stats are the same either way. The first time the kernel is asked for it is imported and compiled
+    # (or loaded from Numba's cache). Returns whether the kernel is in use, which it can't be without Numba.
+    global compiledLinks, kernelOn
+    if onIn and compiledLinks is None:
+        try:
+            import compiledLinks as kernel
+        except ImportError:
+            # No Numba, so the search stays pure Python.
+            kernel = None
+        if kernel is not None:
+            kernel.warmUp()
+            compiledLinks = kernel
+    kernelOn = onIn and compiledLinks is not None
+    return kernelOn
+
+def kernelSearch(linksIn, limitIn, statsIn):
+    # Returns (solutions found, options of the last one found) from compiledLinks.exactCover()
+    np = compiledLinks.np
+    arrays = [np.array(a, dtype=np.int64) for a in (linksIn.left, linksIn.right, linksIn.up, linksIn.down, linksIn.column, linksIn.size,
+                                                    linksIn.option)]
+    chosen = np.zeros(len(linksIn.size), dtype=np.int64)
+    stats = np.zeros(3, dtype=np.int64)
+    found = compiledLinks.exactCover(*arrays, chosen, limitIn, stats)
+    statsIn["nodes"] += int(stats[0])
+    statsIn["backtracks"] += int(stats[1])
+    return found, chosen[:stats[2]].tolist()
+
+def solveCandidates(candidatesIn, statsIn=None, topologyIn=topology.STANDARD):
+    # candidatesIn is a candidate mask per cell. Returns the list of values (81 for 9x9), or None if there is no solution.
+    if statsIn is None:
+        statsIn = newStats()
+    links = Links(candidatesIn, topologyIn)
+    if kernelOn:
+        found, chosen = kernelSearch(links, 1, statsIn)
+    else:
+        chosen = []
+        found = searchLinks(links, chosen, statsIn)
+    if not found:
+        return None
+    size = topologyIn.size
+    values = [0] * topologyIn.cells
+    for option in chosen:
+        values[option // size] = (option % size) + 1
+    return values
+
+def countCandidates(candidatesIn, limitIn=2, statsIn=None, topologyIn=topology.STANDARD):
+    if limitIn < 1:
+        raise ValueError(f"Solution limit must be at least 1, not {limitIn}")
+    if statsIn is None:
+        statsIn = newStats()
+    links = Links(candidatesIn, topologyIn)
+    if kernelOn:
+        return kernelSearch(links, limitIn, statsIn)[0]
+    return countLinks(links, limitIn, statsIn)
+
+def countSolutions(valuesIn, limitIn=2, statsIn=None):
+    candidates = [ALL_CANDIDATES] * CELLS
+    for cell, value in valuesIn:
+        candidates[cell] = 1 << (value - 1)
+    return countCandidates(candidates, limitIn, statsIn)
+
+def countMaskGrid(gridIn, limitIn=2, statsIn=None):
+    candidates = [(1 << (v - 1)) if v else m for v, m in zip(gridIn.values, gridIn.cands)]
+    return countCandidates(candidates, limitIn, statsIn)
+
+def solve(valuesIn, statsIn=None):
+    # valuesIn is a list of (cell index, value), as returned by loadValuesFromFile()
+    candidates = [ALL_CANDIDATES] * CELLS
+    for cell, value in valuesIn:
+        candidates[cell] = 1 << (value - 1)
+    return solveCandidates(candidates, statsIn)
+
+def solveListGrid(gridIn, statsIn=None):
+    # Start from a list engine grid (list of (value, candidates, dependants)), with its solved values and remaining candidates.
+    candidates = []
+    for value, cellCandidates, _ in gridIn:
+        mask = 0
+        for c in ([value] if value else cellCandidates):
+            mask |= 1 << (c - 1)
+        candidates.append(mask)
+    return solveCandidates(candidates, statsIn)
+
+def solveMaskGrid(gridIn, statsIn=None):
+    # Start from a bitmask engine grid, e.g. once the techniques have stalled.
+    candidates = [(1 << (v - 1)) if v else m for v, m in zip(gridIn.values, gridIn.cands)]
+    return solveCandidates(candidates, statsIn)
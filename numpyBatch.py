@@ -0,0 +1,162 @@
+import numpy as np
+import topology
+import bitmaskEngine as bm
+import backtrackSearch
+
+#=============================================================================================================================================
+#
+#   NumPy Batch Engine
+#   ------------------
+#
+#   Solves many puzzles at once. A batch of N puzzles is held as an (N, 81) uint16 array of candidate bitmasks (bit d - 1 set if d is
+#   still a candidate, as in bitmaskEngine.py); a cell with a single candidate counts as solved. Each pass applies these to the whole batch
+#   with array operations:
+#       - Naked singles - each cell loses the values of its solved peers.
+#       - Hidden singles - a candidate found in only one cell of a row, column or mini-grid becomes that cell's value.
+#       - Pointing / claiming - for each mini-grid / line intersection, candidates found nowhere else in the mini-grid are removed from
+#         the rest of the line, and candidates found nowhere else in the line are removed from the rest of the mini-grid.
+#   All of the cell lookups are done with the index tables below, built once at import (the vectorised counterparts of getMyDependants and
+#   MINI_GRID_CELLS).
+#
+#   Passes are repeated on the puzzles still changing until none are. Puzzles left with an empty cell, or a digit with nowhere to go in a
+#   unit, have no solution. Puzzles that stall are handed, with the candidates found so far, to the backtracking search.
+#==============================================================================================================================================
+
+#============================================
+# Globals / Constants
+#============================================
+
+ALL_CANDIDATES = bm.ALL_CANDIDATES
+
+PEERS = np.array(bm.PEERS, dtype=np.intp)                # (81, 20)
+UNITS = np.array(bm.UNITS, dtype=np.intp)                # (27, 9)
+CELL_UNITS = np.array(topology.CELL_UNITS, dtype=np.intp)     # (81, 3)
+
+# Mini-grid / line intersections - 27 mini-rows then 27 mini-cols, each 3 cells. For each, the other 6 cells of the mini-grid and the
+# other 6 cells of the line.
+def buildIntersections():
+    segments = []
+    boxRests = []
+    lineRests = []
+    for lines in (bm.ROW_UNITS, bm.COL_UNITS):
+        for box in bm.BOX_UNITS:
+            for line in lines:
+                segment = [c for c in line if c in box]
+                if segment:
+                    segments.append(segment)
+                    boxRests.append([c for c in box if c not in segment])
+                    lineRests.append([c for c in line if c not in segment])
+    return segments, boxRests, lineRests
+
+segments, boxRests, lineRests = buildIntersections()
+SEGMENTS = np.array(segments, dtype=np.intp)             # (54, 3)
+SEGMENT_BOX_REST = np.array(boxRests, dtype=np.intp)     # (54, 6)
+SEGMENT_LINE_REST = np.array(lineRests, dtype=np.intp)   # (54, 6)
+
+# For each cell, the intersections whose pointing eliminations (0-53) or claiming eliminations (54-107) reach it.
+CELL_SEGMENT_ELIMS = np.array([[s for s in range(54) if cell in lineRests[s]] + [54 + s for s in range(54) if cell in boxRests[s]]
+                               for cell in range(bm.CELLS)], dtype=np.intp)   # (81, 8)
+del segments, boxRests, lineRests
+
+POPCOUNT = np.array(list(bm.POPCOUNT), dtype=np.uint8)
+
+# Character code -> candidate mask for parsing, and single candidate mask -> digit character for output.
+CHAR_MASKS = np.zeros(256, dtype=np.uint16)
+for c in b"-.0":
+    CHAR_MASKS[c] = ALL_CANDIDATES
+for d in range(1, 10):
+    CHAR_MASKS[ord(str(d))] = 1 << (d - 1)
+MASK_CHARS = np.full(512, ord("-"), dtype=np.uint8)
+for d in range(1, 10):
+    MASK_CHARS[1 << (d - 1)] = ord(str(d))
+
+#============================================
+# Functions / Procedures
+#============================================
+
+def parsePuzzles(puzzlesIn):
+    # List of 81 character puzzle strings -> (N, 81) candidate masks
+    raw = np.frombuffer("".join(puzzlesIn).encode("ascii"), dtype=np.uint8).reshape(len(puzzlesIn), bm.CELLS)
+    masks = CHAR_MASKS[raw]
+    if not masks.all():
+        raise ValueError("Unexpected character in puzzle")
+    return masks
+
+def formatSolution(masksIn):
+    return MASK_CHARS[masksIn].tobytes().decode("ascii")
+
+def nakedSingles(candsIn):
+    # Remove each solved cell's value from its peers.
+    solved = np.where(POPCOUNT[candsIn] == 1, candsIn, 0).astype(np.uint16)
+    return candsIn & ~np.bitwise_or.reduce(solved[:, PEERS], axis=2)
+
+def hiddenSingles(candsIn):
+    # Count each candidate across the cells of every unit (once / more than once), a bit at a time.
+    unitCands = candsIn[:, UNITS]
+    once = np.zeros(unitCands.shape[:2], dtype=np.uint16)
+    twice = np.zeros_like(once)
+    for p in range(9):
+        twice |= once & unitCands[:, :, p]
+        once |= unitCands[:, :, p]
+
+    # A digit with nowhere to go in a unit empties the whole unit, so the puzzle is seen as having no solution.
+    missing = np.bitwise_or.reduce(once != ALL_CANDIDATES, axis=1)
+    exactlyOnce = once & ~twice
+
+    hidden = np.bitwise_or.reduce(candsIn[:, :, None] & exactlyOnce[:, CELL_UNITS], axis=2)
+    candsOut = np.where(hidden != 0, hidden, candsIn)
+    # More than one hidden single in the same cell is a contradiction.
+    candsOut[POPCOUNT[hidden] > 1] = 0
+    candsOut[missing] = 0
+    return candsOut
+
+def pointingClaiming(candsIn):
+    segment = np.bitwise_or.reduce(candsIn[:, SEGMENTS], axis=2)
+    boxRest = np.bitwise_or.reduce(candsIn[:, SEGMENT_BOX_REST], axis=2)
+    lineRest = np.bitwise_or.reduce(candsIn[:, SEGMENT_LINE_REST], axis=2)
+
+    # Pointing - in the mini-grid only in this segment, so not elsewhere in the line. Claiming is the other way round.
+    elims = np.concatenate((segment & ~boxRest, segment & ~lineRest), axis=1)
+    return candsIn & ~np.bitwise_or.reduce(elims[:, CELL_SEGMENT_ELIMS], axis=2)
+
+def propagate(candsIn):
+    # Apply the techniques to every puzzle until none of them change. Returns the new candidate array.
+    cands = candsIn.copy()
+    active = np.arange(len(cands))
+    while len(active):
+        before = cands[active]
+        after = pointingClaiming(hiddenSingles(nakedSingles(before)))
+        cands[active] = after
+
+        # Keep going with the puzzles that changed, and haven't hit a contradiction.
+        changed = (after != before).any(axis=1) & (after != 0).all(axis=1)
+        active = active[changed]
+    return cands
+
+def searchStalled(puzzleMasksIn):
+    # Hand a stalled puzzle, with the candidates found so far, to the backtracking search.
+    grid = bm.MaskGrid()
+    for cell, mask in enumerate(puzzleMasksIn.tolist()):
+        bm.removeCandidates(grid, cell, ALL_CANDIDATES ^ mask)
+    if not backtrackSearch.search(grid):
+        return None
+    return "".join(map(str, grid.values))
+
+def solveBatch(puzzlesIn):
+    # Solve a list of 81 character puzzle strings. Returns a list of solutions (81 character strings, or None if there isn't one).
+    if not puzzlesIn:
+        return []
+    cands = propagate(parsePuzzles(puzzlesIn))
+    counts = POPCOUNT[cands]
+    solved = (counts == 1).all(axis=1)
+    dead = (counts == 0).any(axis=1)
+
+    solutions = []
+    for i in range(len(puzzlesIn)):
+        if solved[i]:
+            solutions.append(formatSolution(cands[i]))
+        elif dead[i]:
+            solutions.append(None)
+        else:
+            solutions.append(searchStalled(cands[i]))
+    return solutions
@@ -0,0 +1,245 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import deque
+import topology
+import strategyRegistry
+import bitmaskEngine as bm
+import dancingLinks
+import scheduler
+
+#=============================================================================================================================================
+#
+#   Puzzle Generator
+#   ----------------
+#
+#   Generates minimal, unique solution puzzles and grades them, rather than maintaining grid files by hand.
+#
+#   For each puzzle:
+#       - A random solved grid is made by filling the three mini-grids on the diagonal with random permutations (they share no row or
+#         column, so any fill is consistent) and letting Dancing Links complete the rest.
+#       - Clues are taken away one at a time, in random order. Taking away the clue v in a cell leaves the solution unique if the puzzle
+#         has no solution with anything but v in that cell, so that is what is checked (one solve rather than counting to 2). If there
+#         would be another solution the clue goes back. Every clue left is needed, i.e. the puzzle is minimal.
+#       - The puzzle is graded by the techniques the solver needs for it. Each technique belongs to a grade (GRADE_OF_TECHNIQUE), and the
+#         techniques are applied a grade at a time - the first grade whose techniques solve it is its grade:
+#           - easy       - singles only
+#           - hard       - also naked / hidden pairs, pointing / claiming
+#           - diabolical - X Wing, naked / hidden triples / quads, swordfish, jellyfish, XY / XYZ Wing, simple colouring, or the
+#                          techniques aren't enough and it needs a search
+#         The grade goes by technique, not tier, so re-tiering the techniques (--strategies) changes the order they're tried in but not
+#         the grades. The bundled grids, graded this way: m1, w1 and h1 are easy (singles solve h1 too), t1 is hard, e1 (naked triples),
+#         d1 (naked triples, XY Wing) and d2 (search) are diabolical.
+#
+#   Puzzles are written one per line (81 characters, '0' for blanks), so the output can be piped straight into batchSolver.py. --grades
+#   FILE writes each puzzle's grade to FILE too, a line per puzzle in the same order. With --workers they are generated in a pool of
+#   worker processes, each puzzle from its own seed (--seed plus its number), so a run can be repeated whatever the number of workers.
+#   With --grade, if MAX_EMPTY_BATCHES batches in a row give no puzzles of the grades wanted it gives up rather than trying forever.
+#
+#   Usage:  python puzzleGenerator.py [-n puzzles] [-o output file] [--grades file] [--workers N] [--seed N] [--grade easy|hard|diabolical]
+#                                     [--strategies json file]
+#==============================================================================================================================================
+
+#============================================
+# Globals / Constants
+#============================================
+
+CELLS = topology.CELLS
+ALL_CANDIDATES = 0x1FF
+DIAGONAL_MINI_GRIDS = (0, 4, 8)
+GRADES = ("easy", "hard", "diabolical")
+# The grade of puzzle each technique is needed for. Any technique not listed (e.g. the fish, wings and colouring) makes a puzzle diabolical.
+GRADE_OF_TECHNIQUE = {"nakedSingle": "easy", "hiddenSingles": "easy",
+                      "nakedPairs": "hard", "hiddenPairs": "hard", "pointingPoT": "hard", "claimingPoT": "hard"}
+BATCH_SIZE = 16                                          # puzzles per job sent to a worker
+MAX_EMPTY_BATCHES = 64                                   # batches in a row with none of the grades wanted before giving up
+
+#============================================
+# Functions / Procedures
+#============================================
+
+def randomSolution(rngIn):
+    # A random solved grid, as a list of 81 values.
+    candidates = [ALL_CANDIDATES] * CELLS
+    for box in DIAGONAL_MINI_GRIDS:
+        for cell, d in zip(topology.MINI_GRID_CELLS[box], rngIn.sample(range(9), 9)):
+            candidates[cell] = 1 << d
+    return dancingLinks.solveCandidates(candidates)
+
+def hasOtherSolution(cluesIn, cellIn, valueIn):
+    # True if the clues (81 values, 0 for blank) have a solution with something other than valueIn in cellIn.
+    # The clues are first taken out of their peers' candidates, so Dancing Links starts with far fewer options to link up.
+    candidates = [ALL_CANDIDATES] * CELLS
+    for cell, value in enumerate(cluesIn):
+        if value:
+            mask = ALL_CANDIDATES ^ (1 << (value - 1))
+            for peer in topology.PEERS[cell]:
+                candidates[peer] &= mask
+    for cell, value in enumerate(cluesIn):
+        if value:
+            candidates[cell] = 1 << (value - 1)
+    candidates[cellIn] &= ALL_CANDIDATES ^ (1 << (valueIn - 1))
+    return dancingLinks.countCandidates(candidates, 1) > 0
+
+def minimise(solutionIn, rngIn):
+    # Take clues away from a solved grid, in random order, as long as the solution stays unique. Returns the puzzle as 81 values.
+    clues = list(solutionIn)
+    for cell in rngIn.sample(range(CELLS), CELLS):
+        value = clues[cell]
+        clues[cell] = 0
+        if hasOtherSolution(clues, cell, value):
+            clues[cell] = value
+    return clues
+
+def gradeOf(strategyIn):
+    return GRADES.index(GRADE_OF_TECHNIQUE.get(strategyIn.name, GRADES[-1]))
+
+def gradeRegistries(registryIn):
+    # For each grade, a registry of the enabled techniques of that grade or easier (keeping their tiers and order).
+    registries = []
+    for grade in range(len(GRADES)):
+        registry = strategyRegistry.Registry()
+        for s in registryIn.active():
+            if gradeOf(s) <= grade:
+                registry.register(s.name, s.function, s.tier, s.scope)
+        registries.append((GRADES[grade], registry))
+    return registries
+
+def gradePuzzle(cluesIn, registriesIn=None):
+    # Returns the grade, diabolical if the techniques can't solve it without a search.
+    if registriesIn is None:
+        registriesIn = gradeRegistries(bm.STRATEGIES)
+    grid = bm.createGrid([(i, v) for i, v in enumerate(cluesIn) if v])
+    for grade, registry in registriesIn:
+        # Each grade starts from where the one before stalled, but has to look at the whole grid again.
+        grid.dirtyUnits = bm.ALL_UNITS
+        grid.dirtyDigits = ALL_CANDIDATES
+        if not scheduler.propagate(grid, registry):
+            raise ValueError("Puzzle has no solution")
+        if bm.numOutstandingCells(grid) == 0:
+            return grade
+    return GRADES[-1]
+
+def generatePuzzle(rngIn, registriesIn=None):
+    # Returns (puzzle as an 81 character string, grade)
+    clues = minimise(randomSolution(rngIn), rngIn)
+    return "".join(map(str, clues)), gradePuzzle(clues, registriesIn)
+
+def generateBatch(seedsIn, gradesIn=None):
+    # Worker process entry point - one puzzle per seed. Returns a list of (puzzle, grade), leaving out grades not in gradesIn.
+    registries = gradeRegistries(bm.STRATEGIES)
+    puzzles = []
+    for seed in seedsIn:
+        puzzle, grade = generatePuzzle(random.Random(seed), registries)
+        if gradesIn is None or grade in gradesIn:
+            puzzles.append((puzzle, grade))
+    return puzzles
+
+def seedBatches(seedIn):
+    # Endless batches of consecutive seeds
+    start = seedIn
+    while True:
+        yield range(start, start + BATCH_SIZE)
+        start = start + BATCH_SIZE
+
+def checkEmptyBatches(emptyIn, gradesIn):
+    # Returns the number of batches in a row with no puzzles kept. Raises ValueError once there have been too many, as the grades
+    # wanted are then most likely unreachable (e.g. the strategy config has disabled the techniques they need).
+    if emptyIn >= MAX_EMPTY_BATCHES:
+        raise ValueError(f"No {' / '.join(sorted(gradesIn))} puzzles in {MAX_EMPTY_BATCHES * BATCH_SIZE} tries in a row - "
+                         "can the techniques enabled reach that grade?")
+    return emptyIn
+
+def generate(countIn, seedIn=0, gradesIn=None):
+    # Yields countIn (puzzle, grade) pairs. Raises ValueError if the grades wanted don't come up.
+    if countIn <= 0:
+        return
+    empty = 0
+    for seeds in seedBatches(seedIn):
+        results = generateBatch(seeds, gradesIn)
+        empty = checkEmptyBatches(0 if results else empty + 1, gradesIn)
+        for result in results:
+            yield result
+            countIn = countIn - 1
+            if not countIn:
+                return
+
+def initWorker(strategiesIn):
+    # Worker process start up - apply the strategy config, if any.
+    if strategiesIn:
+        bm.STRATEGIES.loadConfig(strategiesIn)
+
+def generateParallel(countIn, workersIn, seedIn=0, gradesIn=None, strategiesIn=None):
+    # As generate(), spread across workersIn processes. Batches are handed out and read back in seed order.
+    if countIn <= 0:
+        return
+    with multiprocessing.Pool(workersIn, initWorker, (strategiesIn,)) as pool:
+        pending = deque()
+        batches = seedBatches(seedIn)
+        empty = 0
+        while True:
+            while len(pending) < workersIn * 2:
+                pending.append(pool.apply_async(generateBatch, (next(batches), gradesIn)))
+            results = pending.popleft().get()
+            empty = checkEmptyBatches(0 if results else empty + 1, gradesIn)
+            for result in results:
+                yield result
+                countIn = countIn - 1
+                if not countIn:
+                    return
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate graded, minimal suduko puzzles with unique solutions.")
+    parser.add_argument("-n", "--count", type=int, default=100, help="number of puzzles (default 100)")
+    parser.add_argument("-o", "--output", default="-", help="output file, or - for stdout (default)")
+    parser.add_argument("--grades", help="also write each puzzle's grade to this file, a line per puzzle")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes, 0 for one per CPU (default 1, no pool)")
+    parser.add_argument("--seed", type=int, default=0, help="first seed (default 0)")
+    parser.add_argument("--grade", action="append", choices=GRADES, help="only keep puzzles of this grade (can be repeated)")
+    parser.add_argument("--strategies", help="strategy config (JSON) for the techniques used to grade")
+    args = parser.parse_args(argv)
+    if args.count < 0 or args.workers < 0:
+        parser.error("--count and --workers must be 0 or more")
+    workers = args.workers or os.cpu_count() or 1
+    grades = set(args.grade) if args.grade else None
+
+    fileOut = sys.stdout if args.output == "-" else None
+    gradesOut = None
+    try:
+        if fileOut is None:
+            fileOut = open(args.output, "w")
+        if args.grades:
+            gradesOut = open(args.grades, "w")
+        initWorker(args.strategies)
+        start = time.perf_counter()
+        if workers > 1:
+            results = generateParallel(args.count, workers, args.seed, grades, args.strategies)
+        else:
+            results = generate(args.count, args.seed, grades)
+        totals = dict.fromkeys(GRADES, 0)
+        for puzzle, grade in results:
+            fileOut.write(puzzle + "\n")
+            if gradesOut is not None:
+                gradesOut.write(grade + "\n")
+            totals[grade] += 1
+        elapsed = time.perf_counter() - start
+    except (ValueError, OSError) as e:
+        print("Aborting....\n", e, file=sys.stderr)
+        return 1
+    finally:
+        if fileOut is not None and fileOut is not sys.stdout:
+            fileOut.close()
+        if gradesOut is not None:
+            gradesOut.close()
+
+    total = sum(totals.values())
+    rate = total * 60 / elapsed if elapsed > 0 else 0.0
+    print(f"{total} puzzles in {elapsed:.2f}s - {rate:.0f} puzzles/min - " + " ".join(f"{g}={n}" for g, n in totals.items()),
+          file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
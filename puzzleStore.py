@@ -0,0 +1,294 @@
+import argparse
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import time
+import batchSolver
+
+#=============================================================================================================================================
+#
+#   Puzzle Store
+#   ------------
+#
+#   A compact binary file of puzzles (or solutions) for corpora too big to keep as text, read through mmap so nothing is copied or parsed
+#   until a puzzle is asked for.
+#
+#   Layout (little endian):
+#       - a HEADER_SIZE byte header - the magic b"SDKS", the format version, the kind (puzzles or solutions), the record size and the
+#         number of records. The rest of the header is zero, kept for later versions.
+#       - the records, RECORD_SIZE (41) bytes each. A record is the 81 cells at 4 bits a cell (0 for blank), two cells a byte with the
+#         first in the high nibble, so the last byte's low nibble is unused. This is just the puzzle string read as hex.
+#   Every record is the same size, so the index is the record number: record i is at HEADER_SIZE + (i * RECORD_SIZE), and any puzzle,
+#   or range of puzzles, can be read without looking at the rest of the file.
+#
+#   A solutions file has the same layout and a record for each puzzle in its puzzle store, at the same number. A puzzle with no
+#   solution has a blank record. createStore() makes one of the right size up front, so that worker processes can each open it and
+#   write their own range of records in place.
+#
+#   PuzzleStore reads a store (and, opened writable, writes records in place). shardRanges() splits the records into ranges for
+#   workers, and solveStore() solves a puzzle store into a solutions file, spread across a pool of workers if asked, each solving
+#   ranges of --chunk-size records straight from and to the mapped files. convert / export turn the text formats that batchSolver
+#   reads into a store and back again.
+#
+#   Usage:  python puzzleStore.py convert <text file or -> <store>
+#           python puzzleStore.py export <store> [-o text file] [--solutions solutions file]
+#           python puzzleStore.py solve <store> <solutions file> [--workers N] [--chunk-size N] [--engine bitmask|dlx|numpy]
+#                                       [--strategies json file]
+#           python puzzleStore.py info <store>
+#==============================================================================================================================================
+
+#============================================
+# Globals / Constants
+#============================================
+
+MAGIC = b"SDKS"
+VERSION = 1
+KIND_PUZZLES = 0
+KIND_SOLUTIONS = 1
+KINDS = ("puzzles", "solutions")
+CELLS = 9 * 9
+RECORD_SIZE = (CELLS + 1) // 2
+HEADER = struct.Struct("<4sHHIQ")         # magic, version, kind, record size, records
+HEADER_SIZE = 64
+BLANK_RECORD = bytes(RECORD_SIZE)
+BLANK_PUZZLE = "0" * CELLS                # a blank record, decoded
+BLANK_TABLE = str.maketrans("-.", "00")
+WRITE_BATCH = 65536                       # records written at a time by convert
+
+#============================================
+# Records
+#============================================
+
+def encode(puzzleIn):
+    # An 81 character puzzle (blanks '-', '.' or '0') as a RECORD_SIZE byte record
+    return bytes.fromhex(puzzleIn.translate(BLANK_TABLE) + "0")
+
+def decode(recordIn):
+    # A record (bytes or memoryview) back to an 81 character string, '0' for blanks
+    return recordIn.hex()[:CELLS]
+
+def readHeader(bufferIn):
+    # Returns (kind, records). Raises ValueError if it isn't a store this version can read.
+    if len(bufferIn) < HEADER_SIZE:
+        raise ValueError("Not a puzzle store - too short for the header")
+    magic, version, kind, recordSize, records = HEADER.unpack_from(bufferIn)
+    if magic != MAGIC:
+        raise ValueError("Not a puzzle store - bad magic")
+    if version != VERSION or recordSize != RECORD_SIZE or kind >= len(KINDS):
+        raise ValueError(f"Unsupported puzzle store (version {version}, kind {kind}, record size {recordSize})")
+    if len(bufferIn) < HEADER_SIZE + (records * RECORD_SIZE):
+        raise ValueError(f"Puzzle store is truncated - expected {records} records")
+    return kind, records
+
+def packHeader(kindIn, recordsIn):
+    return HEADER.pack(MAGIC, VERSION, kindIn, RECORD_SIZE, recordsIn).ljust(HEADER_SIZE, b"\0")
+
+#============================================
+# Store
+#============================================
+
+class PuzzleStore:
+    def __init__(self, pathIn, writableIn=False):
+        self.file = open(pathIn, "r+b" if writableIn else "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_WRITE if writableIn else mmap.ACCESS_READ)
+        except ValueError:
+            # mmap won't map an empty file
+            self.file.close()
+            raise ValueError(f"Not a puzzle store - {pathIn} is empty")
+        self.view = memoryview(self.map)
+        try:
+            self.kind, self.records = readHeader(self.view)
+        except ValueError:
+            self.close()
+            raise
+
+    def __len__(self):
+        return self.records
+
+    def record(self, indexIn):
+        # The record itself, as a memoryview onto the mapped file. Release it before the store is closed.
+        if not 0 <= indexIn < self.records:
+            raise IndexError(f"Record {indexIn} out of range (0-{self.records - 1})")
+        offset = HEADER_SIZE + (indexIn * RECORD_SIZE)
+        return self.view[offset: offset + RECORD_SIZE]
+
+    def __getitem__(self, indexIn):
+        return decode(self.record(indexIn))
+
+    def __setitem__(self, indexIn, puzzleIn):
+        # puzzleIn is an 81 character string, or None for a blank record (no solution)
+        self.record(indexIn)[:] = BLANK_RECORD if puzzleIn is None else encode(puzzleIn)
+
+    def puzzles(self, startIn=0, stopIn=None):
+        # Yields the puzzles of records startIn up to stopIn
+        stop = self.records if stopIn is None else min(stopIn, self.records)
+        view = self.view
+        offset = HEADER_SIZE + (startIn * RECORD_SIZE)
+        for _ in range(startIn, stop):
+            yield view[offset: offset + RECORD_SIZE].hex()[:CELLS]
+            offset = offset + RECORD_SIZE
+
+    def __iter__(self):
+        return self.puzzles()
+
+    def close(self):
+        # The views have to go before the map can be closed.
+        self.view.release()
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excIn):
+        self.close()
+
+def createStore(pathIn, recordsIn, kindIn=KIND_SOLUTIONS):
+    # Make a store of recordsIn blank records, for filling in place.
+    with open(pathIn, "wb") as f:
+        f.write(packHeader(kindIn, recordsIn))
+        f.truncate(HEADER_SIZE + (recordsIn * RECORD_SIZE))
+
+def writeStore(puzzlesIn, fileOut, kindIn=KIND_PUZZLES):
+    # Write the puzzles (81 character strings, or None for a blank record) to a binary file as a store. The number of records isn't
+    # known until the end, so the header is written last. Returns the number of records.
+    fileOut.write(bytes(HEADER_SIZE))
+    records = 0
+    batch = []
+    for puzzle in puzzlesIn:
+        batch.append(BLANK_RECORD if puzzle is None else encode(puzzle))
+        if len(batch) >= WRITE_BATCH:
+            fileOut.write(b"".join(batch))
+            records = records + len(batch)
+            batch = []
+    fileOut.write(b"".join(batch))
+    records = records + len(batch)
+    fileOut.seek(0)
+    fileOut.write(packHeader(kindIn, records))
+    return records
+
+def shardRanges(recordsIn, sizeIn):
+    # (start, stop) ranges of at most sizeIn records, covering recordsIn records
+    return [(start, min(start + sizeIn, recordsIn)) for start in range(0, recordsIn, sizeIn)]
+
+#============================================
+# Solving
+#============================================
+
+def solveRange(puzzlePathIn, solutionPathIn, startIn, stopIn, engineIn="bitmask"):
+    # Worker process entry point - solve records startIn up to stopIn of the puzzle store into the solutions file. Returns the number
+    # solved.
+    with PuzzleStore(puzzlePathIn) as puzzles, PuzzleStore(solutionPathIn, True) as solutions:
+        chunk = list(puzzles.puzzles(startIn, stopIn))
+        solved = 0
+        for index, solution in enumerate(batchSolver.solveChunk(chunk, engineIn), startIn):
+            solutions[index] = solution
+            if solution is not None:
+                solved = solved + 1
+    return solved
+
+def solveStore(puzzlePathIn, solutionPathIn, workersIn=1, chunkSizeIn=4096, engineIn="bitmask", strategiesIn=None):
+    # Solve every puzzle in the store into a new solutions file. Returns (solved, unsolved).
+    with PuzzleStore(puzzlePathIn) as puzzles:
+        if puzzles.kind != KIND_PUZZLES:
+            raise ValueError(f"{puzzlePathIn} holds {KINDS[puzzles.kind]}, not puzzles")
+        records = len(puzzles)
+    createStore(solutionPathIn, records)
+    jobs = [(puzzlePathIn, solutionPathIn, start, stop, engineIn) for start, stop in shardRanges(records, chunkSizeIn)]
+
+    if workersIn > 1:
+        # Each worker writes its own records, so the ranges can finish in any order.
+        with multiprocessing.Pool(workersIn, batchSolver.initWorker, (strategiesIn,)) as pool:
+            solved = sum(pool.starmap(solveRange, jobs, chunksize=1))
+    else:
+        solved = sum(solveRange(*job) for job in jobs)
+    return solved, records - solved
+
+#============================================
+# Command line
+#============================================
+
+def doConvert(argsIn):
+    fileIn = sys.stdin if argsIn.input == "-" else open(argsIn.input)
+    try:
+        with open(argsIn.store, "wb") as fileOut:
+            records = writeStore(batchSolver.readPuzzles(fileIn), fileOut)
+    finally:
+        if fileIn is not sys.stdin:
+            fileIn.close()
+    print(f"{records} puzzles written to {argsIn.store} ({HEADER_SIZE + (records * RECORD_SIZE)} bytes)", file=sys.stderr)
+
+def doExport(argsIn):
+    # Writes the puzzles as 81 character lines. With --solutions, each puzzle's solution instead (or the puzzle, if it has none), as
+    # batchSolver writes them.
+    fileOut = sys.stdout if argsIn.output == "-" else open(argsIn.output, "w")
+    try:
+        with PuzzleStore(argsIn.store) as puzzles:
+            if argsIn.solutions is None:
+                for puzzle in puzzles:
+                    fileOut.write(puzzle + "\n")
+                return
+            with PuzzleStore(argsIn.solutions) as solutions:
+                if len(solutions) != len(puzzles):
+                    raise ValueError(f"{argsIn.solutions} has {len(solutions)} records, but {argsIn.store} has {len(puzzles)}")
+                for index, puzzle in enumerate(puzzles):
+                    solution = solutions[index]
+                    fileOut.write((puzzle if solution == BLANK_PUZZLE else solution) + "\n")
+    finally:
+        if fileOut is not sys.stdout:
+            fileOut.close()
+
+def doSolve(argsIn):
+    workers = argsIn.workers or os.cpu_count() or 1
+    batchSolver.initWorker(argsIn.strategies)
+    start = time.perf_counter()
+    solved, unsolved = solveStore(argsIn.store, argsIn.solutions, workers, argsIn.chunk_size, argsIn.engine, argsIn.strategies)
+    elapsed = time.perf_counter() - start
+    total = solved + unsolved
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"{total} puzzles ({unsolved} with no solution) in {elapsed:.2f}s - {rate:.1f} puzzles/sec", file=sys.stderr)
+
+def doInfo(argsIn):
+    with PuzzleStore(argsIn.store) as store:
+        print(f"{argsIn.store}: {KINDS[store.kind]}, {len(store)} records of {RECORD_SIZE} bytes, version {VERSION}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert, solve and export binary puzzle stores.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert", help="convert a text puzzle file to a store")
+    convert.add_argument("input", help="puzzle file in either of batchSolver's text formats, or - for stdin")
+    convert.add_argument("store", help="store to write")
+
+    export = commands.add_parser("export", help="write a store out as 81 character lines")
+    export.add_argument("store", help="puzzle store")
+    export.add_argument("-o", "--output", default="-", help="text file, or - for stdout (default)")
+    export.add_argument("--solutions", help="write the solutions from this solutions file instead of the puzzles")
+
+    solve = commands.add_parser("solve", help="solve a store into a solutions file")
+    solve.add_argument("store", help="puzzle store")
+    solve.add_argument("solutions", help="solutions file to write")
+    solve.add_argument("-w", "--workers", type=int, default=1, help="worker processes, 0 for one per CPU (default 1, no pool)")
+    solve.add_argument("--chunk-size", type=int, default=4096, help="records solved by a worker at a time (default 4096)")
+    solve.add_argument("--engine", choices=("bitmask", "dlx", "numpy"), default="bitmask", help="solving engine (default bitmask)")
+    solve.add_argument("--strategies", help="strategy config (JSON) to enable / disable / reorder techniques")
+
+    info = commands.add_parser("info", help="describe a store")
+    info.add_argument("store", help="puzzle or solutions store")
+
+    args = parser.parse_args(argv)
+    if args.command == "solve" and (args.workers < 0 or args.chunk_size < 1):
+        parser.error("--workers must be 0 or more and --chunk-size at least 1")
+
+    try:
+        {"convert": doConvert, "export": doExport, "solve": doSolve, "info": doInfo}[args.command](args)
+    except (ValueError, OSError) as e:
+        print("Aborting....\n", e, file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import bitmaskEngine as bm
+from strategyRegistry import SCOPE_CELLS, SCOPE_BOXES, SCOPE_LINES, SCOPE_DIGITS
+
+#=============================================================================================================================================
+#
+#   Propagation Scheduler
+#   ---------------------
+#
+#   An alternative to looping on updateGrid for the bitmask engine. updateGrid runs every technique over every unit each time round,
+#   however little changed. Here:
+#       - Every elimination marks the units (rows, columns, mini-grids) and digits it touched as dirty (see removeCandidates / solveCell).
+#       - Each technique keeps its own set of units still to look at, and only re-examines those. The fish (X Wing, Swordfish,
+#         Jellyfish) and Simple Colouring work per digit, so they keep a set of digits instead.
+#       - The techniques are grouped into tiers, cheapest first, as set in the strategy registry (bm.STRATEGIES by default). A tier is
+#         only tried once every tier below it has stalled, and any progress drops back to the first tier. So the expensive techniques
+#         (naked triples / quads, X Wing, then the larger fish, wings and colouring) only run when the cheap ones can't get any further.
+#         maxTierIn leaves out the tiers above it, which the backtracking search uses below its first guess.
+#   The counts returned by the techniques (candidates removed, cells solved) are what drive this, so nothing has to rescan the grid to
+#   find out whether anything happened.
+#
+#   Every technique is still applied until none of them can make progress, so a grid the updateGrid loop solves is solved here too,
+#   but the eliminations can be made in a different order.
+#
+#   A cell losing its last candidate is flagged by the engine as it happens (MaskGrid.contradiction), and propagation stops there.
+#   A digit with nowhere left to go in a unit is picked up by hasContradiction() once a tier has made changes.
+#
+#   If the grid carries a SolveTrace (solveTrace.py) each technique run is handed to it, and each tier pass that makes progress is counted
+#   as an iteration. Untraced grids only pay for the check.
+#==============================================================================================================================================
+
+#============================================
+# Functions / Procedures
+#============================================
+
+def unitsOf(unitBitsIn):
+    # 27-bit unit set -> list of unit numbers
+    return (list(bm.MASK_INDEXES[unitBitsIn & 0x1FF]) + [9 + u for u in bm.MASK_INDEXES[(unitBitsIn >> 9) & 0x1FF]] +
+            [18 + u for u in bm.MASK_INDEXES[unitBitsIn >> 18]])
+
+def runTechnique(registryIn, gridIn, strategyIn, unitBitsIn, digitsIn):
+    # Run one technique over the dirty part of the grid. Returns its count of changes.
+    scope = strategyIn.scope
+    if scope == SCOPE_DIGITS:
+        return registryIn.run(strategyIn, gridIn, digitsIn) if digitsIn else 0
+    if not unitBitsIn:
+        return 0
+    if scope == SCOPE_CELLS:
+        return registryIn.run(strategyIn, gridIn)
+    if scope == SCOPE_BOXES:
+        return registryIn.run(strategyIn, gridIn, bm.MASK_INDEXES[unitBitsIn >> 18])
+    if scope == SCOPE_LINES:
+        return registryIn.run(strategyIn, gridIn, unitsOf(unitBitsIn & ((1 << 18) - 1)))
+    return registryIn.run(strategyIn, gridIn, unitsOf(unitBitsIn))
+
+def propagate(gridIn, registryIn=None, maxTierIn=None):
+    # Apply the techniques until none of them can make progress. Returns False if the grid is left in a contradiction. With maxTierIn,
+    # only the techniques in tiers up to it are used.
+    if registryIn is None:
+        registryIn = bm.STRATEGIES
+    if gridIn.contradiction:
+        return False
+    trace = gridIn.trace
+    if trace is not None:
+        # Anything changed since the trace last looked was a guess made by the search.
+        trace.guessed(gridIn)
+    tiers = registryIn.tiers()
+    if maxTierIn is not None:
+        tiers = tuple(tier for tier in tiers if tier[0].tier <= maxTierIn)
+    techniques = [t for tier in tiers for t in tier]
+    pendingUnits = [gridIn.dirtyUnits] * len(techniques)
+    pendingDigits = [gridIn.dirtyDigits] * len(techniques)
+    gridIn.dirtyUnits = 0
+    gridIn.dirtyDigits = 0
+
+    tier = 0
+    first = 0
+    while tier < len(tiers):
+        changed = 0
+        for i in range(first, first + len(tiers[tier])):
+            units = pendingUnits[i]
+            digits = pendingDigits[i]
+            pendingUnits[i] = 0
+            pendingDigits[i] = 0
+            if trace is None:
+                changed += runTechnique(registryIn, gridIn, techniques[i], units, digits)
+            else:
+                changed += trace.runTechnique(registryIn, gridIn, techniques[i], units, digits)
+            if gridIn.contradiction:
+                # A cell has run out of candidates, so there's no point going on.
+                return False
+
+            # Hand whatever this changed on to every technique (including this one, as its own removals can set up more).
+            if gridIn.dirtyUnits or gridIn.dirtyDigits:
+                units = gridIn.dirtyUnits
+                digits = gridIn.dirtyDigits
+                gridIn.dirtyUnits = 0
+                gridIn.dirtyDigits = 0
+                for j in range(len(techniques)):
+                    pendingUnits[j] |= units
+                    pendingDigits[j] |= digits
+
+        if changed:
+            if trace is not None:
+                trace.iterations += 1
+            if bm.hasContradiction(gridIn):
+                return False
+            if bm.numOutstandingCells(gridIn) == 0:
+                return True
+            tier = 0
+            first = 0
+        else:
+            first = first + len(tiers[tier])
+            tier = tier + 1
+    return not bm.hasContradiction(gridIn)
@@ -0,0 +1,101 @@
+import sqlite3
+from collections import OrderedDict
+import canonicalForm
+
+#=============================================================================================================================================
+#
+#   Solution Cache
+#   --------------
+#
+#   Remembers solutions by the canonical form of the puzzle (see canonicalForm.py), so a repeat of a puzzle, or of any puzzle equivalent
+#   to it under the suduko symmetries, isn't solved again. Solutions are held in the canonical frame and carried back to the puzzle's
+#   frame on a hit. Puzzles with no solution are remembered too.
+#
+#   The in-memory tier is a least recently used cache of up to maxSizeIn entries. If a file is given, every solution is also written to a
+#   sqlite database there, which is checked on a memory miss (and so carries across runs). The database is never evicted from.
+#
+#   Counters:   hits        - found in memory or on disk
+#               diskHits    - of the hits, those found on disk
+#               misses      - not found, so solved
+#               evictions   - entries dropped from memory to make room
+#               uncacheable - puzzles with too many symmetries to canonicalise, which are just solved
+#==============================================================================================================================================
+
+NO_SOLUTION = ""
+COMMIT_EVERY = 1000
+
+class SolutionCache:
+    def __init__(self, maxSizeIn=10000, pathIn=None):
+        self.maxSize = maxSizeIn
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.diskHits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.uncacheable = 0
+
+        self.db = None
+        self.uncommitted = 0
+        if pathIn is not None:
+            self.db = sqlite3.connect(pathIn)
+            self.db.execute("CREATE TABLE IF NOT EXISTS solutions (puzzle TEXT PRIMARY KEY, solution TEXT NOT NULL)")
+
+    def get(self, keyIn):
+        # Returns the cached canonical solution (NO_SOLUTION if there isn't one), or None if the key isn't cached.
+        solution = self.entries.get(keyIn)
+        if solution is not None:
+            self.entries.move_to_end(keyIn)
+            self.hits += 1
+            return solution
+        if self.db is not None:
+            row = self.db.execute("SELECT solution FROM solutions WHERE puzzle = ?", (keyIn,)).fetchone()
+            if row is not None:
+                self.hits += 1
+                self.diskHits += 1
+                self.remember(keyIn, row[0])
+                return row[0]
+        self.misses += 1
+        return None
+
+    def put(self, keyIn, solutionIn):
+        self.remember(keyIn, solutionIn)
+        if self.db is not None:
+            self.db.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?)", (keyIn, solutionIn))
+            self.uncommitted += 1
+            if self.uncommitted >= COMMIT_EVERY:
+                self.db.commit()
+                self.uncommitted = 0
+
+    def remember(self, keyIn, solutionIn):
+        # Add to the in-memory tier, dropping the least recently used entry if it's full.
+        self.entries[keyIn] = solutionIn
+        self.entries.move_to_end(keyIn)
+        if len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def solve(self, puzzleIn, solverIn):
+        # Returns the solution to the puzzle (81 character string, or None if it has none), calling solverIn(puzzle) on a miss.
+        canonical = canonicalForm.canonicalize(puzzleIn)
+        if canonical is None:
+            self.uncacheable += 1
+            return solverIn(puzzleIn)
+        key, cellMap, labels = canonical
+
+        cached = self.get(key)
+        if cached is not None:
+            return None if cached == NO_SOLUTION else canonicalForm.fromCanonical(cached, cellMap, labels)
+
+        solution = solverIn(puzzleIn)
+        self.put(key, NO_SOLUTION if solution is None else canonicalForm.toCanonical(solution, cellMap, labels))
+        return solution
+
+    def stats(self):
+        return {"hits": self.hits, "diskHits": self.diskHits, "misses": self.misses, "evictions": self.evictions,
+                "uncacheable": self.uncacheable, "size": len(self.entries)}
+
+    def close(self):
+        if self.db is not None:
+            self.db.commit()
+            self.db.close()
+            self.db = None
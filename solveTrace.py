@@ -0,0 +1,355 @@
+import argparse
+import json
+import os
+import sys
+from time import perf_counter
+import bitmaskEngine as bm
+import backtrackSearch
+import dancingLinks
+import scheduler
+
+#=============================================================================================================================================
+#
+#   Solve Tracing
+#   -------------
+#
+#   Records what happens during a solve on the bitmask engine, so slow puzzles can be looked at afterwards rather than guessed at.
+#
+#   A SolveTrace is given to bm.createGrid() and stays on the grid (MaskGrid.trace) for the rest of the solve. It keeps:
+#       - Counters - iterations (tier passes of the scheduler that made progress), search nodes and backtracks, and for each technique
+#         its calls, hits (calls that changed something), changes and time, and the time spent in each phase of the solve:
+#           - setup     - createGrid(), i.e. the givens and the naked singles they leave
+#           - propagate - the techniques, before any search
+#           - search    - the backtracking search (or dlx - Dancing Links) if the techniques stall
+#       - Events (only with eventsIn) - every placement and elimination, in order, tagged with what made it: a technique, "given", "guess"
+#         (the search trying a candidate, and what that leaves) or "dlx" (the cells Dancing Links filled in). Each has the search depth
+#         it was made at, and a "backtrack" event records each guess being backed out of.
+#   The events are read off the grid's trail (see bm.checkpoint()) after each technique run, rather than being recorded as they happen,
+#   so the engine's hot loops are the same whether tracing or not. An untraced grid costs a check per technique run and per rollback.
+#
+#   Exporters:
+#       - writeJsonLines() - a "solve" line per puzzle with its counters, followed by its events, if any
+#       - TraceTotals      - adds up the counters over many solves, and writes them in the Prometheus text format (for the node exporter
+#                            textfile collector, or to compare runs). Solve times go into a histogram.
+#   batchSolver.py --trace / --trace-events / --metrics uses these, and tracePuzzle() traces a single puzzle.
+#
+#   Run as a program, a JSON lines trace is read back and the slowest solves and the time per technique are reported, and --metrics
+#   writes the totals out in the Prometheus text format.
+#
+#   Usage:  python solveTrace.py <trace file> [--top N] [--metrics prometheus file]
+#==============================================================================================================================================
+
+#============================================
+# Globals / Constants
+#============================================
+
+BLANKS = "-.0"
+PHASES = ("setup", "propagate", "search", "dlx")
+SOLVE_SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+METRIC_PREFIX = "suduko_"
+
+#============================================
+# Trace
+#============================================
+
+class SolveTrace:
+    def __init__(self, eventsIn=False):
+        self.recordEvents = eventsIn
+        self.puzzle = None
+        self.solution = None
+        self.seconds = 0.0
+        self.iterations = 0
+        self.nodes = 0
+        self.backtracks = 0
+        self.phases = {}
+        self.techniques = {}          # name -> [calls, hits, changes, seconds]
+
+        # Events are (kind, cell, digit, by, depth) tuples. recorded is how much of the trail has been turned into events so far, and
+        # guessMarks the trail length before each guess still being followed (so the depth is its length).
+        self.events = []
+        self.recorded = 0
+        self.guessMarks = []
+
+    def attach(self, gridIn):
+        gridIn.trace = self
+        if self.recordEvents:
+            bm.checkpoint(gridIn)
+            self.recorded = len(gridIn.trail)
+
+    def record(self, gridIn, byIn):
+        # Turn the changes on the trail since the last call into events, tagged byIn.
+        if not self.recordEvents:
+            return
+        trail = gridIn.trail
+        values = gridIn.values
+        events = self.events
+        depth = len(self.guessMarks)
+        for i in range(self.recorded, len(trail), 2):
+            cell = trail[i]
+            removed = trail[i + 1]
+            if not removed:
+                events.append(("place", cell, values[cell], byIn, depth))
+                continue
+            for d in bm.MASK_DIGITS[removed]:
+                # Solving a cell empties its candidates, which isn't an elimination.
+                if d != values[cell]:
+                    events.append(("eliminate", cell, d, byIn, depth))
+        self.recorded = len(trail)
+
+    def guessed(self, gridIn):
+        # Called as propagation starts. Anything on the trail not yet recorded is the guess the search has just made.
+        if self.recordEvents and len(gridIn.trail) > self.recorded:
+            self.guessMarks.append(self.recorded)
+            self.record(gridIn, "guess")
+
+    def rollback(self, gridIn, markIn):
+        # Called by bm.rollback() before it undoes anything. The first change after the mark is the guess, still in place.
+        if not self.recordEvents:
+            return
+        self.guessed(gridIn)
+        if len(gridIn.trail) > markIn:
+            cell = gridIn.trail[markIn]
+            self.events.append(("backtrack", cell, gridIn.values[cell], "search", len(self.guessMarks)))
+        while self.guessMarks and self.guessMarks[-1] >= markIn:
+            self.guessMarks.pop()
+        self.recorded = markIn
+
+    def runTechnique(self, registryIn, gridIn, strategyIn, unitBitsIn, digitsIn):
+        # scheduler.runTechnique(), counted. The registry times the call, so its time is taken from there rather than timed again.
+        calls = strategyIn.calls
+        seconds = strategyIn.seconds
+        count = scheduler.runTechnique(registryIn, gridIn, strategyIn, unitBitsIn, digitsIn)
+        if strategyIn.calls != calls:
+            counters = self.techniques.get(strategyIn.name)
+            if counters is None:
+                counters = self.techniques[strategyIn.name] = [0, 0, 0, 0.0]
+            counters[0] += 1
+            counters[1] += count > 0
+            counters[2] += count
+            counters[3] += strategyIn.seconds - seconds
+            self.record(gridIn, strategyIn.name)
+        return count
+
+    def phase(self, nameIn, startIn):
+        # Add the time since startIn to a phase. Returns the time now, to start the next phase from.
+        now = perf_counter()
+        self.phases[nameIn] = self.phases.get(nameIn, 0.0) + (now - startIn)
+        return now
+
+    def summary(self):
+        return {"puzzle": self.puzzle,
+                "solution": self.solution,
+                "solved": self.solution is not None,
+                "seconds": self.seconds,
+                "iterations": self.iterations,
+                "nodes": self.nodes,
+                "backtracks": self.backtracks,
+                "phases": self.phases,
+                "techniques": {name: {"calls": c[0], "hits": c[1], "changes": c[2], "seconds": c[3]} for name, c in self.techniques.items()},
+                "events": len(self.events)}
+
+#============================================
+# Tracing solves
+#============================================
+
+def tracePuzzle(puzzleIn, backendIn="search", eventsIn=False):
+    # Solve an 81 character puzzle as batchSolver.solvePuzzle() does, tracing it. Returns the SolveTrace, with the solution (None if
+    # the puzzle has no solution) in its solution.
+    trace = SolveTrace(eventsIn)
+    trace.puzzle = puzzleIn
+    start = perf_counter()
+    grid = bm.createGrid([(i, int(c)) for i, c in enumerate(puzzleIn) if c not in BLANKS], trace)
+    now = trace.phase("setup", start)
+
+    # The techniques are run here before the search (or Dancing Links) so their time can be told apart. The search starts with them
+    # too, but finds nothing left to do.
+    values = None
+    if scheduler.propagate(grid):
+        now = trace.phase("propagate", now)
+        values = grid.values
+        if bm.numOutstandingCells(grid):
+            stats = backtrackSearch.newStats()
+            if backendIn == "dlx":
+                values = dancingLinks.solveMaskGrid(grid, stats)
+                if values is not None and eventsIn:
+                    trace.events.extend(("place", cell, values[cell], "dlx", 0) for cell in range(bm.CELLS) if not grid.values[cell])
+                trace.phase("dlx", now)
+            else:
+                if not backtrackSearch.search(grid, stats):
+                    values = None
+                trace.phase("search", now)
+            trace.nodes = stats["nodes"]
+            trace.backtracks = stats["backtracks"]
+    else:
+        trace.phase("propagate", now)
+
+    trace.seconds = perf_counter() - start
+    trace.solution = None if values is None else "".join(map(str, values))
+    grid.trace = None
+    return trace
+
+def traceStream(puzzlesIn, engineIn="bitmask", traceFileIn=None, eventsIn=False, minSecondsIn=0.0, totalsIn=None):
+    # As batchSolver.solveStream(), tracing each puzzle. Solves taking at least minSecondsIn are written to traceFileIn (JSON lines) and
+    # every solve is added to totalsIn (a TraceTotals), if given. Yields (puzzle, solution).
+    backend = "dlx" if engineIn == "dlx" else "search"
+    for number, puzzle in enumerate(puzzlesIn):
+        trace = tracePuzzle(puzzle, backend, eventsIn)
+        if totalsIn is not None:
+            totalsIn.add(trace.summary())
+        if traceFileIn is not None and trace.seconds >= minSecondsIn:
+            writeJsonLines(trace, traceFileIn, number)
+        yield puzzle, trace.solution
+
+#============================================
+# Exporters
+#============================================
+
+def writeJsonLines(traceIn, fileOut, numberIn=0):
+    # A "solve" line with the counters, then a line per event. numberIn (the puzzle's position in its input) is on every line, so the
+    # events of a solve can be picked out.
+    fileOut.write(json.dumps(dict({"type": "solve", "number": numberIn}, **traceIn.summary())) + "\n")
+    for kind, cell, digit, by, depth in traceIn.events:
+        fileOut.write(json.dumps({"type": kind, "number": numberIn, "cell": cell, "digit": digit, "by": by, "depth": depth}) + "\n")
+
+def readJsonLines(fileIn):
+    # Yields the "solve" lines of a trace written by writeJsonLines(), as dicts. Event lines are skipped.
+    for lineNo, line in enumerate(fileIn, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Line {lineNo}: not JSON - {e}")
+        if record.get("type") == "solve":
+            yield record
+
+class TraceTotals:
+    # The counters of many solves added up, from summary() dicts (or the "solve" lines of a trace file).
+    def __init__(self):
+        self.solved = 0
+        self.unsolved = 0
+        self.seconds = 0.0
+        self.iterations = 0
+        self.nodes = 0
+        self.backtracks = 0
+        self.events = 0
+        self.phases = {}
+        self.techniques = {}          # name -> [calls, hits, changes, seconds]
+        self.buckets = [0] * len(SOLVE_SECONDS_BUCKETS)
+
+    def add(self, summaryIn):
+        if summaryIn["solved"]:
+            self.solved += 1
+        else:
+            self.unsolved += 1
+        self.seconds += summaryIn["seconds"]
+        self.iterations += summaryIn["iterations"]
+        self.nodes += summaryIn["nodes"]
+        self.backtracks += summaryIn["backtracks"]
+        self.events += summaryIn["events"]
+        for name, seconds in summaryIn["phases"].items():
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+        for name, t in summaryIn["techniques"].items():
+            counters = self.techniques.get(name)
+            if counters is None:
+                counters = self.techniques[name] = [0, 0, 0, 0.0]
+            counters[0] += t["calls"]
+            counters[1] += t["hits"]
+            counters[2] += t["changes"]
+            counters[3] += t["seconds"]
+        for i, bound in enumerate(SOLVE_SECONDS_BUCKETS):
+            if summaryIn["seconds"] <= bound:
+                self.buckets[i] += 1
+
+    def prometheusText(self):
+        lines = []
+
+        def metric(nameIn, typeIn, helpIn, samplesIn):
+            # samplesIn is a list of (labels, value). Labels are written as given, e.g. '{technique="xWing"}'.
+            lines.append(f"# HELP {METRIC_PREFIX}{nameIn} {helpIn}")
+            lines.append(f"# TYPE {METRIC_PREFIX}{nameIn} {typeIn}")
+            for labels, value in samplesIn:
+                lines.append(f"{METRIC_PREFIX}{nameIn}{labels} {value!r}")
+
+        def sample(nameIn, labelIn, valuesIn):
+            return [(f'{{{labelIn}="{name}"}}', value) for name, value in sorted(valuesIn.items())]
+
+        total = self.solved + self.unsolved
+        metric("solves_total", "counter", "Puzzles solved or found to have no solution.",
+               [('{result="solved"}', self.solved), ('{result="unsolved"}', self.unsolved)])
+        metric("iterations_total", "counter", "Scheduler tier passes that made progress.", [("", self.iterations)])
+        metric("search_nodes_total", "counter", "Search nodes visited.", [("", self.nodes)])
+        metric("search_backtracks_total", "counter", "Guesses backed out of.", [("", self.backtracks)])
+        metric("trace_events_total", "counter", "Placement, elimination and backtrack events recorded.", [("", self.events)])
+        metric("phase_seconds_total", "counter", "Time spent in each phase of the solve.", sample("phase", "phase", self.phases))
+        for i, (name, helpText) in enumerate((("calls", "Technique runs."),
+                                              ("hits", "Technique runs that changed something."),
+                                              ("changes", "Eliminations (cells solved for naked singles) made by each technique."),
+                                              ("seconds", "Time spent in each technique."))):
+            metric(f"technique_{name}_total", "counter", helpText,
+                   sample("technique", "technique", {t: c[i] for t, c in self.techniques.items()}))
+
+        buckets = [(f'{{le="{bound!r}"}}', count) for bound, count in zip(SOLVE_SECONDS_BUCKETS, self.buckets)]
+        metric("solve_seconds", "histogram", "Time to solve each puzzle.",
+               [(f"_bucket{labels}", count) for labels, count in buckets + [('{le="+Inf"}', total)]] +
+               [("_sum", self.seconds), ("_count", total)])
+        return "\n".join(lines) + "\n"
+
+    def writePrometheus(self, pathIn):
+        # Written to a temporary file and renamed over the old one, so a collector never reads a half written file.
+        temporary = pathIn + ".tmp"
+        with open(temporary, "w") as f:
+            f.write(self.prometheusText())
+        os.replace(temporary, pathIn)
+
+#============================================
+# Main Program
+#============================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report on a JSON lines solve trace (batchSolver.py --trace).")
+    parser.add_argument("trace", help="trace file, or - for stdin")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest solves to list (default 10)")
+    parser.add_argument("--metrics", help="write the totals to this file in the Prometheus text format")
+    args = parser.parse_args(argv)
+    if args.top < 0:
+        parser.error("--top must be 0 or more")
+
+    totals = TraceTotals()
+    slowest = []
+    fileIn = sys.stdin if args.trace == "-" else None
+    try:
+        if fileIn is None:
+            fileIn = open(args.trace)
+        for record in readJsonLines(fileIn):
+            totals.add(record)
+            slowest.append((record["seconds"], record["number"], record["puzzle"], record["nodes"]))
+            if len(slowest) > args.top * 4:
+                slowest = sorted(slowest, reverse=True)[:args.top]
+        if args.metrics:
+            totals.writePrometheus(args.metrics)
+    except (ValueError, KeyError, OSError) as e:
+        print("Aborting....\n", e, file=sys.stderr)
+        return 1
+    finally:
+        if fileIn is not None and fileIn is not sys.stdin:
+            fileIn.close()
+
+    total = totals.solved + totals.unsolved
+    print(f"{total} solves ({totals.unsolved} with no solution) - {totals.seconds * 1000:.1f}ms, {totals.iterations} iterations, "
+          f"{totals.nodes} search nodes, {totals.backtracks} backtracks")
+    if args.top:
+        print(f"\n{'Number':>8} {'Time ms':>10} {'Nodes':>8}  Puzzle")
+        for seconds, number, puzzle, nodes in sorted(slowest, reverse=True)[:args.top]:
+            print(f"{number:>8} {seconds * 1000:>10.2f} {nodes:>8}  {puzzle}")
+    print(f"\n{'Phase':<20} {'Time ms':>10}")
+    for name in PHASES:
+        if name in totals.phases:
+            print(f"{name:<20} {totals.phases[name] * 1000:>10.1f}")
+    print(f"\n{'Technique':<20} {'Calls':>8} {'Hits':>8} {'Changes':>8} {'Time ms':>10}")
+    for name, (calls, hits, changes, seconds) in sorted(totals.techniques.items(), key=lambda t: -t[1][3]):
+        print(f"{name:<20} {calls:>8} {hits:>8} {changes:>8} {seconds * 1000:>10.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import batchSolver
+import sudukoSolver
+
+#=============================================================================================================================================
+#
+#   Solver Service
+#   --------------
+#
+#   Serves the solver over HTTP / JSON on a local socket, using asyncio and the standard library only.
+#
+#   Requests:
+#       POST /solve   {"puzzle": "<81 characters>"}  ->  200 {"puzzle": ..., "solution": "<81 characters>" or null, "solved": true/false}
+#       GET  /stats                                  ->  200 the service counters (requests, batches, rejected, timed out, queued, ...)
+#   Errors are returned as {"error": "..."} with status 400 (bad request), 404, 405, 413 (body too large), 500 (the solver failed), 503
+#   (busy - try again, see Retry-After) or 504 (the puzzle wasn't solved within --timeout seconds). Connections are kept alive unless the
+#   client says otherwise.
+#
+#   The event loop never solves anything itself:
+#       - Each puzzle is put on a bounded queue with a future for its result.
+#       - A batcher task takes whatever is queued (up to --batch-size puzzles), waiting --batch-wait-ms for more if the batch isn't full,
+#         and sends the batch to a process pool (batchSolver.solveChunk - createGrid, the techniques, then the search).
+#       - Only two batches per worker are in flight at once. Beyond that the queue fills up, and once it is full new puzzles are turned
+#         away with 503 straight away rather than queueing without limit (backpressure).
+#       - Each request waits at most --timeout seconds. A puzzle whose request has timed out is dropped if it hasn't been sent yet.
+#       - On shutdown the batcher stops and the batches already in flight are waited for before the pool is shut down.
+#
+#   benchmarks/loadGenerator.py drives the service and reports latency percentiles and the highest rate it sustains.
+#
+#   Usage:  python solverService.py [--host 127.0.0.1] [--port 8081] [--workers N] [--engine bitmask|dlx] [--batch-size N]
+#                                   [--batch-wait-ms N] [--queue-size N] [--timeout seconds] [--strategies json file]
+#==============================================================================================================================================
+
+#============================================
+# Globals / Constants
+#============================================
+
+MAX_BODY = 64 * 1024
+MAX_HEADERS = 100
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+class HttpError(Exception):
+    def __init__(self, statusIn, messageIn):
+        super().__init__(messageIn)
+        self.status = statusIn
+
+#============================================
+# Batching
+#============================================
+
+class BatchingSolver:
+    def __init__(self, poolIn, workersIn, engineIn="bitmask", batchSizeIn=32, batchWaitIn=0.002, queueSizeIn=1024):
+        self.pool = poolIn
+        self.engine = engineIn
+        self.batchSize = batchSizeIn
+        self.batchWait = batchWaitIn
+        self.queue = asyncio.Queue(queueSizeIn)
+        self.slots = asyncio.Semaphore(workersIn * 2)
+        self.inFlight = set()
+        self.stats = {"requests": 0, "solved": 0, "noSolution": 0, "rejected": 0, "timedOut": 0, "batches": 0, "batchedPuzzles": 0}
+
+    def submit(self, puzzleIn):
+        # Returns a future for the puzzle's solution. Raises asyncio.QueueFull if too much is queued already.
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((puzzleIn, future))
+        return future
+
+    def takeQueued(self, batchIn):
+        while len(batchIn) < self.batchSize and not self.queue.empty():
+            batchIn.append(self.queue.get_nowait())
+
+    async def run(self):
+        # The batcher task - runs until cancelled.
+        while True:
+            batch = [await self.queue.get()]
+            self.takeQueued(batch)
+            if len(batch) < self.batchSize and self.batchWait > 0:
+                await asyncio.sleep(self.batchWait)
+                self.takeQueued(batch)
+
+            # Requests that have timed out (so their futures are cancelled) don't need solving.
+            batch = [(puzzle, future) for puzzle, future in batch if not future.done()]
+            if not batch:
+                continue
+            await self.slots.acquire()
+            # Keep a reference to each batch task until it is done, or it can be garbage collected part way through.
+            task = asyncio.create_task(self.solveBatch(batch))
+            self.inFlight.add(task)
+            task.add_done_callback(self.inFlight.discard)
+
+    async def drain(self):
+        # Waits for the batches already sent to the pool, so their requests are answered before shutting down.
+        await asyncio.gather(*self.inFlight, return_exceptions=True)
+
+    async def solveBatch(self, batchIn):
+        try:
+            puzzles = [puzzle for puzzle, _ in batchIn]
+            solutions = await asyncio.get_running_loop().run_in_executor(self.pool, batchSolver.solveChunk, puzzles, self.engine)
+        except Exception as e:
+            for _, future in batchIn:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.slots.release()
+
+        self.stats["batches"] += 1
+        self.stats["batchedPuzzles"] += len(batchIn)
+        for (_, future), solution in zip(batchIn, solutions):
+            if not future.done():
+                future.set_result(solution)
+
+    async def solve(self, puzzleIn, timeoutIn):
+        # Returns the solution (None if there isn't one). Raises HttpError if the service is too busy or the solve takes too long.
+        self.stats["requests"] += 1
+        try:
+            future = self.submit(puzzleIn)
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise HttpError(503, "Too many puzzles queued - try again later")
+        try:
+            solution = await asyncio.wait_for(future, timeoutIn)
+        except asyncio.TimeoutError:
+            self.stats["timedOut"] += 1
+            raise HttpError(504, f"Not solved within {timeoutIn}s")
+        except Exception as e:
+            # e.g. a worker process died
+            raise HttpError(500, f"Solver failed - {e!r}")
+        self.stats["solved" if solution is not None else "noSolution"] += 1
+        return solution
+
+#============================================
+# HTTP
+#============================================
+
+async def readRequest(readerIn):
+    # Returns (method, path, headers, body), or None if the client has closed the connection.
+    line = await readerIn.readline()
+    if not line:
+        return None
+    try:
+        method, path, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "Bad request line")
+
+    headers = {}
+    while True:
+        line = await readerIn.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HttpError(400, "Too many headers")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(400, "Bad Content-Length")
+    if length < 0 or length > MAX_BODY:
+        raise HttpError(413, f"Body must be at most {MAX_BODY} bytes")
+    body = await readerIn.readexactly(length) if length else b""
+    return method, path, headers, body
+
+def writeResponse(writerIn, statusIn, payloadIn, keepAliveIn, extraHeadersIn=""):
+    body = json.dumps(payloadIn).encode()
+    head = (f"HTTP/1.1 {statusIn} {REASONS[statusIn]}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keepAliveIn else 'close'}\r\n{extraHeadersIn}\r\n")
+    writerIn.write(head.encode("latin-1") + body)
+
+class SolverService:
+    def __init__(self, solverIn, timeoutIn=5.0):
+        self.solver = solverIn
+        self.timeout = timeoutIn
+
+    async def route(self, methodIn, pathIn, bodyIn):
+        # Returns (status, payload)
+        if pathIn == "/solve":
+            if methodIn != "POST":
+                raise HttpError(405, "Use POST")
+            try:
+                puzzle = sudukoSolver.puzzleString(json.loads(bodyIn)["puzzle"])
+            except (ValueError, KeyError, TypeError) as e:
+                raise HttpError(400, f"Expected {{\"puzzle\": \"<81 characters>\"}} - {e}")
+            solution = await self.solver.solve(puzzle, self.timeout)
+            return 200, {"puzzle": puzzle, "solution": solution, "solved": solution is not None}
+        if pathIn == "/stats":
+            if methodIn != "GET":
+                raise HttpError(405, "Use GET")
+            return 200, dict(self.solver.stats, queued=self.solver.queue.qsize())
+        raise HttpError(404, f"No such path {pathIn}")
+
+    async def handleConnection(self, readerIn, writerIn):
+        try:
+            while True:
+                keepAlive = True
+                try:
+                    request = await readRequest(readerIn)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    keepAlive = headers.get("connection", "").lower() != "close"
+                    status, payload = await self.route(method, path, body)
+                    writeResponse(writerIn, status, payload, keepAlive)
+                except HttpError as e:
+                    # A malformed request leaves the stream in an unknown state, so close after it. Others can carry on, unless the
+                    # client has asked to close.
+                    keepAlive = keepAlive and e.status in (404, 405, 500, 503, 504)
+                    retry = "Retry-After: 1\r\n" if e.status == 503 else ""
+                    writeResponse(writerIn, e.status, {"error": str(e)}, keepAlive, retry)
+                await writerIn.drain()
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writerIn.close()
+
+async def serve(argsIn, poolIn, workersIn):
+    solver = BatchingSolver(poolIn, workersIn, argsIn.engine, argsIn.batch_size, argsIn.batch_wait_ms / 1000, argsIn.queue_size)
+    service = SolverService(solver, argsIn.timeout)
+    batcher = asyncio.create_task(solver.run())
+    server = await asyncio.start_server(service.handleConnection, argsIn.host, argsIn.port)
+    print(f"Listening on http://{argsIn.host}:{server.sockets[0].getsockname()[1]} ({workersIn} workers)", file=sys.stderr, flush=True)
+
+    # Stop cleanly on SIGTERM as well as Ctrl-C, so the worker processes are shut down too.
+    stop = asyncio.Event()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    except NotImplementedError:
+        pass
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        batcher.cancel()
+        await solver.drain()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the suduko solver over HTTP / JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8081, help="port to listen on, 0 for any free port (default 8081)")
+    parser.add_argument("-w", "--workers", type=int, default=0, help="solver processes, 0 for one per CPU (default 0)")
+    parser.add_argument("--engine", choices=sudukoSolver.ENGINES, default="bitmask", help="solving engine (default bitmask)")
+    parser.add_argument("--batch-size", type=int, default=32, help="most puzzles sent to a worker at once (default 32)")
+    parser.add_argument("--batch-wait-ms", type=float, default=2.0, help="time to wait for a batch to fill (default 2ms)")
+    parser.add_argument("--queue-size", type=int, default=1024, help="puzzles queued before turning requests away (default 1024)")
+    parser.add_argument("--timeout", type=float, default=5.0, help="seconds a request waits for its solution (default 5)")
+    parser.add_argument("--strategies", help="strategy config (JSON) to enable / disable / reorder techniques")
+    args = parser.parse_args(argv)
+    if args.workers < 0 or args.batch_size < 1 or args.batch_wait_ms < 0 or args.queue_size < 1 or args.timeout <= 0:
+        parser.error("--workers must be 0 or more, --batch-size and --queue-size at least 1, --batch-wait-ms 0 or more and --timeout "
+                     "more than 0")
+    workers = args.workers or os.cpu_count() or 1
+
+    try:
+        # Load the strategy config here too, so a bad one is reported before any worker starts.
+        batchSolver.initWorker(args.strategies)
+        with ProcessPoolExecutor(workers, initializer=batchSolver.initWorker, initargs=(args.strategies,)) as pool:
+            asyncio.run(serve(args, pool, workers))
+    except (ValueError, OSError) as e:
+        print("Aborting....\n", e, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import json
+from time import perf_counter
+
+#=============================================================================================================================================
+#
+#   Strategy Registry
+#   -----------------
+#
+#   Holds the techniques an engine applies, in order, so they can be switched on and off, reordered and re-tiered without touching the
+#   code. Each engine has its own registry (STRATEGIES in sudukoSolver.py and bitmaskEngine.py) and registers its do* functions in it.
+#
+#   Each technique has:
+#       - name    - used in config files and reports
+#       - tier    - its cost, 0 being cheapest. The scheduler (scheduler.py) only tries a tier once the tiers below it have stalled.
+#       - scope   - how the scheduler tells it which part of the grid to look at (see SCOPE_* below)
+#       - enabled - disabled techniques are skipped
+#   Every call is timed, and the calls, time and count of changes (eliminations; cells solved for naked singles) are added up per
+#   technique. report() / formatReport() give these along with eliminations per millisecond.
+#
+#   A config (dict, or JSON file) can contain any of:
+#       "order"   - list of names. These run first in this order, and the rest after them in their existing order.
+#       "disable" - list of names to switch off
+#       "enable"  - list of names to switch on
+#       "tiers"   - {name: tier}
+#==============================================================================================================================================
+
+#============================================
+# Globals / Constants
+#============================================
+
+# How the scheduler tells a technique which part of the grid to look at.
+SCOPE_CELLS = 0     # looks at the whole grid (cheap enough not to narrow down)
+SCOPE_UNITS = 1     # list of units 0-26
+SCOPE_BOXES = 2     # list of mini-grids 0-8
+SCOPE_LINES = 3     # list of rows / columns, as units 0-17
+SCOPE_DIGITS = 4    # 9-bit digit mask
+
+#============================================
+# Registry
+#============================================
+
+class Strategy:
+    __slots__ = ("name", "function", "tier", "scope", "enabled", "calls", "seconds", "eliminations")
+
+    def __init__(self, nameIn, functionIn, tierIn, scopeIn, enabledIn):
+        self.name = nameIn
+        self.function = functionIn
+        self.tier = tierIn
+        self.scope = scopeIn
+        self.enabled = enabledIn
+        self.calls = 0
+        self.seconds = 0.0
+        self.eliminations = 0
+
+class Registry:
+    def __init__(self):
+        self.strategies = []
+        self.tierCache = None
+
+    def register(self, nameIn, functionIn, tierIn=0, scopeIn=SCOPE_UNITS, enabledIn=True):
+        if self.find(nameIn) is not None:
+            raise ValueError(f"Technique {nameIn!r} is already registered")
+        self.strategies.append(Strategy(nameIn, functionIn, tierIn, scopeIn, enabledIn))
+        self.tierCache = None
+        return functionIn
+
+    def find(self, nameIn):
+        return next((s for s in self.strategies if s.name == nameIn), None)
+
+    def get(self, nameIn):
+        strategy = self.find(nameIn)
+        if strategy is None:
+            raise ValueError(f"Unknown technique {nameIn!r}")
+        return strategy
+
+    def names(self):
+        return [s.name for s in self.strategies]
+
+    def active(self):
+        return [s for s in self.strategies if s.enabled]
+
+    def tiers(self):
+        # The enabled techniques grouped by tier, cheapest first, keeping their order within a tier.
+        if self.tierCache is None:
+            active = self.active()
+            self.tierCache = tuple(tuple(s for s in active if s.tier == t) for t in sorted(set(s.tier for s in active)))
+        return self.tierCache
+
+    #============================================
+    # Configuration
+    #============================================
+
+    def setEnabled(self, nameIn, enabledIn):
+        self.get(nameIn).enabled = enabledIn
+        self.tierCache = None
+
+    def setTier(self, nameIn, tierIn):
+        self.get(nameIn).tier = tierIn
+        self.tierCache = None
+
+    def setOrder(self, namesIn):
+        # The named techniques first, in the order given, then the rest in their existing order.
+        first = [self.get(name) for name in namesIn]
+        self.strategies = first + [s for s in self.strategies if s not in first]
+        self.tierCache = None
+
+    def configure(self, configIn):
+        unknown = set(configIn) - {"order", "disable", "enable", "tiers"}
+        if unknown:
+            raise ValueError(f"Unknown strategy config setting(s): {', '.join(sorted(unknown))}")
+        if "order" in configIn:
+            self.setOrder(configIn["order"])
+        for name in configIn.get("disable", []):
+            self.setEnabled(name, False)
+        for name in configIn.get("enable", []):
+            self.setEnabled(name, True)
+        for name, tier in configIn.get("tiers", {}).items():
+            self.setTier(name, int(tier))
+
+    def loadConfig(self, pathIn):
+        with open(pathIn) as f:
+            self.configure(json.load(f))
+
+    #============================================
+    # Running and profiling
+    #============================================
+
+    def run(self, strategyIn, gridIn, *argsIn):
+        # Run one technique, timing it. Returns its count of changes.
+        start = perf_counter()
+        count = strategyIn.function(gridIn, *argsIn)
+        strategyIn.seconds += perf_counter() - start
+        strategyIn.calls += 1
+        strategyIn.eliminations += count
+        return count
+
+    def runAll(self, gridIn):
+        # Run every enabled technique over the whole grid, in order (this is what updateGrid does). Returns the total count of changes.
+        count = 0
+        for strategy in self.strategies:
+            if strategy.enabled:
+                count += self.run(strategy, gridIn)
+        return count
+
+    def resetStats(self):
+        for s in self.strategies:
+            s.calls = 0
+            s.seconds = 0.0
+            s.eliminations = 0
+
+    def report(self):
+        return [{"name": s.name, "tier": s.tier, "enabled": s.enabled, "calls": s.calls, "seconds": s.seconds,
+                 "eliminations": s.eliminations, "eliminationsPerMs": s.eliminations / (s.seconds * 1000) if s.seconds else 0.0}
+                for s in self.strategies]
+
+    def formatReport(self):
+        lines = [f"{'Technique':<20} {'Tier':>4} {'Calls':>8} {'Time ms':>10} {'Elims':>8} {'Elims/ms':>9}"]
+        for r in self.report():
+            name = r["name"] if r["enabled"] else r["name"] + " (off)"
+            lines.append(f"{name:<20} {r['tier']:>4} {r['calls']:>8} {r['seconds'] * 1000:>10.1f} {r['eliminations']:>8} "
+                         f"{r['eliminationsPerMs']:>9.2f}")
+        return "\n".join(lines)
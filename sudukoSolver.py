@@ -1,6 +1,12 @@
-import numpy as np
 import sys
 from itertools import combinations
+from time import perf_counter
+import topology
+import strategyRegistry
+import bitmaskEngine
+import backtrackSearch
+import dancingLinks
+import scheduler
 
 #=============================================================================================================================================
 #
@@ -8,6 +14,26 @@ from itertools import combinations
 #   -----------
 #
 #   V1.0 - 28-Dec-2020  - Initial Version
+#   V1.1 - 17-Oct-2026  - Optional bitmask candidate engine (bitmaskEngine.py). Run with --bitmask to use it.
+#   V1.2 - 17-Oct-2026  - Brute force replaced with a complete backtracking search (backtrackSearch.py).
+#   V1.3 - 17-Oct-2026  - Rows, columns, mini-grids and dependants are looked up from tables built once (topology.py).
+#   V1.4 - 17-Oct-2026  - Techniques count their eliminations as they make them, rather than rescanning the grid before and after.
+#   V1.5 - 17-Oct-2026  - Techniques are run from a strategy registry (strategyRegistry.py) which times them. --strategies <json file>
+#                         enables / disables / reorders them and --profile reports calls, time and eliminations per technique.
+#   V1.6 - 17-Oct-2026  - Dancing Links exact cover search (dancingLinks.py) as the brute force backend. --backend search to use the
+#                         backtracking search instead.
+#   V1.7 - 17-Oct-2026  - Contradictions (a cell with no candidates, or a digit with nowhere to go) are reported as soon as they are found
+#                         rather than ignored. Solution counting / uniqueness checks (backtrackSearch.countSolutions(),
+#                         dancingLinks.countSolutions() and batchSolver.py --count).
+#   V1.8 - 17-Oct-2026  - Can be imported as a library without side effects: solve(puzzle) returns a Result, solveMany(puzzles) a Result per
+#                         puzzle. NumPy is only imported when a grid is drawn.
+#   V1.9 - 17-Oct-2026  - More techniques - Hidden Triples / Quads, Swordfish, Jellyfish, XY Wing, XYZ Wing and Simple Colouring.
+#   V2.0 - 17-Oct-2026  - Grid topology built for any mini-grid size (topology.forSize()), and Dancing Links takes any size. 4x4, 16x16 and
+#                         25x25 puzzles are solved by anySizeEngine.py (wider bitmasks); this file stays 9x9.
+#   V2.1 - 17-Oct-2026  - With Numba installed, bitmaskEngine.useKernel() runs naked / hidden singles, naked triples / quads and simple
+#                         colouring in compiled code (compiledKernel.py). The batch tools turn it on; importing this file doesn't load
+#                         Numba or NumPy.
+#   V2.2 - 17-Oct-2026  - Tests in tests/, a file per module or feature (python -m pytest -q).
 #
 #   Terminology:
 #       - Grid - This is the main 9x9 suduko grid
@@ -27,14 +53,23 @@ from itertools import combinations
 #   High Level Code Flow:
 #       - Create an initial full grid (no values set and all candidates possible)
 #       - Apply the initial set of values from file.
-#       - The following suduko techniques are then applied against the grid: Hidden Pairs, X Wing, Naked Triples, Naked Quads, Claim Pair/Triple, 
-#         Pointing Pair/Triple, Naked Pairs, Hidden Singles, Naked Singles. Whenever a cell is solved, i.e. value set, then its dependants are 
-#         are updated. 
+#       - The following suduko techniques are then applied against the grid: Hidden Pairs, X Wing, Naked Triples, Naked Quads, Hidden Triples,
+#         Hidden Quads, Swordfish, Jellyfish, XY Wing, XYZ Wing, Simple Colouring, Claim Pair/Triple, Pointing Pair/Triple, Naked Pairs,
+#         Hidden Singles, Naked Singles. Whenever a cell is solved, i.e. value set, then its dependants are are updated. 
 #       - This is repeated until all values have been found, i.e. grid is solved, or it's not possible to solve any further cells. 
-#       - If the grid has not been solved then a brute force attack is attempted. This involves identifying cells with only two candidates and trying 
-#         each of these for each cell, following the logic above. 
-#       - If the brute force attack fails then we admit defeat and display the list of remaining candidates for each cell.
-#         Note: The solution has not failed yet...
+#       - If the grid has not been solved then a brute force attack is attempted, starting from the candidates left. By default this is an
+#         exact cover search (Dancing Links). The alternative is a depth first search: pick the cell with the fewest candidates, try each
+#         candidate in turn following the logic above, and back out of any guess that leads to a contradiction. 
+#       - If the brute force attack fails then the grid has no solution, and we display the list of remaining candidates for each cell.
+#
+#   Library Use:
+#       import sudukoSolver
+#       result = sudukoSolver.solve("--1--8-73--56----1...")    # 81 characters, or 81 values with 0 for blank
+#       if result.solved: print(result.rows())
+#   solve() runs the bitmask engine (the same techniques, then a search if needed); engineIn="dlx" uses Dancing Links for the search.
+#   solveMany() solves a stream of puzzles, optionally across worker processes (see batchSolver.py). Nothing is read, printed or
+#   prompted for unless this file is run as a program. To see where a slow puzzle's time goes, solveTrace.tracePuzzle() solves it the same
+#   way and returns its counters (and, with eventsIn=True, every placement and elimination with the technique that made it).
 #==============================================================================================================================================
 
 #============================================
@@ -71,6 +106,8 @@ def loadValuesFromFile():
     return values
 
 def drawGrid(gridIn):
+    # NumPy is only used to print the grid, so it is only imported (which is slow) when a grid is drawn.
+    import numpy as np
     vals = [x[0] for x in gridIn]
     print(np.array(vals).reshape((9,9))) 
 
@@ -87,62 +124,34 @@ def getCellIndex(rowIn, colIn):
     return (rowIn * 9) + colIn
 
 def getRowCells(rowRefIn):
-    return [x for x in range(rowRefIn * 9, (rowRefIn * 9) + 9)]
+    return topology.ROW_CELLS[rowRefIn]
 
 def getColCells(colRefIn):
-    return [x for x in range(colRefIn, (colRefIn + 73), 9)]
+    return topology.COL_CELLS[colRefIn]
 
 def getRow(myCellRef):
-    return int(myCellRef / 9)
+    return topology.ROW_OF_CELL[myCellRef]
 
 def getCol(myCellRef):
-    return int(myCellRef % 9)
+    return topology.COL_OF_CELL[myCellRef]
 
 def getMiniGridCells(mbRefIn):
     return  MINI_GRID_CELLS[mbRefIn]   
 
 def getMyRowPals(myCellRef):
-    myRow = getRow(myCellRef)
-    return [x for x in getRowCells(myRow) if x != myCellRef]
+    return topology.ROW_PALS[myCellRef]
     
 def getMyColPals(myCellRef):
-    myCol = getCol(myCellRef)
-    return [x for x in getColCells(myCol) if x != myCellRef]
-
-def getMyMiniGridPals(myCellRef):
-    myMiniGrid = getMyMiniGrid(myCellRef)
-    return [x for x in MINI_GRID_CELLS[myMiniGrid] if x != myCellRef]
+    return topology.COL_PALS[myCellRef]
 
 def getMyMiniGrid(myCellRef):
-    myRow = getRow(myCellRef)
-    myCol = getCol(myCellRef)
-
-    if myRow in [0,1,2]:
-        a = {0,1,2}
-    elif myRow in [3,4,5]:
-        a = {3,4,5}
-    elif myRow in [6,7,8]:
-        a = {6,7,8}
-    else:
-        raise Exception("getMyMiniGrid Error") 
-
-    if myCol in [0,1,2]:
-        b = {0,3,6}
-    elif myCol in [3,4,5]:
-        b = {1,4,7}
-    elif myCol in [6,7,8]:
-        b = {2,5,8}
-    else:
-        raise Exception("getMyMiniGrid Error")
-
-    return list(a.intersection(b))[0]
+    return topology.MINI_GRID_OF_CELL[myCellRef]
 
 def getMyMiniGridPals(myCellRef):
-    myMiniGrid = getMyMiniGrid(myCellRef)
-    return [x for x in MINI_GRID_CELLS[myMiniGrid] if x != myCellRef]
+    return topology.MINI_GRID_PALS[myCellRef]
 
 def getMyDependants(myCellRef):
-    return list(set(getMyColPals(myCellRef) + getMyRowPals(myCellRef) + getMyMiniGridPals(myCellRef)))
+    return topology.PEERS[myCellRef]
 
 def getBlockValues(gridIn,blockIn):
     return [gridIn[x][0] for x in blockIn if gridIn[x][0] != 0 ]
@@ -152,8 +161,8 @@ def getBlockCandidatesByCell(gridIn, blockIn):
     return [gridIn[x][1] for x in blockIn]
     
 def getBlockCandidates(gridIn, blockIn):
-    # This returns just a flat list of distinct possibles for the block
-    return list(set([item for sublist in getBlockCandidatesByCell(gridIn, blockIn) for item in sublist])) 
+    # This returns just a flat list of distinct possibles for the block, in numeric order (which the bitmask engine visits them in too)
+    return sorted(set([item for sublist in getBlockCandidatesByCell(gridIn, blockIn) for item in sublist]))
 
 def onlyTwoElements(listIn):
     if len(listIn) == 2:
@@ -161,23 +170,22 @@ def onlyTwoElements(listIn):
     return []    
 
 def getMiniGridRowRefs(miniBlockIn):
-    rowRefs = []
-    for i in range(3):
-        rowRefs.append([miniBlockIn[j] for j in range(i*3, (i*3) + 3)])
-    return rowRefs
+    return topology.MINI_GRID_ROWS[getMyMiniGrid(miniBlockIn[0])]
 
 def getMiniGridColRefs(miniBlockIn):
-    colRefs = []
-    for i in range(3):
-        colRefs.append([miniBlockIn[j] for j in range(i, i+7, 3)])
-    return colRefs
+    return topology.MINI_GRID_COLS[getMyMiniGrid(miniBlockIn[0])]
 
 def getCandidateIsPossibilityCount(gridIn, blockIn, valIn):
     return len([p for p in blockIn if valIn in gridIn[p][1]])
 
 def removeCandidateFromCells(gridIn, cellsIn, candidateIn):
+    # Returns the number of cells the candidate was removed from, so the techniques can count their changes as they go.
+    count = 0
     for cell in cellsIn:
-         gridIn[cell] = (gridIn[cell][0], [a for a in gridIn[cell][1] if a != candidateIn] ,gridIn[cell][2] )
+        if candidateIn in gridIn[cell][1]:
+            gridIn[cell] = (gridIn[cell][0], [a for a in gridIn[cell][1] if a != candidateIn] ,gridIn[cell][2] )
+            count = count + 1
+    return count
 
 
 def checkMiniRowColForPPoT(gridIn, miniBlockIn, typeIn):
@@ -211,7 +219,9 @@ def checkMiniRowColForPPoT(gridIn, miniBlockIn, typeIn):
                         fullLine = getColCells(getCol(miniLine[0]))                   
 
                     cellsToUpdate = [t for t in fullLine if t not in miniLine]
-                    removeCandidateFromCells(gridIn, cellsToUpdate, c)
+                    count = count + removeCandidateFromCells(gridIn, cellsToUpdate, c)
+
+    return count
 
 def solveCell(gridIn, indexIn):
      # Cell is solved. So, set it's value, empty its possibility list and inform its dependants.
@@ -219,9 +229,31 @@ def solveCell(gridIn, indexIn):
     gridIn[indexIn] = (newVal, [], gridIn[indexIn][2])
     
     # We now need to inform its dependants, so they can remove the value from their list of possible values.
+    emptied = []
     for dependant in gridIn[indexIn][2]:
         # Simply remove the value just set from the dependant (as it can't be this value)
-        gridIn[dependant] = (gridIn[dependant][0], [x for x in gridIn[dependant][1] if x != newVal], gridIn[dependant][2] )
+        candidates = [x for x in gridIn[dependant][1] if x != newVal]
+        gridIn[dependant] = (gridIn[dependant][0], candidates, gridIn[dependant][2] )
+        if not candidates and gridIn[dependant][0] == 0:
+            emptied.append(dependant)
+
+    if emptied:
+        # An unsolved dependant with nothing left - the grid has no solution, so say so now rather than carry on regardless. Every
+        # dependant has been updated first, so the grid is left consistent with the value just set.
+        raise ValueError(f"No solution - cell {emptied[0]} has no candidates left after setting cell {indexIn} to {newVal}")
+
+def hasContradiction(gridIn):
+    # True if an unsolved cell has no candidates left, or a digit not yet placed in a block has nowhere to go.
+    for value, candidates, _ in gridIn:
+        if value == 0 and not candidates:
+            return True
+    for block in topology.UNITS:
+        values = getBlockValues(gridIn, block)
+        candidates = getBlockCandidates(gridIn, block)
+        for v in range(1, 10):
+            if v not in values and v not in candidates:
+                return True
+    return False
 
 def doNakedSingle(gridIn):
     updateCount = 0
@@ -237,7 +269,7 @@ def doHiddenSingles(gridIn):
     # or a mini-grid. The single candidate is the solution to the cell. All other appearances of the same candidate, if any, are elimiated 
     # if they can be seen by the single. 
 
-    preCount = numOutstandingCandidates(gridIn)
+    removed = 0
     lineFunctions = [getRowCells, getColCells, getMiniGridCells]
 
      # Work through rows, columns and mini-grids in turn
@@ -256,26 +288,25 @@ def doHiddenSingles(gridIn):
                             break
                 # If just once instance of the value then we have a hidden single. Let's set it possible value, which will lead 
                 # to the cell being solved as a naked single.
-                if count == 1: gridIn[hiddenSingle] = (0, [i], gridIn[hiddenSingle][2])
+                if count == 1: 
+                    removed = removed + len(gridIn[hiddenSingle][1]) - 1
+                    gridIn[hiddenSingle] = (0, [i], gridIn[hiddenSingle][2])
                     
-    postCount = numOutstandingCandidates(gridIn)
-    return preCount - postCount
+    return removed
 
 
 def doPPoT(gridIn):
 
     # Identify Pointing Pairs or Triples..
-    preCount = numOutstandingCandidates(gridIn)
+    removed = 0
 
     # Work through each mini-grid in turn
     for i in range(9):
         miniGrid = getMiniGridCells(i)
-        checkMiniRowColForPPoT(gridIn, miniGrid, 'R')
-        checkMiniRowColForPPoT(gridIn, miniGrid, 'C')
-
-    postCount = numOutstandingCandidates(gridIn)
+        removed = removed + checkMiniRowColForPPoT(gridIn, miniGrid, 'R')
+        removed = removed + checkMiniRowColForPPoT(gridIn, miniGrid, 'C')
 
-    return preCount - postCount
+    return removed
 
 def doClaimingPoT(gridIn):
     # Identify and process Claiming Pairs or Triples
@@ -283,7 +314,7 @@ def doClaimingPoT(gridIn):
     # a claiming pair (or triple).
     # All other appearances of the candidate in the same mini-grid, if any, can be eliminated. 
 
-    preCount = numOutstandingCandidates(gridIn)
+    removed = 0
     lineFunctions = [getRowCells, getColCells, getMiniGridCells]
 
     # Work through rows then columns in turn  (called line below)
@@ -296,23 +327,22 @@ def doClaimingPoT(gridIn):
                 if cCount == 2 or cCount == 3:
                     # Now check each mini row or col inside this row or col. If a match then we do have a claiming pair (or triple)
                     for x in range(0, 7, 3):
-                        miniLine = [line[x], line[x+1], line[x+2]]
+                        miniLine = line[x: x + 3]
                         mcCount = getCandidateIsPossibilityCount(gridIn, miniLine, c)
                         if cCount == mcCount:
                             miniGrid = getMiniGridCells(getMyMiniGrid(miniLine[0]))
                             cellsToUpdate = [t for t in miniGrid if t not in miniLine]
-                            removeCandidateFromCells(gridIn, cellsToUpdate, c)
+                            removed = removed + removeCandidateFromCells(gridIn, cellsToUpdate, c)
                             break
                         else:
                             if mcCount > 0: break
 
-    postCount = numOutstandingCandidates(gridIn)
-    return preCount - postCount
+    return removed
 
 
 def doNakedPairs(gridIn):
 
-    preCount = numOutstandingCandidates(gridIn)
+    removed = 0
 
     blockFunctions = [getRowCells, getColCells, getMiniGridCells]
 
@@ -328,11 +358,9 @@ def doNakedPairs(gridIn):
             candidatesToRemove = list(set([item for sublist in nakedPairs for item in sublist])) 
 
             cellsToUpdate = [x for x in block if gridIn[x][1] not in nakedPairs and gridIn[x][0] == 0]
-            [removeCandidateFromCells(gridIn, cellsToUpdate, c) for c in candidatesToRemove ]
+            removed = removed + sum([removeCandidateFromCells(gridIn, cellsToUpdate, c) for c in candidatesToRemove ])
 
-    postCount = numOutstandingCandidates(gridIn)
-
-    return preCount - postCount
+    return removed
 
 
 
@@ -343,7 +371,7 @@ def doNakedTriplesQuads(gridIn):
      # Four cells in a row, column or mini-grid, having only the same four candidates, or their subset, are called a naked quad.
      # All other appearances of the same candidates can be eliminated, if they are in the same row, column or mini-grid.
 
-    preCount = numOutstandingCandidates(gridIn)
+    removed = 0
 
     # Set up types list; 3 represents Triple and 4 Quad
     types = [3,4]
@@ -389,10 +417,9 @@ def doNakedTriplesQuads(gridIn):
                             cellsToUpdate = [e for e in block if e != comb[0] and e != comb[1] and e != comb[2]]
                         else:
                              cellsToUpdate = [e for e in block if e != comb[0] and e != comb[1] and e != comb[2] and e != comb[3]]
-                        [removeCandidateFromCells(gridIn, cellsToUpdate, c) for c in checkingSet ]
+                        removed = removed + sum([removeCandidateFromCells(gridIn, cellsToUpdate, c) for c in checkingSet ])
 
-    postCount = numOutstandingCandidates(gridIn)
-    return preCount - postCount
+    return removed
 
 def doXWing(gridIn):
 
@@ -400,7 +427,7 @@ def doXWing(gridIn):
     # and it appears only in the two cells in both rows, all other appearances of the candidate 
     # in the two columns, if any, can be elimated. It also works if the rows and columns are switched.
 
-    preCount = numOutstandingCandidates(gridIn)
+    removed = 0
     blockFunctions = [getRowCells, getColCells]
     oppFunctions = [getColCells, getRowCells]
 
@@ -436,18 +463,17 @@ def doXWing(gridIn):
             oppositeB = oppFunctions[e](xwDefinites[s][3])            
             toUpdateA = [h for g,h in enumerate(oppositeA) if g != xwDefinites[s][1] and  g != xwDefinites[s+1][1]]
             toUpdateB = [h for g,h in enumerate(oppositeB) if g != xwDefinites[s][1] and  g != xwDefinites[s+1][1]]
-            removeCandidateFromCells(gridIn, toUpdateA, xwDefinites[s][0])
-            removeCandidateFromCells(gridIn, toUpdateB, xwDefinites[s][0])
+            removed = removed + removeCandidateFromCells(gridIn, toUpdateA, xwDefinites[s][0])
+            removed = removed + removeCandidateFromCells(gridIn, toUpdateB, xwDefinites[s][0])
             
-    postCount = numOutstandingCandidates(gridIn)
-    #print(f"X Wing - Before = {preCount}  Post = {postCount}")
-    return preCount - postCount
+    #print(f"X Wing - Removed = {removed}")
+    return removed
 
 def doHiddenPairs(gridIn):
     # When a pair of candidates appear in only two cells in a row, col or mini-grid, but aren't the only candidates in the cells, 
     # they are called a hidden pair. All candidates other than the pair in the cells can be eliminated, yielding a naked pair.
 
-    preCount = numOutstandingCandidates(gridIn)
+    removed = 0
     blockFunctions = [getRowCells, getColCells, getMiniGridCells]
 
     # Loop through all the rows, columns and then mini-grids
@@ -466,81 +492,352 @@ def doHiddenPairs(gridIn):
                         indexes = [index for index,cell in enumerate(candidatesByCell) if cell in possibleCells ]
                         cellsToUpdate = [block[a] for a in indexes]
                         candidatesToRemove = [x for x in range(1, 10) if x != c[0] and x != c[1]]
-                        [removeCandidateFromCells(gridIn, cellsToUpdate, z) for z in candidatesToRemove]
+                        removed = removed + sum([removeCandidateFromCells(gridIn, cellsToUpdate, z) for z in candidatesToRemove])
                         
-    postCount = numOutstandingCandidates(gridIn)
-    #print(f"HiddenPairs - Before = {preCount}  Post = {postCount}")
-    return preCount - postCount
+    #print(f"HiddenPairs - Removed = {removed}")
+    return removed
+
+
+def doHiddenTriplesQuads(gridIn):
+    # When three (or four) candidates only appear in the same three (or four) cells of a row, col or mini-grid, each in at least two of
+    # them, they are a hidden triple (or quad). All other candidates in those cells can be eliminated. The rest of the unsolved cells
+    # then hold a naked set of the other candidates, which the naked techniques already find, so only blocks with 8 or more unsolved
+    # cells (9 for quads) need checking. Every block is checked before any candidates are removed.
+
+    toRemove = []
+    blockFunctions = [getRowCells, getColCells, getMiniGridCells]
+
+    for f in blockFunctions:
+        for i in range(9):
+            block = f(i)
+            unsolved = len([x for x in block if gridIn[x][0] == 0])
+            if unsolved < 8:
+                continue
+            candidatesByCell = getBlockCandidatesByCell(gridIn, block)
+            for t in ([3, 4] if unsolved == 9 else [3]):
+                hsPossValues = [c for c in range(1, 10) if 2 <= len([a for a in candidatesByCell if c in a]) <= t]
+                for comb in combinations(hsPossValues, t):
+                    possibleCells = [block[index] for index, cell in enumerate(candidatesByCell) if any(c in cell for c in comb)]
+                    if len(possibleCells) == t:
+                        toRemove += [(cell, x) for cell in possibleCells for x in gridIn[cell][1] if x not in comb]
+
+    removed = 0
+    for cell, c in toRemove:
+        removed = removed + removeCandidateFromCells(gridIn, [cell], c)
+    return removed
+
+def doFish(gridIn, sizeIn):
+    # X Wing with sizeIn lines. When a candidate appears in only 2 to sizeIn cells of each of sizeIn rows, and all of them are in the
+    # same sizeIn columns, all other appearances of the candidate in those columns can be eliminated. It also works if the rows and
+    # columns are switched. 3 lines is a Swordfish, 4 a Jellyfish.
+    # If the candidate still has to go in k rows, the other k - sizeIn rows make a smaller fish in the columns that eliminates the same
+    # candidates, so only candidates with 2 * sizeIn or more rows to go are checked.
+
+    removed = 0
+    blockFunctions = [getRowCells, getColCells]
+    oppFunctions = [getColCells, getRowCells]
+
+    for c in range(1, 10):
+        if len([i for i in range(9) if c in getBlockCandidates(gridIn, getRowCells(i))]) < 2 * sizeIn:
+            continue
 
+        # First try rows (eliminating from crossing columns), then columns (eliminating from crossing rows)
+        for e, bf in enumerate(blockFunctions):
+            fishPossibles = []
+            for i in range(9):
+                indexes = [index for index, choices in enumerate(getBlockCandidatesByCell(gridIn, bf(i))) if c in choices]
+                if 2 <= len(indexes) <= sizeIn:
+                    fishPossibles.append((i, indexes))
+
+            cellsToUpdate = set()
+            for comb in combinations(fishPossibles, sizeIn):
+                coverLines = set(index for _, indexes in comb for index in indexes)
+                if len(coverLines) == sizeIn:
+                    baseLines = [line for line, _ in comb]
+                    for p in coverLines:
+                        cellsToUpdate.update(h for g, h in enumerate(oppFunctions[e](p)) if g not in baseLines)
+            removed = removed + removeCandidateFromCells(gridIn, cellsToUpdate, c)
+
+    return removed
+
+def doSwordfish(gridIn):
+    return doFish(gridIn, 3)
+
+def doJellyfish(gridIn):
+    return doFish(gridIn, 4)
+
+def doXYWing(gridIn):
+    # A cell with two candidates x and y (the pivot) which can see a cell with candidates x and z, and a cell with candidates y and z
+    # (the wings). Whichever of x and y the pivot is, one of the wings must be z. So z can be eliminated from any cell that can see both
+    # wings. All the wings are found before any candidates are removed.
+
+    toRemove = []
+    for pivot, (_, pivotCandidates, dependants) in enumerate(gridIn):
+        if len(pivotCandidates) != 2:
+            continue
+        wings = [w for w in dependants if len(gridIn[w][1]) == 2 and len([x for x in gridIn[w][1] if x in pivotCandidates]) == 1]
+        for a, b in combinations(wings, 2):
+            z = [x for x in gridIn[a][1] if x in gridIn[b][1]]
+            sharedA = [x for x in gridIn[a][1] if x in pivotCandidates]
+            sharedB = [x for x in gridIn[b][1] if x in pivotCandidates]
+            if len(z) == 1 and z[0] not in pivotCandidates and sharedA != sharedB:
+                toRemove += [(cell, z[0]) for cell in gridIn[a][2] if cell in gridIn[b][2]]
+
+    removed = 0
+    for cell, c in toRemove:
+        removed = removed + removeCandidateFromCells(gridIn, [cell], c)
+    return removed
+
+def doXYZWing(gridIn):
+    # As XY Wing, but the pivot has all three candidates x, y and z. The pivot could be z too, so z can only be eliminated from cells
+    # that can see the pivot as well as both wings.
+
+    toRemove = []
+    for pivot, (_, pivotCandidates, dependants) in enumerate(gridIn):
+        if len(pivotCandidates) != 3:
+            continue
+        wings = [w for w in dependants if len(gridIn[w][1]) == 2 and all(x in pivotCandidates for x in gridIn[w][1])]
+        for a, b in combinations(wings, 2):
+            z = [x for x in gridIn[a][1] if x in gridIn[b][1]]
+            if gridIn[a][1] != gridIn[b][1] and len(z) == 1:
+                toRemove += [(cell, z[0]) for cell in dependants if cell in gridIn[a][2] and cell in gridIn[b][2]]
+
+    removed = 0
+    for cell, c in toRemove:
+        removed = removed + removeCandidateFromCells(gridIn, [cell], c)
+    return removed
+
+def doSimpleColoring(gridIn):
+    # When a candidate appears in only two cells of a row, col or mini-grid, exactly one of them is that value. Following these links
+    # from cell to cell gives a chain, and colouring the cells alternately splits it into two sides, one of which is the value:
+    #   - If two cells on the same side can see each other, that side can't be the value, so it's eliminated from all of that side.
+    #   - Otherwise it's eliminated from any other cell that can see a cell on each side.
+    # A chain of just two cells only eliminates what the pointing / claiming techniques do, so these are skipped. Each candidate's chains
+    # are all found before any of it is removed.
+
+    removed = 0
+    blockFunctions = [getRowCells, getColCells, getMiniGridCells]
+
+    for c in range(1, 10):
+        links = {}
+        for f in blockFunctions:
+            for i in range(9):
+                cells = [x for x in f(i) if c in gridIn[x][1]]
+                if len(cells) == 2:
+                    links.setdefault(cells[0], []).append(cells[1])
+                    links.setdefault(cells[1], []).append(cells[0])
+        if len(links) < 3:
+            continue
+
+        colours = {}
+        cellsToUpdate = set()
+        for start in links:
+            if start in colours:
+                continue
+            colours[start] = 0
+            chain = [start]
+            for cell in chain:
+                for other in links[cell]:
+                    if other not in colours:
+                        colours[other] = 1 - colours[cell]
+                        chain.append(other)
+            if len(chain) < 3:
+                continue
+
+            sides = [[x for x in chain if colours[x] == 0], [x for x in chain if colours[x] == 1]]
+            wrapped = False
+            for side in sides:
+                if any(b in gridIn[a][2] for a, b in combinations(side, 2)):
+                    cellsToUpdate.update(side)
+                    wrapped = True
+            if wrapped:
+                continue
+            for x, (_, candidates, dependants) in enumerate(gridIn):
+                if c in candidates and x not in chain and any(y in sides[0] for y in dependants) and any(y in sides[1] for y in dependants):
+                    cellsToUpdate.add(x)
+
+        removed = removed + removeCandidateFromCells(gridIn, cellsToUpdate, c)
+
+    return removed
 
 def updateGrid(gridIn):
-    return doHiddenPairs(gridIn) + doXWing(gridIn) + doNakedTriplesQuads(gridIn) +  doClaimingPoT(gridIn) + doPPoT(gridIn) + doNakedPairs(gridIn) + doHiddenSingles(gridIn) + doNakedSingle(gridIn)
+    # Apply each enabled technique in turn (see STRATEGIES below)
+    return STRATEGIES.runAll(gridIn)
     
-def tryBruteForce(gridIn):
+def tryBruteForce(gridIn, backendIn="dlx"):
 
     print(f"\nOK, we couldn't solve using the provided techniques... Let try brute force")
 
-    # Get list of cells with two candidates and try these
-    twoCandidateCells = [i for i, x in enumerate(gridIn) if len(x[1]) == 2]
-
-    for cell in twoCandidateCells:
-        # Try setting each of the two values, and see if it solves the grid...
-        for candidate in gridIn[cell][1]:
-            copyGrid = gridIn.copy()
-            copyGrid[cell] = (0, [candidate], copyGrid[cell][2])
-            solveCell(copyGrid, cell)
-            iteration = 1
-            while (updateGrid(copyGrid) and numOutstandingCells(copyGrid) > 0 ):
-                iteration = iteration + 1
-            if numOutstandingCells(copyGrid) == 0: 
-                return copyGrid
-    return 0
+    if backendIn == "dlx":
+        # Exact cover search (see dancingLinks.py) over the candidates that are left.
+        stats = dancingLinks.newStats()
+        values = dancingLinks.solveListGrid(gridIn, stats)
+        print(f"Dancing Links nodes = {stats['nodes']} backtracks = {stats['backtracks']}")
+        if values is None:
+            return 0
+        return [(v, [], gridIn[i][2]) for i, v in enumerate(values)]
+
+    # Depth first search on the bitmask engine (see backtrackSearch.py). Each guess is followed by the techniques above, and
+    # wrong guesses are undone from a trail rather than by copying the grid.
+    maskGrid = bitmaskEngine.fromListGrid(gridIn)
+    stats = backtrackSearch.newStats()
+    solved = backtrackSearch.search(maskGrid, stats)
+    print(f"Search nodes = {stats['nodes']} backtracks = {stats['backtracks']}")
+    if not solved:
+        return 0
+    return bitmaskEngine.toListGrid(maskGrid, gridIn.copy())
 
 #============================================
 # Globals / Constants
 #============================================
 
-CELLS = 9 * 9
-MINI_GRID_CELLS = [ [0,1,2,9,10,11,18,19,20], 
-                    [3,4,5,12,13,14,21,22,23],
-                    [6,7,8,15,16,17,24,25,26],
-                    [27,28,29,36,37,38,45,46,47],
-                    [30,31,32,39,40,41,48,49,50],
-                    [33,34,35,42,43,44,51,52,53],
-                    [54,55,56,63,64,65,72,73,74],
-                    [57,58,59,66,67,68,75,76,77],
-                    [60,61,62,69,70,71,78,79,80]
-                     ]
+CELLS = topology.CELLS
+MINI_GRID_CELLS = topology.MINI_GRID_CELLS
+
+# The techniques updateGrid applies, in order. Each pass runs all of them (runAll), so unlike the bitmask engine's they have no tier or
+# scope for a scheduler to use.
+STRATEGIES = strategyRegistry.Registry()
+STRATEGIES.register("hiddenPairs", doHiddenPairs)
+STRATEGIES.register("xWing", doXWing)
+STRATEGIES.register("nakedTriplesQuads", doNakedTriplesQuads)
+STRATEGIES.register("hiddenTriplesQuads", doHiddenTriplesQuads)
+STRATEGIES.register("swordfish", doSwordfish)
+STRATEGIES.register("jellyfish", doJellyfish)
+STRATEGIES.register("xyWing", doXYWing)
+STRATEGIES.register("xyzWing", doXYZWing)
+STRATEGIES.register("simpleColoring", doSimpleColoring)
+STRATEGIES.register("claimingPoT", doClaimingPoT)
+STRATEGIES.register("pointingPoT", doPPoT)
+STRATEGIES.register("nakedPairs", doNakedPairs)
+STRATEGIES.register("hiddenSingles", doHiddenSingles)
+STRATEGIES.register("nakedSingle", doNakedSingle)
 
 #============================================
-# Main Program
+# Library
 #============================================
 
-try:
-     
-    sudukoGrid = createGrid()    
-    drawGrid(sudukoGrid)
+ENGINES = ("bitmask", "dlx")
+PUZZLE_TABLE = str.maketrans("-.", "00")
+
+class Result:
+    # What solve() returns. solution is an 81 character string, or None if the puzzle has no solution. nodes / backtracks are the
+    # search statistics and seconds the time taken (None when the puzzle was solved in a worker process).
+    __slots__ = ("puzzle", "solution", "nodes", "backtracks", "seconds")
+
+    def __init__(self, puzzleIn, solutionIn, nodesIn=None, backtracksIn=None, secondsIn=None):
+        self.puzzle = puzzleIn
+        self.solution = solutionIn
+        self.nodes = nodesIn
+        self.backtracks = backtracksIn
+        self.seconds = secondsIn
+
+    @property
+    def solved(self):
+        return self.solution is not None
+
+    def rows(self):
+        # The solution (or the puzzle, if there isn't one, with 0 for blanks) as 9 rows of 9 values
+        grid = self.solution if self.solved else self.puzzle
+        return [[int(c) for c in grid[r * 9: (r * 9) + 9]] for r in range(9)]
+
+    def __repr__(self):
+        return f"Result(puzzle={self.puzzle!r}, solution={self.solution!r})"
+
+def puzzleString(puzzleIn):
+    # Accepts an 81 character string (blanks '-', '.' or '0'; line breaks and spaces are ignored, so the contents of a grid file will do)
+    # or a sequence of 81 values (0 for blank). Returns it as an 81 character string with '0' for blanks.
+    if isinstance(puzzleIn, str):
+        puzzle = "".join(puzzleIn.split()).translate(PUZZLE_TABLE)
+        if len(puzzle) == CELLS and puzzle.isdigit() and puzzle.isascii():
+            return puzzle
+    else:
+        values = list(puzzleIn)
+        if len(values) == CELLS and all(v in range(10) for v in values):
+            return "".join(map(str, values))
+    raise ValueError(f"A puzzle should be {CELLS} cells of 1-9 or blank, not {puzzleIn!r}")
+
+def solve(puzzleIn, engineIn="bitmask"):
+    if engineIn not in ENGINES:
+        raise ValueError(f"Unknown engine {engineIn!r} - should be one of {', '.join(ENGINES)}")
+    puzzle = puzzleString(puzzleIn)
+    start = perf_counter()
+    grid = bitmaskEngine.createGrid([(i, int(c)) for i, c in enumerate(puzzle) if c != "0"])
+    stats = backtrackSearch.newStats()
+    if engineIn == "dlx":
+        # The techniques first, then Dancing Links from wherever they stall.
+        values = None
+        if scheduler.propagate(grid):
+            values = grid.values if bitmaskEngine.numOutstandingCells(grid) == 0 else dancingLinks.solveMaskGrid(grid, stats)
+    else:
+        values = grid.values if backtrackSearch.search(grid, stats) else None
+    solution = None if values is None else "".join(map(str, values))
+    return Result(puzzle, solution, stats["nodes"], stats["backtracks"], perf_counter() - start)
+
+def solveMany(puzzlesIn, engineIn="bitmask", workersIn=1, chunkSizeIn=256):
+    # Yields a Result for each puzzle, in order. With workersIn > 1 the puzzles are spread across worker processes, and with the numpy
+    # engine solved a chunk at a time (both via batchSolver.py, which is only imported for these).
+    if workersIn <= 1 and engineIn != "numpy":
+        for puzzle in puzzlesIn:
+            yield solve(puzzle, engineIn)
+        return
+
+    if engineIn not in ENGINES + ("numpy",):
+        raise ValueError(f"Unknown engine {engineIn!r} - should be one of {', '.join(ENGINES + ('numpy',))}")
+    import batchSolver
+    puzzles = (puzzleString(p) for p in puzzlesIn)
+    if workersIn > 1:
+        results = batchSolver.solveParallel(puzzles, workersIn, chunkSizeIn, engineIn)
+    else:
+        results = batchSolver.solveChunks(puzzles, chunkSizeIn, engineIn)
+    for puzzle, solution in results:
+        yield Result(puzzle, solution)
+
+#============================================
+# Main Program
+#============================================
 
-    input("Press Enter to solve......")
+if __name__ == "__main__":
+    try:
+        if "--strategies" in sys.argv:
+            configFile = sys.argv[sys.argv.index("--strategies") + 1]
+            STRATEGIES.loadConfig(configFile)
+            bitmaskEngine.STRATEGIES.loadConfig(configFile)
 
-    iteration = 1
-    while (updateGrid(sudukoGrid) and numOutstandingCells(sudukoGrid) > 0 ):
-        print(f"After Iteration {iteration} - Outstanding Cells = {numOutstandingCells(sudukoGrid)} outstanding candidates = {numOutstandingCandidates(sudukoGrid)}")
-        iteration = iteration + 1
+        sudukoGrid = createGrid()    
+        drawGrid(sudukoGrid)
 
-    print(f"Complete - Outstanding Cells = {numOutstandingCells(sudukoGrid)} outstanding candidates = {numOutstandingCandidates(sudukoGrid)}")
-    drawGrid(sudukoGrid)
+        input("Press Enter to solve......")
 
-    if numOutstandingCells(sudukoGrid) > 0:
-        # We couldn't solve the grid using the techniques provided. As a last resort try brute force on cells with two candidates
-        bruteForceGrid = tryBruteForce(sudukoGrid)
-        if not bruteForceGrid:
-            print(f"Brute Force Failed!!!..... Outstanding Candidates")
-            for i in range(9):
-                print(f" {getBlockCandidatesByCell(sudukoGrid, getRowCells(i))}")
+        iteration = 1
+        if "--bitmask" in sys.argv:
+            # Same techniques, but run on candidate bitmasks. The result is written back into sudukoGrid.
+            iteration = bitmaskEngine.updateListGrid(sudukoGrid)
+            print(f"Bitmask engine - {iteration} iterations")
         else:
-            print(f"Brute Force Success ")
-            drawGrid(bruteForceGrid)
-       
-except Exception as e:
-    print("Aborting..../n", e)
\ No newline at end of file
+            while (updateGrid(sudukoGrid) and numOutstandingCells(sudukoGrid) > 0 ):
+                print(f"After Iteration {iteration} - Outstanding Cells = {numOutstandingCells(sudukoGrid)} outstanding candidates = {numOutstandingCandidates(sudukoGrid)}")
+                iteration = iteration + 1
+
+        print(f"Complete - Outstanding Cells = {numOutstandingCells(sudukoGrid)} outstanding candidates = {numOutstandingCandidates(sudukoGrid)}")
+        drawGrid(sudukoGrid)
+
+        if hasContradiction(sudukoGrid):
+            print(f"No solution - a cell, or a digit in a row / column / mini-grid, has nowhere left to go")
+        elif numOutstandingCells(sudukoGrid) > 0:
+            # We couldn't solve the grid using the techniques provided. As a last resort try brute force on cells with two candidates
+            backend = sys.argv[sys.argv.index("--backend") + 1] if "--backend" in sys.argv else "dlx"
+            bruteForceGrid = tryBruteForce(sudukoGrid, backend)
+            if not bruteForceGrid:
+                print(f"Brute Force Failed!!!..... Outstanding Candidates")
+                for i in range(9):
+                    print(f" {getBlockCandidatesByCell(sudukoGrid, getRowCells(i))}")
+            else:
+                print(f"Brute Force Success ")
+                drawGrid(bruteForceGrid)
+
+        if "--profile" in sys.argv:
+            print(f"\nList engine techniques\n{STRATEGIES.formatReport()}")
+            print(f"\nBitmask engine techniques\n{bitmaskEngine.STRATEGIES.formatReport()}")
+
+    except Exception as e:
+        print("Aborting..../n", e)
\ No newline at end of file
@@ -0,0 +1,56 @@
+import glob
+import os
+import sys
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+import topology
+import bitmaskEngine
+import dancingLinks
+
+#=============================================================================================================================================
+#
+#   Shared test set up. The modules live at the top of the repo, so it goes on the path here (as the benchmarks do). Every test ends
+#   with the engines back in pure Python.
+#
+#   Usage:  python -m pytest -q
+#==============================================================================================================================================
+
+def loadBundledGrids():
+    # {name: 81 character puzzle} for each grid-*.txt at the top of the repo
+    grids = {}
+    for path in sorted(glob.glob(os.path.join(ROOT, "grid-*.txt"))):
+        with open(path) as f:
+            grids[os.path.splitext(os.path.basename(path))[0]] = "".join(f.read().split())
+    return grids
+
+BUNDLED_GRIDS = loadBundledGrids()
+
+def isSolution(puzzleIn, solutionIn):
+    # True if solutionIn (81 digits) is a completed grid keeping every clue of puzzleIn
+    if solutionIn is None or len(solutionIn) != topology.CELLS:
+        return False
+    if any(c not in "-.0" and c != s for c, s in zip(puzzleIn, solutionIn)):
+        return False
+    return all(sorted(solutionIn[cell] for cell in unit) == list("123456789") for unit in topology.UNITS)
+
+@pytest.fixture(params=sorted(BUNDLED_GRIDS))
+def bundledGrid(request):
+    # (name, puzzle) for each bundled grid in turn
+    return request.param, BUNDLED_GRIDS[request.param]
+
+@pytest.fixture
+def bundledGrids():
+    return BUNDLED_GRIDS
+
+@pytest.fixture
+def solutionCheck():
+    return isSolution
+
+@pytest.fixture(autouse=True)
+def pureEngines():
+    # The batch tools switch the compiled kernels on for the whole process, so every test is put back to pure Python afterwards.
+    yield
+    bitmaskEngine.useKernel(False)
+    dancingLinks.useKernel(False)
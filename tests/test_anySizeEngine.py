@@ -0,0 +1,112 @@
+import io
+import os
+import pytest
+import anySizeEngine as ae
+import batchSolver
+import dancingLinks
+import topology
+from conftest import ROOT
+
+#=============================================================================================================================================
+#
+#   The any size engine: puzzle strings and files of each size are parsed and bad ones rejected, the corpora in benchmarks/corpora/sizes
+#   are solved by both backends, 9x9 puzzles get the same solutions as the bitmask engine, and Dancing Links gives the same answers and
+#   stats in compiled code (compiledLinks.py) as in pure Python.
+#
+#==============================================================================================================================================
+
+def corpus(sizeIn):
+    with open(os.path.join(ROOT, "benchmarks", "corpora", "sizes", f"grid-{sizeIn}.txt")) as f:
+        return list(ae.readPuzzles(f))
+
+def isSolution(puzzleIn, solutionIn):
+    size = ae.sizeOf(puzzleIn)
+    if solutionIn is None or any(c not in ae.BLANKS and c != s for c, s in zip(puzzleIn.upper(), solutionIn)):
+        return False
+    return all(sorted(solutionIn[cell] for cell in unit) == sorted(ae.SYMBOLS[:size]) for unit in topology.forSize(size).units)
+
+#============================================
+# Puzzles
+#============================================
+
+def testParsePuzzle():
+    assert ae.parsePuzzle("1..." + "." * 12) == (4, [(0, 1)])
+    assert ae.parsePuzzle("g" + "." * 255) == (16, [(0, 16)])
+    assert ae.sizeOf("." * 625) == 25
+
+def testParsePuzzleRejects():
+    with pytest.raises(ValueError, match="A puzzle should be 16, 81, 256, 625 cells long, not 80"):
+        ae.sizeOf("." * 80)
+    with pytest.raises(ValueError, match="Cell 0: '5' isn't a value for a 4x4 grid"):
+        ae.parsePuzzle("5" + "." * 15)
+
+def testReadPuzzles():
+    puzzle = "1234341221434321"
+    assert list(ae.readPuzzles(io.StringIO(f"# 4x4\n{puzzle}\n"))) == [puzzle]
+    gridFormat = "\n".join(puzzle[r * 4: (r * 4) + 4] for r in range(4))
+    assert list(ae.readPuzzles(io.StringIO(gridFormat + "\n"), 4)) == [puzzle]
+    with pytest.raises(ValueError, match="Incomplete puzzle"):
+        list(ae.readPuzzles(io.StringIO(puzzle[:8]), 4))
+    with pytest.raises(ValueError, match="A puzzle should be"):
+        list(ae.readPuzzles(io.StringIO(puzzle[:8])))
+
+#============================================
+# Solving
+#============================================
+
+@pytest.mark.parametrize("size", [4, 9])
+@pytest.mark.parametrize("backend", ae.BACKENDS)
+def testSolveCorpus(size, backend):
+    for puzzle in corpus(size):
+        assert isSolution(puzzle, ae.solvePuzzle(puzzle, None, backend))
+
+def testSolveSixteen():
+    for puzzle in corpus(16)[:2]:
+        solution = ae.solvePuzzle(puzzle)
+        assert isSolution(puzzle, solution)
+        assert ae.countPuzzle(puzzle) == 1
+
+def testNineByNineMatchesBitmaskEngine(bundledGrid):
+    _, puzzle = bundledGrid
+    assert ae.solvePuzzle(puzzle) == batchSolver.solvePuzzle(puzzle)
+
+@pytest.mark.parametrize("backend", ae.BACKENDS)
+def testCountEmptyFourByFour(backend):
+    # There are 288 4x4 grids
+    assert ae.countPuzzle("." * 16, 300, None, backend) == 288
+    assert ae.countPuzzle("11" + "." * 14, 2, None, backend) == 0
+
+def testSearchWithoutNakedSingles():
+    # The search has to place cells left with one candidate itself
+    ae.STRATEGIES.setEnabled("nakedSingle", False)
+    try:
+        solutions = [(p, ae.solvePuzzle(p, None, "search")) for p in corpus(9)[:5]]
+    finally:
+        ae.STRATEGIES.setEnabled("nakedSingle", True)
+    assert all(isSolution(p, s) for p, s in solutions)
+
+@pytest.mark.parametrize("size", [4, 9, 16])
+def testDancingLinksKernelMatchesPurePython(size):
+    puzzles = corpus(size)[1:5]
+    if not dancingLinks.useKernel(True):
+        pytest.skip("Numba isn't installed")
+    try:
+        compiled = [(ae.solvePuzzle(p, stats), ae.countPuzzle(p), stats) for p in puzzles for stats in [ae.newStats()]]
+    finally:
+        dancingLinks.useKernel(False)
+    pure = [(ae.solvePuzzle(p, stats), ae.countPuzzle(p), stats) for p in puzzles for stats in [ae.newStats()]]
+    assert compiled == pure
+
+#============================================
+# Main
+#============================================
+
+def testMain(tmp_path):
+    output = tmp_path / "solutions.txt"
+    path = os.path.join(ROOT, "benchmarks", "corpora", "sizes", "grid-4.txt")
+    assert ae.main([path, "-o", str(output), "--no-kernel"]) == 0
+    assert all(isSolution(p, s) for p, s in zip(corpus(4), output.read_text().split()))
+
+def testMainAbortsOnMissingFile(tmp_path, capsys):
+    assert ae.main([str(tmp_path / "nofile.txt"), "--no-kernel"]) == 1
+    assert "Aborting...." in capsys.readouterr().err
@@ -0,0 +1,52 @@
+import bitmaskEngine as bm
+import backtrackSearch
+
+#=============================================================================================================================================
+#
+#   The backtracking search: it must solve every bundled grid and an empty one, report a grid with no solution, and place cells left
+#   with a single candidate itself when naked singles are switched off.
+#
+#==============================================================================================================================================
+
+NO_SOLUTION = "137600402000905000000400019080000004200000000704000200050040007006800000000000190"     # grid-e1, with a wrong 3
+
+def clues(puzzleIn):
+    return [(i, int(c)) for i, c in enumerate(puzzleIn) if c not in "-.0"]
+
+def solved(gridIn):
+    return "".join(map(str, gridIn.values))
+
+#============================================
+# Tests
+#============================================
+
+def testSearchSolvesBundledGrids(bundledGrid, solutionCheck):
+    _, puzzle = bundledGrid
+    grid = bm.createGrid(clues(puzzle))
+    stats = backtrackSearch.newStats()
+    assert backtrackSearch.search(grid, stats)
+    assert solutionCheck(puzzle, solved(grid))
+    assert stats["nodes"] >= 1
+    assert grid.trail is None
+
+def testSearchSolvesEmptyGrid(solutionCheck):
+    grid = bm.createGrid([])
+    assert backtrackSearch.search(grid)
+    assert solutionCheck("0" * bm.CELLS, solved(grid))
+
+def testSearchReportsNoSolution():
+    grid = bm.createGrid(clues(NO_SOLUTION))
+    stats = backtrackSearch.newStats()
+    assert not backtrackSearch.search(grid, stats)
+    assert grid.trail is None
+
+def testSearchWithoutNakedSingles(bundledGrid, solutionCheck):
+    # The search has to place cells left with one candidate itself
+    _, puzzle = bundledGrid
+    bm.STRATEGIES.setEnabled("nakedSingle", False)
+    try:
+        grid = bm.createGrid(clues(puzzle))
+        assert backtrackSearch.search(grid)
+    finally:
+        bm.STRATEGIES.setEnabled("nakedSingle", True)
+    assert solutionCheck(puzzle, solved(grid))
@@ -0,0 +1,72 @@
+import io
+import pytest
+import batchSolver
+
+#=============================================================================================================================================
+#
+#   The batch solver: batchSolver.readPuzzles() on both input formats and bad input, main() end to end, including aborting on a file
+#   it can't open, and solveParallel() giving the same results, in the same order, as solving in one process.
+#
+#==============================================================================================================================================
+
+PUZZLE = "1-76--4-2---9-5------4---19-8------42--------7-4---2---5--4---7--68-----------19-"
+NO_SOLUTION = "11" + "0" * 79
+
+def readAll(textIn):
+    return list(batchSolver.readPuzzles(io.StringIO(textIn)))
+
+#============================================
+# readPuzzles
+#============================================
+
+def testReadPuzzlesOneLineAndGridFormats():
+    gridFormat = "\n".join(PUZZLE[r * 9: (r * 9) + 9] for r in range(9))
+    assert readAll(f"# a comment\n{PUZZLE}\n\n{gridFormat}\n") == [PUZZLE, PUZZLE]
+
+def testReadPuzzlesUnexpectedCharacter():
+    with pytest.raises(ValueError, match="Line 2: unexpected character"):
+        readAll(f"{PUZZLE}\n{PUZZLE[:80]}x\n")
+
+def testReadPuzzlesTooLong():
+    with pytest.raises(ValueError, match="Line 1: puzzle is longer than 81 cells"):
+        readAll(PUZZLE + "1\n")
+
+def testReadPuzzlesIncomplete():
+    with pytest.raises(ValueError, match="Incomplete puzzle at end of input \\(9 cells\\)"):
+        readAll(f"{PUZZLE}\n{PUZZLE[:9]}\n")
+
+#============================================
+# main
+#============================================
+
+@pytest.mark.parametrize("engine", ["bitmask", "dlx"])
+def testMainSolvesFile(tmp_path, engine, solutionCheck):
+    puzzles = tmp_path / "puzzles.txt"
+    puzzles.write_text(f"{PUZZLE}\n{NO_SOLUTION}\n")
+    solutions = tmp_path / "solutions.txt"
+    assert batchSolver.main([str(puzzles), "-o", str(solutions), "--engine", engine, "--no-kernel"]) == 0
+    solved, unsolved = solutions.read_text().split()
+    assert solutionCheck(PUZZLE, solved)
+    assert unsolved == NO_SOLUTION
+
+def testMainAbortsOnMissingFile(tmp_path, capsys):
+    assert batchSolver.main([str(tmp_path / "nofile.txt")]) == 1
+    assert "Aborting...." in capsys.readouterr().err
+
+def testMainAbortsOnBadPuzzle(tmp_path, capsys):
+    puzzles = tmp_path / "puzzles.txt"
+    puzzles.write_text(PUZZLE[:80] + "x\n")
+    assert batchSolver.main([str(puzzles), "-o", str(tmp_path / "solutions.txt")]) == 1
+    assert "unexpected character" in capsys.readouterr().err
+
+#============================================
+# solveParallel
+#============================================
+
+def testSolveParallelMatchesSolveStream(bundledGrids):
+    # Results come back in input order whatever order the workers finish in
+    puzzles = list(bundledGrids.values()) * 3 + [NO_SOLUTION]
+    expected = list(batchSolver.solveStream(puzzles))
+    assert list(batchSolver.solveParallel(puzzles, 2, 4, kernelIn=False)) == expected
+    counts = list(batchSolver.solveParallel(puzzles, 2, 4, countIn=2, kernelIn=False))
+    assert [count for _, count in counts] == [1] * (len(puzzles) - 1) + [0]
@@ -0,0 +1,123 @@
+import os
+import pytest
+import sudukoSolver as ss
+import bitmaskEngine as bm
+import batchSolver
+from conftest import ROOT
+
+#=============================================================================================================================================
+#
+#   The bitmask engine against the list engine on the bundled grids: the same sweeps must end on the same grid, and grids must convert
+#   between the two forms without losing anything. rollback() must undo everything since its checkpoint, and copied and packed grids
+#   must keep the whole state. Each technique on its own must only ever remove candidates that aren't in the solution.
+#
+#==============================================================================================================================================
+
+def clues(puzzleIn):
+    return [(i, int(c)) for i, c in enumerate(puzzleIn) if c not in "-.0"]
+
+def listGrid(puzzleIn):
+    # As sudukoSolver.createGrid(), but from a puzzle string rather than grid.txt
+    gridOut = [(0, [1,2,3,4,5,6,7,8,9], ss.getMyDependants(x)) for x in range(ss.CELLS)]
+    for cell, value in clues(puzzleIn):
+        gridOut[cell] = (0, [value], gridOut[cell][2])
+    ss.doNakedSingle(gridOut)
+    return gridOut
+
+def listEnd(gridIn):
+    return [(v, sorted(c)) for v, c, _ in gridIn]
+
+def listEngineEnd(puzzleIn):
+    grid = listGrid(puzzleIn)
+    while ss.updateGrid(grid) and ss.numOutstandingCells(grid) > 0:
+        pass
+    return listEnd(grid)
+
+def maskEnd(gridIn):
+    return [(v, list(bm.MASK_DIGITS[c])) for v, c in zip(gridIn.values, gridIn.cands)]
+
+def state(gridIn):
+    return (bytes(gridIn.values), bytes(gridIn.cands), bytes(gridIn.places))
+
+#============================================
+# Tests
+#============================================
+
+def testSweepMatchesListEngine(bundledGrid):
+    _, puzzle = bundledGrid
+    grid = bm.createGrid(clues(puzzle))
+    while bm.updateGrid(grid) and bm.numOutstandingCells(grid) > 0:
+        pass
+    assert maskEnd(grid) == listEngineEnd(puzzle)
+
+def testUpdateListGridMatchesListEngine(bundledGrid):
+    _, puzzle = bundledGrid
+    grid = listGrid(puzzle)
+    bm.updateListGrid(grid)
+    assert listEnd(grid) == listEngineEnd(puzzle)
+
+def testListGridRoundTrip(bundledGrid):
+    _, puzzle = bundledGrid
+    start = listGrid(puzzle)
+    grid = bm.fromListGrid(start)
+    assert maskEnd(grid) == listEnd(start)
+    assert listEnd(bm.toListGrid(grid)) == listEnd(start)
+
+def testPlacesFollowCandidates(bundledGrid):
+    # Every place mask must agree with the candidates of the cells in its unit
+    _, puzzle = bundledGrid
+    grid = bm.createGrid(clues(puzzle))
+    bm.updateGrid(grid)
+    for u, unit in enumerate(bm.UNITS):
+        for d in range(9):
+            expected = sum(1 << p for p, cell in enumerate(unit) if grid.cands[cell] >> d & 1)
+            assert grid.places[u * 9 + d] == expected
+
+def testRollbackUndoesChanges(bundledGrid):
+    _, puzzle = bundledGrid
+    grid = bm.createGrid(clues(puzzle))
+    before = state(grid)
+    mark = bm.checkpoint(grid)
+    # Guess the lowest candidate of the first unsolved cell, then carry on from there
+    cell = grid.values.index(0)
+    bm.removeCandidates(grid, cell, bm.ALL_CANDIDATES ^ (grid.cands[cell] & -grid.cands[cell]))
+    bm.solveCell(grid, cell)
+    bm.updateGrid(grid)
+    assert state(grid) != before
+    bm.rollback(grid, mark)
+    assert state(grid) == before
+    assert not grid.contradiction
+
+def testCopyGridIsIndependent(bundledGrid):
+    _, puzzle = bundledGrid
+    grid = bm.createGrid(clues(puzzle))
+    copy = bm.copyGrid(grid)
+    assert state(copy) == state(grid)
+    bm.updateGrid(copy)
+    assert state(copy) != state(grid)
+
+def testPackGridRoundTrip(bundledGrid):
+    _, puzzle = bundledGrid
+    grid = bm.createGrid(clues(puzzle))
+    bm.updateGrid(grid)
+    packed = bm.packGrid(grid)
+    assert len(packed) == bm.PACKED_SIZE
+    assert state(bm.unpackGrid(packed)) == state(grid)
+
+def testUnpackGridWrongSize():
+    with pytest.raises(ValueError, match="Packed grid should be"):
+        bm.unpackGrid(b"\0" * 10)
+
+@pytest.mark.parametrize("name", bm.STRATEGIES.names())
+def testTechniqueKeepsSolution(name, bundledGrids):
+    # Each technique on its own, from the givens of the bundled and hardest puzzles, must never remove a digit of the solution
+    with open(os.path.join(ROOT, "benchmarks", "corpora", "hardest.txt")) as f:
+        puzzles = list(bundledGrids.values()) + list(batchSolver.readPuzzles(f))
+    technique = bm.STRATEGIES.get(name).function
+    for puzzle in puzzles:
+        solution = batchSolver.solvePuzzle(puzzle)
+        grid = bm.createGrid(clues(puzzle))
+        while technique(grid) and not grid.contradiction:
+            pass
+        assert not bm.hasContradiction(grid)
+        assert all(v == int(s) if v else c >> (int(s) - 1) & 1 for v, c, s in zip(grid.values, grid.cands, solution))
@@ -0,0 +1,69 @@
+import os
+import pytest
+import bitmaskEngine as bm
+import backtrackSearch
+import batchSolver
+import solveTrace
+from conftest import ROOT
+
+#=============================================================================================================================================
+#
+#   The compiled kernel against pure Python: with bm.useKernel() on, sweeps, searches and traced solves (every event, in order) must be
+#   exactly the same as without it, on the bundled grids and the hardest corpus. Skipped if Numba isn't installed.
+#
+#==============================================================================================================================================
+
+def clues(puzzleIn):
+    return [(i, int(c)) for i, c in enumerate(puzzleIn) if c not in "-.0"]
+
+def puzzles(bundledGridsIn):
+    with open(os.path.join(ROOT, "benchmarks", "corpora", "hardest.txt")) as f:
+        return list(bundledGridsIn.values()) + list(batchSolver.readPuzzles(f))
+
+def sweepEnd(puzzleIn):
+    grid = bm.createGrid(clues(puzzleIn))
+    counts = []
+    while True:
+        counts.append(bm.updateGrid(grid))
+        if not counts[-1] or bm.numOutstandingCells(grid) == 0:
+            break
+    return bytes(grid.values), bytes(grid.cands), bytes(grid.places), counts
+
+def searchEnd(puzzleIn):
+    grid = bm.createGrid(clues(puzzleIn))
+    stats = backtrackSearch.newStats()
+    return backtrackSearch.search(grid, stats), bytes(grid.values), stats
+
+def traceEnd(puzzleIn):
+    summary = solveTrace.tracePuzzle(puzzleIn, "search", True)
+    return summary.events, summary.iterations, {name: c[:3] for name, c in summary.techniques.items()}
+
+def bothWays(functionIn, puzzlesIn):
+    # (with the kernel, in pure Python) results of functionIn for each puzzle
+    if not bm.useKernel(True):
+        pytest.skip("Numba isn't installed")
+    try:
+        compiled = [functionIn(p) for p in puzzlesIn]
+    finally:
+        bm.useKernel(False)
+    return compiled, [functionIn(p) for p in puzzlesIn]
+
+#============================================
+# Tests
+#============================================
+
+@pytest.mark.parametrize("function", [sweepEnd, searchEnd, traceEnd], ids=["sweep", "search", "trace"])
+def testKernelMatchesPurePython(bundledGrids, function):
+    compiled, pure = bothWays(function, puzzles(bundledGrids))
+    assert compiled == pure
+
+def testUseKernelSwitchesTechniques():
+    if not bm.useKernel(True):
+        pytest.skip("Numba isn't installed")
+    try:
+        assert bm.kernelInUse()
+        assert all(bm.STRATEGIES.get(name).function is f for name, f in bm.KERNEL_TECHNIQUES.items())
+    finally:
+        bm.useKernel(False)
+    assert not bm.kernelInUse()
+    assert all(bm.STRATEGIES.get(name).function is f for name, f in bm.PURE_TECHNIQUES.items())
@@ -0,0 +1,73 @@
+import pytest
+import sudukoSolver as ss
+import bitmaskEngine as bm
+import backtrackSearch
+import dancingLinks
+import scheduler
+import topology
+
+#=============================================================================================================================================
+#
+#   Dancing Links against the backtracking search: the same solutions from the givens, from a list grid and from a mask grid the
+#   techniques have stalled on, and the same solution counts. Run in pure Python (useKernel(False), the default).
+#
+#==============================================================================================================================================
+
+UNIQUE = "107600402000905000000400019080000004200000000704000200050040007006800000000000190"          # grid-e1
+NO_SOLUTION = "137600402000905000000400019080000004200000000704000200050040007006800000000000190"     # grid-e1, with a wrong 3
+TWO_SOLUTIONS = "001000073005600001700001000090810000530000046000065030000100004800009300940500700"   # grid-d1, less one clue
+
+def clues(puzzleIn):
+    return [(i, int(c)) for i, c in enumerate(puzzleIn) if c not in "-.0"]
+
+def searchSolution(puzzleIn):
+    grid = bm.createGrid(clues(puzzleIn))
+    assert backtrackSearch.search(grid)
+    return list(grid.values)
+
+#============================================
+# Tests
+#============================================
+
+def testSolveMatchesSearch(bundledGrid):
+    _, puzzle = bundledGrid
+    stats = dancingLinks.newStats()
+    assert dancingLinks.solve(clues(puzzle), stats) == searchSolution(puzzle)
+    assert stats["nodes"] >= 1
+
+def testSolveFromListAndMaskGrids(bundledGrid):
+    _, puzzle = bundledGrid
+    expected = searchSolution(puzzle)
+    listGrid = [(0, [1,2,3,4,5,6,7,8,9], ss.getMyDependants(x)) for x in range(ss.CELLS)]
+    for cell, value in clues(puzzle):
+        listGrid[cell] = (0, [value], listGrid[cell][2])
+    ss.doNakedSingle(listGrid)
+    assert dancingLinks.solveListGrid(listGrid) == expected
+
+    grid = bm.createGrid(clues(puzzle))
+    scheduler.propagate(grid)
+    assert dancingLinks.solveMaskGrid(grid) == expected
+
+def testSolveNoSolution():
+    assert dancingLinks.solve(clues(NO_SOLUTION)) is None
+
+@pytest.mark.parametrize("puzzle, count", [(NO_SOLUTION, 0), (UNIQUE, 1), (TWO_SOLUTIONS, 2)])
+def testCountSolutionsMatchesSearch(puzzle, count):
+    assert dancingLinks.countSolutions(clues(puzzle)) == count
+    assert backtrackSearch.countSolutions(bm.createGrid(clues(puzzle))) == count
+
+def testCountStopsAtLimit():
+    stats = dancingLinks.newStats()
+    assert dancingLinks.countSolutions([], 3, stats) == 3
+    assert stats["nodes"] < 500
+    with pytest.raises(ValueError, match="Solution limit must be at least 1"):
+        dancingLinks.countSolutions([], 0)
+
+def testFourByFour():
+    # A 4x4 grid from its first row alone - every row, column and mini-grid must hold 1-4
+    grid = topology.forSize(4)
+    candidates = [1 << d for d in range(4)] + [0xF] * 12
+    values = dancingLinks.solveCandidates(candidates, None, grid)
+    assert values[:4] == [1, 2, 3, 4]
+    assert all(sorted(values[cell] for cell in unit) == [1, 2, 3, 4] for unit in grid.units)
+    assert dancingLinks.countCandidates(candidates, 20, None, grid) == 12          # 288 4x4 grids, over 24 first rows
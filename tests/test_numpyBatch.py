@@ -0,0 +1,46 @@
+import os
+import pytest
+import batchSolver
+from conftest import ROOT
+
+pytest.importorskip("numpy")
+import numpyBatch
+
+#=============================================================================================================================================
+#
+#   The NumPy batch engine against the bitmask engine: a batch mixing the bundled grids, the hardest corpus, a puzzle with no solution
+#   and a solved grid must come back with the same solutions, and propagation must never remove a puzzle's solution from its candidates.
+#   Skipped if NumPy isn't installed.
+#
+#==============================================================================================================================================
+
+NO_SOLUTION = "137600402000905000000400019080000004200000000704000200050040007006800000000000190"     # grid-e1, with a wrong 3
+
+def hardestPuzzles():
+    with open(os.path.join(ROOT, "benchmarks", "corpora", "hardest.txt")) as f:
+        return list(batchSolver.readPuzzles(f))
+
+#============================================
+# Tests
+#============================================
+
+def testSolveBatchMatchesBitmaskEngine(bundledGrids):
+    puzzles = list(bundledGrids.values()) + hardestPuzzles() + [NO_SOLUTION]
+    expected = [batchSolver.solvePuzzle(p) for p in puzzles]
+    puzzles.append(expected[0])
+    expected.append(expected[0])
+    assert numpyBatch.solveBatch(puzzles) == expected
+
+def testSolveBatchEmpty():
+    assert numpyBatch.solveBatch([]) == []
+
+def testPropagateKeepsSolution(bundledGrids):
+    puzzles = list(bundledGrids.values()) + hardestPuzzles()
+    cands = numpyBatch.propagate(numpyBatch.parsePuzzles(puzzles))
+    for masks, puzzle in zip(cands.tolist(), puzzles):
+        solution = batchSolver.solvePuzzle(puzzle)
+        assert all(mask >> (int(d) - 1) & 1 for mask, d in zip(masks, solution))
+
+def testParsePuzzlesRejectsBadCharacter():
+    with pytest.raises(ValueError, match="Unexpected character"):
+        numpyBatch.parsePuzzles(["x" * 81])
@@ -0,0 +1,69 @@
+import random
+import pytest
+import dancingLinks
+import puzzleGenerator as pg
+
+#=============================================================================================================================================
+#
+#   Generated puzzles must have exactly one solution and be minimal (every clue needed), generation must be repeatable from the seed,
+#   the bundled grids must grade as the generator's header says, and asking for a grade that never comes up must give up.
+#
+#==============================================================================================================================================
+
+BUNDLED_GRADES = {"grid-m1": "easy", "grid-w1": "easy", "grid-h1": "easy", "grid-t1": "hard",
+                  "grid-e1": "diabolical", "grid-d1": "diabolical", "grid-d2": "diabolical"}
+
+def values(puzzleIn):
+    return [0 if c in "-.0" else int(c) for c in puzzleIn]
+
+def clues(puzzleIn):
+    return [(i, v) for i, v in enumerate(values(puzzleIn)) if v]
+
+@pytest.fixture(scope="module")
+def generated():
+    return list(pg.generate(4, seedIn=7))
+
+#============================================
+# Tests
+#============================================
+
+def testGeneratedPuzzlesAreUnique(generated):
+    for puzzle, grade in generated:
+        assert len(puzzle) == 81 and set(puzzle) <= set("0123456789")
+        assert dancingLinks.countSolutions(clues(puzzle), 2) == 1
+        assert grade in pg.GRADES
+        assert pg.gradePuzzle(values(puzzle)) == grade
+
+def testGeneratedPuzzlesAreMinimal(generated):
+    for puzzle, _ in generated:
+        given = clues(puzzle)
+        for i in range(len(given)):
+            assert dancingLinks.countSolutions(given[:i] + given[i + 1:], 2) == 2
+
+def testGenerateIsRepeatable(generated):
+    assert list(pg.generate(4, seedIn=7)) == generated
+    assert list(pg.generate(4, seedIn=8)) != generated
+
+def testGenerateFiltersByGrade():
+    for _, grade in pg.generate(3, seedIn=1, gradesIn={"easy"}):
+        assert grade == "easy"
+
+def testRandomSolutionIsComplete(solutionCheck):
+    solution = "".join(map(str, pg.randomSolution(random.Random(5))))
+    assert solutionCheck("0" * 81, solution)
+
+def testBundledGridGrades(bundledGrid):
+    name, puzzle = bundledGrid
+    assert pg.gradePuzzle(values(puzzle)) == BUNDLED_GRADES[name]
+
+def testGradeNoSolution():
+    with pytest.raises(ValueError, match="no solution"):
+        pg.gradePuzzle([1, 1] + [0] * 79)
+
+def testUnreachableGradeGivesUp(monkeypatch, tmp_path, capsys):
+    # As if no puzzle ever came out at the grade wanted
+    monkeypatch.setattr(pg, "generateBatch", lambda seedsIn, gradesIn=None: [])
+    with pytest.raises(ValueError, match=f"No hard puzzles in {pg.MAX_EMPTY_BATCHES * pg.BATCH_SIZE} tries"):
+        list(pg.generate(1, gradesIn={"hard"}))
+    assert pg.main(["-n", "1", "--grade", "hard", "-o", str(tmp_path / "puzzles.txt")]) == 1
+    assert "Aborting...." in capsys.readouterr().err
@@ -0,0 +1,106 @@
+import io
+import pytest
+import batchSolver
+import puzzleStore
+
+#=============================================================================================================================================
+#
+#   The puzzle store: records encode and decode losslessly, stores written and read back hold the same puzzles, the shards cover every
+#   record once, and solving a store (in one process or several) gives the same solutions as the batch solver.
+#
+#==============================================================================================================================================
+
+NO_SOLUTION = "11" + "0" * 79
+
+def zeroed(puzzleIn):
+    # The puzzle with '0' for blanks, as the store gives it back
+    return puzzleIn.translate(puzzleStore.BLANK_TABLE)
+
+def writeStore(pathIn, puzzlesIn):
+    with open(pathIn, "wb") as f:
+        return puzzleStore.writeStore(puzzlesIn, f)
+
+#============================================
+# Records
+#============================================
+
+def testEncodeDecode(bundledGrid):
+    _, puzzle = bundledGrid
+    record = puzzleStore.encode(puzzle)
+    assert len(record) == puzzleStore.RECORD_SIZE
+    assert puzzleStore.decode(record) == zeroed(puzzle)
+
+@pytest.mark.parametrize("records, size, expected", [(0, 4, []), (3, 4, [(0, 3)]), (8, 4, [(0, 4), (4, 8)]),
+                                                     (9, 4, [(0, 4), (4, 8), (8, 9)])])
+def testShardRanges(records, size, expected):
+    assert puzzleStore.shardRanges(records, size) == expected
+
+#============================================
+# Stores
+#============================================
+
+def testWriteAndRead(tmp_path, bundledGrids):
+    puzzles = [zeroed(p) for p in bundledGrids.values()]
+    path = tmp_path / "puzzles.sdks"
+    assert writeStore(path, puzzles + [None]) == len(puzzles) + 1
+    with puzzleStore.PuzzleStore(str(path)) as store:
+        assert store.kind == puzzleStore.KIND_PUZZLES
+        assert list(store) == puzzles + [puzzleStore.BLANK_PUZZLE]
+        assert list(store.puzzles(2, 4)) == puzzles[2:4]
+        assert store[1] == puzzles[1]
+        with pytest.raises(IndexError):
+            store[len(puzzles) + 1]
+
+def testWriteInPlace(tmp_path, bundledGrids):
+    path = str(tmp_path / "solutions.sdks")
+    puzzleStore.createStore(path, 3)
+    solution = batchSolver.solvePuzzle(bundledGrids["grid-e1"])
+    with puzzleStore.PuzzleStore(path, True) as store:
+        store[1] = solution
+    with puzzleStore.PuzzleStore(path) as store:
+        assert store.kind == puzzleStore.KIND_SOLUTIONS
+        assert list(store) == [puzzleStore.BLANK_PUZZLE, solution, puzzleStore.BLANK_PUZZLE]
+
+@pytest.mark.parametrize("contents, message", [(b"", "is empty"), (b"SDKS", "too short"), (b"XXXX" + bytes(60), "bad magic"),
+                                               (puzzleStore.packHeader(0, 2), "truncated")])
+def testBadStore(tmp_path, contents, message):
+    path = tmp_path / "bad.sdks"
+    path.write_bytes(contents)
+    with pytest.raises(ValueError, match=message):
+        puzzleStore.PuzzleStore(str(path))
+
+#============================================
+# Solving
+#============================================
+
+@pytest.mark.parametrize("workers", [1, 2])
+def testSolveStore(tmp_path, bundledGrids, workers):
+    puzzles = list(bundledGrids.values()) + [NO_SOLUTION]
+    puzzlePath = str(tmp_path / "puzzles.sdks")
+    solutionPath = str(tmp_path / "solutions.sdks")
+    writeStore(puzzlePath, puzzles)
+    assert puzzleStore.solveStore(puzzlePath, solutionPath, workers, 3) == (len(puzzles) - 1, 1)
+    expected = [batchSolver.solvePuzzle(p) for p in puzzles]
+    with puzzleStore.PuzzleStore(solutionPath) as solutions:
+        assert list(solutions) == [puzzleStore.BLANK_PUZZLE if s is None else s for s in expected]
+
+def testConvertSolveExport(tmp_path, bundledGrids):
+    # The command line round trip - text to store, solved, and back to text as batchSolver writes it
+    puzzles = list(bundledGrids.values()) + [NO_SOLUTION]
+    text = tmp_path / "puzzles.txt"
+    text.write_text("\n".join(puzzles) + "\n")
+    store = str(tmp_path / "puzzles.sdks")
+    solutions = str(tmp_path / "solutions.sdks")
+    output = tmp_path / "solutions.txt"
+    assert puzzleStore.main(["convert", str(text), store]) == 0
+    assert puzzleStore.main(["solve", store, solutions]) == 0
+    assert puzzleStore.main(["export", store, "--solutions", solutions, "-o", str(output)]) == 0
+    expected = io.StringIO()
+    batchSolver.writeSolutions(batchSolver.solveStream(puzzles), expected)
+    assert output.read_text() == expected.getvalue()
+
+def testSolveRejectsSolutionsStore(tmp_path, capsys):
+    path = str(tmp_path / "solutions.sdks")
+    puzzleStore.createStore(path, 1)
+    assert puzzleStore.main(["solve", path, str(tmp_path / "out.sdks")]) == 1
+    assert "holds solutions, not puzzles" in capsys.readouterr().err
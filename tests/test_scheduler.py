@@ -0,0 +1,77 @@
+import pytest
+import sudukoSolver as ss
+import bitmaskEngine as bm
+import scheduler
+import strategyRegistry
+from strategyRegistry import SCOPE_UNITS, SCOPE_BOXES, SCOPE_LINES, SCOPE_DIGITS
+
+#=============================================================================================================================================
+#
+#   The propagation scheduler: it must end on the same grid as the list engine's updateGrid loop, and only hand each technique the
+#   units and digits changed since it last ran.
+#
+#==============================================================================================================================================
+
+NO_SOLUTION = "137600402000905000000400019080000004200000000704000200050040007006800000000000190"     # grid-e1, with a wrong 3
+
+def clues(puzzleIn):
+    return [(i, int(c)) for i, c in enumerate(puzzleIn) if c not in "-.0"]
+
+def listEngineEnd(puzzleIn):
+    grid = [(0, [1,2,3,4,5,6,7,8,9], ss.getMyDependants(x)) for x in range(ss.CELLS)]
+    for cell, value in clues(puzzleIn):
+        grid[cell] = (0, [value], grid[cell][2])
+    ss.doNakedSingle(grid)
+    while ss.updateGrid(grid) and ss.numOutstandingCells(grid) > 0:
+        pass
+    return [(v, sorted(c)) for v, c, _ in grid]
+
+def spyRegistry(scopeIn):
+    # A registry with one technique that makes no changes, recording what it is handed each time it runs
+    calls = []
+    registry = strategyRegistry.Registry()
+    registry.register("spy", lambda gridIn, *argsIn: calls.append(argsIn) or 0, 0, scopeIn)
+    return registry, calls
+
+def handed(callsIn):
+    # What each call was handed, with unit lists and tuples made alike
+    return [arg if isinstance(arg, int) else list(arg) for call in callsIn for arg in call]
+
+#============================================
+# Tests
+#============================================
+
+def testPropagateMatchesListEngine(bundledGrid):
+    _, puzzle = bundledGrid
+    grid = bm.createGrid(clues(puzzle))
+    assert scheduler.propagate(grid)
+    assert [(v, list(bm.MASK_DIGITS[c])) for v, c in zip(grid.values, grid.cands)] == listEngineEnd(puzzle)
+
+def testPropagateReportsContradiction():
+    assert not scheduler.propagate(bm.createGrid(clues(NO_SOLUTION)))
+
+def testRemovalMarksUnitsAndDigitsDirty():
+    grid = bm.MaskGrid()
+    grid.dirtyUnits = 0
+    grid.dirtyDigits = 0
+    bm.removeCandidates(grid, 40, 0b10100)
+    assert grid.dirtyUnits == (1 << 4) | (1 << (9 + 4)) | (1 << (18 + 4))
+    assert grid.dirtyDigits == 0b10100
+
+@pytest.mark.parametrize("scope, expected", [(SCOPE_UNITS, [4, 13, 22]), (SCOPE_BOXES, [4]), (SCOPE_LINES, [4, 13]),
+                                             (SCOPE_DIGITS, 0b10100)])
+def testOnlyDirtyPartHandedOn(scope, expected):
+    registry, calls = spyRegistry(scope)
+    grid = bm.MaskGrid()
+    assert scheduler.propagate(grid, registry)
+    assert grid.dirtyUnits == 0 and grid.dirtyDigits == 0
+
+    # Nothing has changed since, so the technique isn't run at all
+    calls.clear()
+    assert scheduler.propagate(grid, registry)
+    assert calls == []
+
+    # Only what the change touched - cell 40 is in row 4, column 4 and mini-grid 4
+    bm.removeCandidates(grid, 40, 0b10100)
+    assert scheduler.propagate(grid, registry)
+    assert handed(calls) == [expected]
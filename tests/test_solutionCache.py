@@ -0,0 +1,85 @@
+import random
+import canonicalForm
+import batchSolver
+from solutionCache import SolutionCache
+
+#=============================================================================================================================================
+#
+#   The solution cache is keyed by canonical form, so any puzzle equivalent to one already solved is a hit, and the solution comes back
+#   in the new puzzle's frame.
+#
+#==============================================================================================================================================
+
+class CountingSolver:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, puzzleIn):
+        self.calls += 1
+        return batchSolver.solvePuzzle(puzzleIn)
+
+#============================================
+# Tests
+#============================================
+
+def testEquivalentPuzzlesShareCanonicalForm(bundledGrid):
+    _, puzzle = bundledGrid
+    rng = random.Random(1)
+    key = canonicalForm.canonicalize(puzzle)[0]
+    for _ in range(5):
+        assert canonicalForm.canonicalize(canonicalForm.randomEquivalent(puzzle, rng))[0] == key
+
+def testCanonicalRoundTrip(bundledGrid):
+    _, puzzle = bundledGrid
+    solution = batchSolver.solvePuzzle(puzzle)
+    _, cellMap, labels = canonicalForm.canonicalize(puzzle)
+    assert canonicalForm.fromCanonical(canonicalForm.toCanonical(solution, cellMap, labels), cellMap, labels) == solution
+
+def testHitOnEquivalentPuzzle(bundledGrid, solutionCheck):
+    _, puzzle = bundledGrid
+    cache = SolutionCache()
+    solver = CountingSolver()
+    assert solutionCheck(puzzle, cache.solve(puzzle, solver))
+
+    rng = random.Random(2)
+    for _ in range(5):
+        equivalent = canonicalForm.randomEquivalent(puzzle, rng)
+        assert solutionCheck(equivalent, cache.solve(equivalent, solver))
+    assert solver.calls == 1
+    assert cache.stats()["hits"] == 5
+    assert cache.stats()["misses"] == 1
+
+def testNoSolutionIsCached(bundledGrids):
+    # grid-e1 with a second 1 in its first row
+    puzzle = bundledGrids["grid-e1"]
+    puzzle = puzzle[:1] + "1" + puzzle[2:]
+    cache = SolutionCache()
+    solver = CountingSolver()
+    assert cache.solve(puzzle, solver) is None
+    assert cache.solve(puzzle, solver) is None
+    assert solver.calls == 1
+
+def testEviction(bundledGrids):
+    cache = SolutionCache(maxSizeIn=1)
+    solver = CountingSolver()
+    first, second = bundledGrids["grid-e1"], bundledGrids["grid-d1"]
+    cache.solve(first, solver)
+    cache.solve(second, solver)
+    cache.solve(first, solver)
+    assert solver.calls == 3
+    assert cache.stats()["evictions"] == 2
+
+def testDiskTier(tmp_path, bundledGrids, solutionCheck):
+    path = str(tmp_path / "solutions.db")
+    puzzle = bundledGrids["grid-t1"]
+    cache = SolutionCache(pathIn=path)
+    cache.solve(puzzle, CountingSolver())
+    cache.close()
+
+    cache = SolutionCache(pathIn=path)
+    solver = CountingSolver()
+    equivalent = canonicalForm.randomEquivalent(puzzle, random.Random(3))
+    assert solutionCheck(equivalent, cache.solve(equivalent, solver))
+    cache.close()
+    assert solver.calls == 0
+    assert cache.stats()["diskHits"] == 1
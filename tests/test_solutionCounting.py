@@ -0,0 +1,83 @@
+import pytest
+import sudukoSolver as ss
+import bitmaskEngine as bm
+import backtrackSearch
+
+#=============================================================================================================================================
+#
+#   Solution counting and contradictions: backtrackSearch.countSolutions() with no, one and two solutions and its early stop at
+#   limitIn, and the list engine reporting a cell left with no candidates (solveCell / hasContradiction).
+#
+#==============================================================================================================================================
+
+UNIQUE = "107600402000905000000400019080000004200000000704000200050040007006800000000000190"          # grid-e1
+NO_SOLUTION = "137600402000905000000400019080000004200000000704000200050040007006800000000000190"     # grid-e1, with a wrong 3
+TWO_SOLUTIONS = "001000073005600001700001000090810000530000046000065030000100004800009300940500700"   # grid-d1, less one clue
+
+def clues(puzzleIn):
+    return [(i, int(c)) for i, c in enumerate(puzzleIn) if c != "0"]
+
+def emptyListGrid():
+    return [(0, [1,2,3,4,5,6,7,8,9], ss.getMyDependants(x)) for x in range(ss.CELLS)]
+
+#============================================
+# countSolutions
+#============================================
+
+@pytest.mark.parametrize("puzzle, count", [(NO_SOLUTION, 0), (UNIQUE, 1), (TWO_SOLUTIONS, 2)])
+def testCountSolutions(puzzle, count):
+    assert backtrackSearch.countSolutions(bm.createGrid(clues(puzzle))) == count
+
+def testCountSolutionsLimit():
+    assert backtrackSearch.countSolutions(bm.createGrid(clues(TWO_SOLUTIONS)), 1) == 1
+    assert backtrackSearch.countSolutions(bm.createGrid(clues(TWO_SOLUTIONS)), 5) == 2
+
+def testCountSolutionsStopsAtLimit():
+    # The empty grid has billions of solutions - counting must stop as soon as the limit is reached
+    stats = backtrackSearch.newStats()
+    assert backtrackSearch.countSolutions(bm.createGrid([]), 3, stats) == 3
+    assert stats["nodes"] < 200
+
+def testCountSolutionsLeavesGridAsPropagated():
+    grid = bm.createGrid(clues(TWO_SOLUTIONS))
+    backtrackSearch.propagate(grid)
+    values = list(grid.values)
+    cands = list(grid.cands)
+    backtrackSearch.countSolutions(grid)
+    assert list(grid.values) == values and list(grid.cands) == cands
+    assert grid.trail is None
+
+def testCountSolutionsBadLimit():
+    with pytest.raises(ValueError, match="at least 1"):
+        backtrackSearch.countSolutions(bm.createGrid([]), 0)
+
+#============================================
+# Contradictions in the list engine
+#============================================
+
+def testSolveCellRemovesValueFromDependants():
+    grid = emptyListGrid()
+    grid[0] = (0, [5], grid[0][2])
+    ss.solveCell(grid, 0)
+    assert grid[0][:2] == (5, [])
+    for dependant in grid[0][2]:
+        assert 5 not in grid[dependant][1]
+    assert 5 in grid[80][1]
+
+def testSolveCellRaisesWhenDependantHasNoCandidates():
+    grid = emptyListGrid()
+    grid[0] = (0, [5], grid[0][2])
+    grid[1] = (0, [5], grid[1][2])
+    with pytest.raises(ValueError, match="cell 1 has no candidates"):
+        ss.solveCell(grid, 0)
+    # Every dependant is still updated, not just those before the one emptied
+    for dependant in grid[0][2]:
+        assert 5 not in grid[dependant][1]
+
+def testHasContradiction():
+    grid = emptyListGrid()
+    assert not ss.hasContradiction(grid)
+    # Take 9 out of the whole of row 0 - nowhere left for it in the row
+    for cell in range(9):
+        grid[cell] = (0, list(range(1, 9)), grid[cell][2])
+    assert ss.hasContradiction(grid)
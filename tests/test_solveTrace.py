@@ -0,0 +1,96 @@
+import io
+import pytest
+import batchSolver
+import solveTrace
+
+#=============================================================================================================================================
+#
+#   Solve tracing: traced solves give the same solutions as untraced ones, the events account for every given, placement and backtrack,
+#   the JSON lines trace reads back as written, and the totals come out in the Prometheus text format.
+#
+#==============================================================================================================================================
+
+NO_SOLUTION = "137600402000905000000400019080000004200000000704000200050040007006800000000000190"     # grid-e1, with a wrong 3
+
+def samples(textIn):
+    # {metric name with labels: value} from Prometheus text
+    return {name: float(value) for name, value in (line.rsplit(" ", 1) for line in textIn.splitlines() if not line.startswith("#"))}
+
+#============================================
+# Tracing
+#============================================
+
+@pytest.mark.parametrize("backend", ["search", "dlx"])
+def testTracedSolutionMatches(bundledGrid, backend):
+    _, puzzle = bundledGrid
+    trace = solveTrace.tracePuzzle(puzzle, backend)
+    assert trace.solution == batchSolver.solvePuzzle(puzzle)
+    assert trace.events == []
+    assert set(trace.phases) <= set(solveTrace.PHASES)
+    assert trace.seconds >= sum(trace.phases.values()) * 0.99
+
+def testEvents(bundledGrid):
+    _, puzzle = bundledGrid
+    trace = solveTrace.tracePuzzle(puzzle, "search", True)
+    givens = {cell for cell, c in enumerate(puzzle) if c not in solveTrace.BLANKS}
+    assert {e[1] for e in trace.events if e[3] == "given"} == givens
+    assert sum(1 for e in trace.events if e[0] == "backtrack") == trace.backtracks
+
+    # Every cell not given is placed, and the last placement of each cell (earlier ones may have been backed out of) is its solution
+    placed = {}
+    for kind, cell, digit, by, depth in trace.events:
+        if kind == "place":
+            placed[cell] = digit
+    assert all(str(placed[cell]) == trace.solution[cell] for cell in range(81) if puzzle[cell] in solveTrace.BLANKS)
+    if not trace.nodes:
+        assert all(e[4] == 0 for e in trace.events)
+
+def testNoSolution():
+    trace = solveTrace.tracePuzzle(NO_SOLUTION)
+    assert trace.solution is None
+    assert not trace.summary()["solved"]
+
+#============================================
+# Exporters
+#============================================
+
+def testJsonLinesRoundTrip(bundledGrids):
+    fileOut = io.StringIO()
+    summaries = []
+    for number, puzzle in enumerate(bundledGrids.values()):
+        trace = solveTrace.tracePuzzle(puzzle, "search", True)
+        solveTrace.writeJsonLines(trace, fileOut, number)
+        summaries.append(dict({"type": "solve", "number": number}, **trace.summary()))
+    fileOut.seek(0)
+    assert list(solveTrace.readJsonLines(fileOut)) == summaries
+
+def testReadJsonLinesRejectsBadLine():
+    with pytest.raises(ValueError, match="Line 2: not JSON"):
+        list(solveTrace.readJsonLines(io.StringIO('{"type": "solve"}\nnot json\n')))
+
+def testPrometheusText(bundledGrids):
+    totals = solveTrace.TraceTotals()
+    puzzles = list(bundledGrids.values()) + [NO_SOLUTION]
+    for puzzle in puzzles:
+        totals.add(solveTrace.tracePuzzle(puzzle).summary())
+    metrics = samples(totals.prometheusText())
+    assert metrics['suduko_solves_total{result="solved"}'] == len(puzzles) - 1
+    assert metrics['suduko_solves_total{result="unsolved"}'] == 1
+    assert metrics["suduko_solve_seconds_count"] == len(puzzles)
+    assert metrics['suduko_solve_seconds_bucket{le="+Inf"}'] == len(puzzles)
+    buckets = [metrics[f'suduko_solve_seconds_bucket{{le="{b!r}"}}'] for b in solveTrace.SOLVE_SECONDS_BUCKETS]
+    assert buckets == sorted(buckets)
+    assert metrics['suduko_technique_calls_total{technique="nakedSingle"}'] > 0
+
+def testMainWritesMetrics(tmp_path, bundledGrids):
+    tracePath = tmp_path / "trace.jsonl"
+    with open(tracePath, "w") as f:
+        for number, puzzle in enumerate(bundledGrids.values()):
+            solveTrace.writeJsonLines(solveTrace.tracePuzzle(puzzle), f, number)
+    metricsPath = tmp_path / "metrics.prom"
+    assert solveTrace.main([str(tracePath), "--metrics", str(metricsPath)]) == 0
+    assert samples(metricsPath.read_text())["suduko_solve_seconds_count"] == len(bundledGrids)
+
+def testMainAbortsOnMissingFile(tmp_path, capsys):
+    assert solveTrace.main([str(tmp_path / "nofile.jsonl")]) == 1
+    assert "Aborting...." in capsys.readouterr().err
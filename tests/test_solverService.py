@@ -0,0 +1,133 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import batchSolver
+import solverService
+from solverService import BatchingSolver, HttpError, SolverService
+
+#=============================================================================================================================================
+#
+#   The solver service: puzzles arriving together are solved in batches, requests time out and are turned away when the queue is full,
+#   batches in flight are waited for on shutdown, and the HTTP side answers /solve and /stats. A thread pool stands in for the process
+#   pool, so batchSolver.solveChunk can be slowed down in place.
+#
+#==============================================================================================================================================
+
+PUZZLE = "107600402000905000000400019080000004200000000704000200050040007006800000000000190"          # grid-e1
+
+def runService(coroutineIn, batchSizeIn=4, batchWaitIn=0.05, queueSizeIn=64):
+    # Runs coroutineIn(solver) with a BatchingSolver and its batcher task, stopping them afterwards. Returns what it returns.
+    async def body():
+        with ThreadPoolExecutor(2) as pool:
+            solver = BatchingSolver(pool, 2, "bitmask", batchSizeIn, batchWaitIn, queueSizeIn)
+            batcher = asyncio.create_task(solver.run())
+            try:
+                return await coroutineIn(solver)
+            finally:
+                batcher.cancel()
+                await solver.drain()
+    return asyncio.run(body())
+
+def slowSolveChunk(monkeypatch, secondsIn):
+    solveChunk = batchSolver.solveChunk
+    def slow(puzzlesIn, engineIn="bitmask"):
+        time.sleep(secondsIn)
+        return solveChunk(puzzlesIn, engineIn)
+    monkeypatch.setattr(batchSolver, "solveChunk", slow)
+
+#============================================
+# Batching
+#============================================
+
+def testPuzzlesAreBatched(bundledGrids, solutionCheck):
+    puzzles = list(bundledGrids.values()) + [PUZZLE]
+
+    async def solveAll(solverIn):
+        return await asyncio.gather(*(solverIn.solve(p, 5.0) for p in puzzles)), dict(solverIn.stats)
+
+    solutions, stats = runService(solveAll)
+    assert all(solutionCheck(p, s) for p, s in zip(puzzles, solutions))
+    assert stats["batchedPuzzles"] == stats["solved"] == len(puzzles)
+    assert stats["batches"] == 2                                    # 8 puzzles, 4 at a time
+
+def testNoSolution():
+    async def solveOne(solverIn):
+        return await solverIn.solve("11" + "0" * 79, 5.0), solverIn.stats["noSolution"]
+
+    assert runService(solveOne) == (None, 1)
+
+def testTimeout(monkeypatch):
+    slowSolveChunk(monkeypatch, 0.3)
+
+    async def solveOne(solverIn):
+        with pytest.raises(HttpError) as e:
+            await solverIn.solve(PUZZLE, 0.05)
+        return e.value.status, solverIn.stats["timedOut"]
+
+    assert runService(solveOne, batchWaitIn=0) == (504, 1)
+
+def testQueueFull():
+    async def solveTwo(solverIn):
+        # Nothing is taken off the queue while this runs, so the second puzzle finds it full
+        first = solverIn.submit(PUZZLE)
+        with pytest.raises(HttpError) as e:
+            await solverIn.solve(PUZZLE, 5.0)
+        first.cancel()
+        return e.value.status, solverIn.stats["rejected"]
+
+    async def body():
+        with ThreadPoolExecutor(1) as pool:
+            return await solveTwo(BatchingSolver(pool, 1, queueSizeIn=1))
+
+    assert asyncio.run(body()) == (503, 1)
+
+def testDrainWaitsForBatchesInFlight(monkeypatch):
+    slowSolveChunk(monkeypatch, 0.2)
+
+    async def stopEarly(solverIn):
+        future = solverIn.submit(PUZZLE)
+        while not solverIn.inFlight:
+            await asyncio.sleep(0.01)
+        return future
+
+    # runService() cancels the batcher and drains as soon as the batch is in flight, and the batch still completes
+    assert runService(stopEarly, batchWaitIn=0).result() is not None
+
+#============================================
+# HTTP
+#============================================
+
+async def request(portIn, methodIn, pathIn, payloadIn=None):
+    # Returns (status, payload) for a request on its own connection
+    reader, writer = await asyncio.open_connection("127.0.0.1", portIn)
+    body = b"" if payloadIn is None else json.dumps(payloadIn).encode()
+    writer.write(f"{methodIn} {pathIn} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+def testHttp(solutionCheck):
+    async def exchange(solverIn):
+        server = await asyncio.start_server(SolverService(solverIn).handleConnection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return [await request(port, "POST", "/solve", {"puzzle": PUZZLE}),
+                    await request(port, "POST", "/solve", {"puzzle": "123"}),
+                    await request(port, "GET", "/solve"),
+                    await request(port, "GET", "/nowhere"),
+                    await request(port, "GET", "/stats")]
+
+    solved, bad, wrongMethod, missing, stats = runService(exchange)
+    assert solved[0] == 200 and solved[1]["solved"] and solutionCheck(PUZZLE, solved[1]["solution"])
+    assert bad[0] == 400 and "error" in bad[1]
+    assert wrongMethod[0] == 405
+    assert missing[0] == 404
+    assert stats[0] == 200 and stats[1]["requests"] == 1 and stats[1]["queued"] == 0
+
+def testMainRejectsBadOptions():
+    with pytest.raises(SystemExit):
+        solverService.main(["--batch-size", "0"])
@@ -0,0 +1,88 @@
+import json
+import pytest
+import bitmaskEngine as bm
+import backtrackSearch
+import strategyRegistry
+
+#=============================================================================================================================================
+#
+#   The strategy registry: configs (dicts and JSON files) enable, disable, reorder and re-tier techniques, bad ones are rejected, and
+#   every call is counted in the profile. bm.STRATEGIES is put back as it was after each test.
+#
+#==============================================================================================================================================
+
+def clues(puzzleIn):
+    return [(i, int(c)) for i, c in enumerate(puzzleIn) if c not in "-.0"]
+
+def counting(countIn):
+    return lambda gridIn, *argsIn: countIn
+
+@pytest.fixture
+def registry():
+    registryOut = strategyRegistry.Registry()
+    registryOut.register("a", counting(1), 0)
+    registryOut.register("b", counting(0), 1)
+    registryOut.register("c", counting(2), 1)
+    return registryOut
+
+@pytest.fixture
+def engineStrategies():
+    # bm.STRATEGIES, restored afterwards
+    saved = [(s, s.tier, s.enabled) for s in bm.STRATEGIES.strategies]
+    yield bm.STRATEGIES
+    bm.STRATEGIES.strategies = [s for s, _, _ in saved]
+    for s, tier, enabled in saved:
+        s.tier = tier
+        s.enabled = enabled
+    bm.STRATEGIES.tierCache = None
+    bm.STRATEGIES.resetStats()
+
+#============================================
+# Tests
+#============================================
+
+def testConfigure(registry):
+    registry.configure({"order": ["c"], "disable": ["a"], "tiers": {"b": 0}})
+    assert registry.names() == ["c", "a", "b"]
+    assert [s.name for s in registry.active()] == ["c", "b"]
+    assert [[s.name for s in tier] for tier in registry.tiers()] == [["b"], ["c"]]
+    registry.configure({"enable": ["a"]})
+    assert [[s.name for s in tier] for tier in registry.tiers()] == [["a", "b"], ["c"]]
+
+def testLoadConfig(tmp_path, registry):
+    path = tmp_path / "strategies.json"
+    path.write_text(json.dumps({"order": ["b", "a"], "disable": ["c"]}))
+    registry.loadConfig(str(path))
+    assert registry.names() == ["b", "a", "c"]
+    assert not registry.get("c").enabled
+
+@pytest.mark.parametrize("config, message", [({"orders": []}, "Unknown strategy config setting"),
+                                             ({"disable": ["d"]}, "Unknown technique 'd'"),
+                                             ({"order": ["a", "x"]}, "Unknown technique 'x'")])
+def testConfigureRejects(registry, config, message):
+    with pytest.raises(ValueError, match=message):
+        registry.configure(config)
+
+def testRegisterTwice(registry):
+    with pytest.raises(ValueError, match="already registered"):
+        registry.register("a", counting(0))
+
+def testRunAllCountsCalls(registry):
+    registry.setEnabled("b", False)
+    assert registry.runAll(None) == 3
+    report = {r["name"]: r for r in registry.report()}
+    assert (report["a"]["calls"], report["b"]["calls"], report["c"]["calls"]) == (1, 0, 1)
+    assert report["c"]["eliminations"] == 2
+    assert "b (off)" in registry.formatReport()
+    registry.resetStats()
+    assert all(r["calls"] == 0 for r in registry.report())
+
+def testReorderedEngineStillSolves(engineStrategies, bundledGrid, solutionCheck):
+    # Any order and tiering of the techniques must still give the solution
+    _, puzzle = bundledGrid
+    engineStrategies.configure({"order": list(reversed(engineStrategies.names())), "tiers": {"nakedSingle": 3},
+                                "disable": ["hiddenSingles"]})
+    grid = bm.createGrid(clues(puzzle))
+    assert backtrackSearch.search(grid)
+    assert solutionCheck(puzzle, "".join(map(str, grid.values)))
+    assert sum(r["calls"] for r in engineStrategies.report()) > 0
@@ -0,0 +1,74 @@
+import subprocess
+import sys
+import pytest
+import sudukoSolver as ss
+from conftest import ROOT
+
+#=============================================================================================================================================
+#
+#   The library API: importing sudukoSolver does nothing but define things, and puzzleString() / solve() / solveMany() take puzzles in
+#   any of the forms they accept and reject anything else.
+#
+#==============================================================================================================================================
+
+PUZZLE = "1-76--4-2---9-5------4---19-8------42--------7-4---2---5--4---7--68-----------19-"
+
+#============================================
+# Import
+#============================================
+
+def testImportHasNoSideEffects(tmp_path):
+    # Run from a directory with no grid.txt - nothing is read, drawn or printed
+    result = subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {ROOT!r}); import sudukoSolver"], cwd=tmp_path,
+                            capture_output=True, text=True)
+    assert result.returncode == 0
+    assert result.stdout == "" and result.stderr == ""
+
+#============================================
+# puzzleString
+#============================================
+
+def testPuzzleStringBlanksAndWhitespace():
+    expected = PUZZLE.replace("-", "0")
+    assert ss.puzzleString(PUZZLE) == expected
+    assert ss.puzzleString(PUZZLE.replace("-", ".")) == expected
+    assert ss.puzzleString("\n".join(PUZZLE[r * 9: (r * 9) + 9] for r in range(9))) == expected
+
+def testPuzzleStringValues():
+    values = [0 if c == "-" else int(c) for c in PUZZLE]
+    assert ss.puzzleString(values) == PUZZLE.replace("-", "0")
+
+@pytest.mark.parametrize("puzzle", [PUZZLE[:80], PUZZLE + "1", PUZZLE[:80] + "x", PUZZLE[:80] + "١", [0] * 80, [0] * 80 + [10]])
+def testPuzzleStringRejects(puzzle):
+    with pytest.raises(ValueError, match="A puzzle should be 81 cells"):
+        ss.puzzleString(puzzle)
+
+#============================================
+# solve / solveMany
+#============================================
+
+@pytest.mark.parametrize("engine", ss.ENGINES)
+def testSolve(engine, solutionCheck):
+    result = ss.solve(PUZZLE, engine)
+    assert result.solved
+    assert solutionCheck(PUZZLE, result.solution)
+    assert result.rows()[0] == [int(c) for c in result.solution[:9]]
+    assert result.seconds >= 0
+
+def testSolveNoSolution():
+    # Two 1s in the first row
+    result = ss.solve("11" + "0" * 79)
+    assert not result.solved
+    assert result.solution is None
+    assert result.rows()[0] == [1, 1] + [0] * 7
+
+def testSolveUnknownEngine():
+    with pytest.raises(ValueError, match="Unknown engine"):
+        ss.solve(PUZZLE, "quantum")
+
+@pytest.mark.parametrize("engine, workers", [("bitmask", 1), ("dlx", 2)])
+def testSolveMany(bundledGrids, engine, workers):
+    puzzles = list(bundledGrids.values())
+    results = list(ss.solveMany(puzzles, engine, workers))
+    assert [r.puzzle for r in results] == [ss.puzzleString(p) for p in puzzles]
+    assert [r.solution for r in results] == [ss.solve(p).solution for p in puzzles]
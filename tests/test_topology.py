@@ -0,0 +1,58 @@
+import pytest
+import topology
+
+#=============================================================================================================================================
+#
+#   The topology tables against the geometry worked out directly from row / column coordinates, for 4x4, 9x9 and 16x16 grids.
+#
+#==============================================================================================================================================
+
+@pytest.fixture(params=[4, 9, 16])
+def grid(request):
+    return topology.forSize(request.param)
+
+def rowCol(gridIn, cellIn):
+    return divmod(cellIn, gridIn.size)
+
+def sameBox(gridIn, aIn, bIn):
+    (ra, ca), (rb, cb) = rowCol(gridIn, aIn), rowCol(gridIn, bIn)
+    return ra // gridIn.box == rb // gridIn.box and ca // gridIn.box == cb // gridIn.box
+
+#============================================
+# Tests
+#============================================
+
+def testUnits(grid):
+    assert len(grid.units) == 3 * grid.size
+    for unit in grid.units:
+        assert len(unit) == grid.size == len(set(unit))
+    for cell in range(grid.cells):
+        row, col = rowCol(grid, cell)
+        assert cell in grid.rowCells[row] and cell in grid.colCells[col]
+        assert all(sameBox(grid, cell, x) for x in grid.miniGridCells[grid.miniGridOfCell[cell]])
+        assert [cell in grid.units[u] for u in grid.cellUnits[cell]] == [True] * 3
+
+def testPeers(grid):
+    for cell in range(grid.cells):
+        row, col = rowCol(grid, cell)
+        expected = [x for x in range(grid.cells)
+                    if x != cell and (rowCol(grid, x)[0] == row or rowCol(grid, x)[1] == col or sameBox(grid, cell, x))]
+        assert list(grid.peers[cell]) == expected
+        assert len(expected) == (3 * grid.size) - (2 * grid.box) - 1
+
+def testMiniGridRowsAndCols(grid):
+    for b, cells in enumerate(grid.miniGridCells):
+        assert sorted(x for line in grid.miniGridRows[b] for x in line) == sorted(cells)
+        assert sorted(x for line in grid.miniGridCols[b] for x in line) == sorted(cells)
+        assert all(len({rowCol(grid, x)[0] for x in line}) == 1 for line in grid.miniGridRows[b])
+        assert all(len({rowCol(grid, x)[1] for x in line}) == 1 for line in grid.miniGridCols[b])
+
+def testStandardTables():
+    assert topology.STANDARD is topology.forSize(9)
+    assert topology.CELLS == 81
+    assert topology.MINI_GRID_CELLS[4] == (30, 31, 32, 39, 40, 41, 48, 49, 50)
+
+@pytest.mark.parametrize("size", [0, 1, 8, 10])
+def testForSizeRejects(size):
+    with pytest.raises(ValueError):
+        topology.forSize(size)
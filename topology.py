@@ -0,0 +1,91 @@
+#=============================================================================================================================================
+#
+#   Grid Topology
+#   -------------
+#
+#   The geometry of the grid never changes, so every row, column, mini-grid, mini-row / mini-col and dependant list is worked out once
+#   here, as tuples. The techniques just index into these rather than rebuilding the lists each time round their loops.
+#
+#   Topology(boxIn) builds the tables for a grid of any size: a box (mini-grid) of boxIn x boxIn cells, so a grid of size = boxIn * boxIn
+#   rows, columns, mini-grids and digits (2 -> 4x4, 3 -> 9x9, 4 -> 16x16, 5 -> 25x25). forSize() returns the one for a grid size, built
+#   the first time it's asked for. The module level tables (CELLS, ROW_CELLS, ...) are those of the standard 9x9 grid, STANDARD.
+#
+#   Cells are numbered 0 to cells - 1, left to right and top to bottom. Units are numbered 0 to size - 1 for rows, then the columns, then
+#   the mini-grids (0-8, 9-17 and 18-26 for 9x9). Cells inside a mini-grid run left to right, top to bottom.
+#==============================================================================================================================================
+
+#============================================
+# Topology
+#============================================
+
+class Topology:
+    def __init__(self, boxIn):
+        if boxIn < 2:
+            raise ValueError(f"Mini-grids must be at least 2 cells wide, not {boxIn}")
+        box = boxIn
+        size = box * box
+        cells = size * size
+        self.box = box
+        self.size = size
+        self.cells = cells
+
+        self.rowCells = tuple(tuple(range(r * size, (r * size) + size)) for r in range(size))
+        self.colCells = tuple(tuple(range(c, cells, size)) for c in range(size))
+        self.miniGridCells = tuple(tuple(((((b // box) * box) + (p // box)) * size) + ((b % box) * box) + (p % box) for p in range(size))
+                                   for b in range(size))
+        self.units = self.rowCells + self.colCells + self.miniGridCells
+
+        # Which row, column and mini-grid each cell is in, and its three unit numbers (row, column, mini-grid).
+        self.rowOfCell = tuple(cell // size for cell in range(cells))
+        self.colOfCell = tuple(cell % size for cell in range(cells))
+        self.miniGridOfCell = tuple(((self.rowOfCell[cell] // box) * box) + (self.colOfCell[cell] // box) for cell in range(cells))
+        self.cellUnits = tuple((self.rowOfCell[cell], size + self.colOfCell[cell], (2 * size) + self.miniGridOfCell[cell])
+                               for cell in range(cells))
+
+        # The other cells in each cell's row, column and mini-grid, and all of its dependants (peers) in cell order.
+        self.rowPals = tuple(tuple(x for x in self.rowCells[self.rowOfCell[cell]] if x != cell) for cell in range(cells))
+        self.colPals = tuple(tuple(x for x in self.colCells[self.colOfCell[cell]] if x != cell) for cell in range(cells))
+        self.miniGridPals = tuple(tuple(x for x in self.miniGridCells[self.miniGridOfCell[cell]] if x != cell) for cell in range(cells))
+        self.peers = tuple(tuple(sorted(set(self.rowPals[cell] + self.colPals[cell] + self.miniGridPals[cell]))) for cell in range(cells))
+
+        # The mini-rows and mini-cols of each mini-grid.
+        self.miniGridRows = tuple(tuple(self.miniGridCells[b][i * box: (i * box) + box] for i in range(box)) for b in range(size))
+        self.miniGridCols = tuple(tuple(self.miniGridCells[b][i::box] for i in range(box)) for b in range(size))
+
+TOPOLOGIES = {}
+
+def forSize(sizeIn):
+    # The topology of a sizeIn x sizeIn grid (sizeIn being a square - 4, 9, 16, 25, ...)
+    topology = TOPOLOGIES.get(sizeIn)
+    if topology is None:
+        box = int(round(sizeIn ** 0.5))
+        if box * box != sizeIn:
+            raise ValueError(f"Grid size must be a square (4, 9, 16, 25, ...), not {sizeIn}")
+        topology = TOPOLOGIES[sizeIn] = Topology(box)
+    return topology
+
+#============================================
+# The standard 9x9 grid
+#============================================
+
+STANDARD = forSize(9)
+
+CELLS = STANDARD.cells
+
+ROW_CELLS = STANDARD.rowCells
+COL_CELLS = STANDARD.colCells
+MINI_GRID_CELLS = STANDARD.miniGridCells
+UNITS = STANDARD.units
+
+ROW_OF_CELL = STANDARD.rowOfCell
+COL_OF_CELL = STANDARD.colOfCell
+MINI_GRID_OF_CELL = STANDARD.miniGridOfCell
+CELL_UNITS = STANDARD.cellUnits
+
+ROW_PALS = STANDARD.rowPals
+COL_PALS = STANDARD.colPals
+MINI_GRID_PALS = STANDARD.miniGridPals
+PEERS = STANDARD.peers
+
+MINI_GRID_ROWS = STANDARD.miniGridRows
+MINI_GRID_COLS = STANDARD.miniGridCols